@@ -0,0 +1,7 @@
+"""Runtime code shared by the Stripe crew and the web summarizer.
+
+Deadlines, rate limiting and the circuit breaker, the Stripe client, payment
+state and webhooks, the request wire format and handler responses, prompt
+loading, model routing and usage metrics, and the long-lived server and
+warmup. Each crew imports these from here rather than keeping its own copy.
+"""
@@ -0,0 +1,157 @@
+"""Circuit breaker around LLM crew execution.
+
+Outcomes of recent calls are kept in a rolling time window. When enough of
+them fail, or run slower than ``CIRCUIT_SLOW_CALL_MS``, the circuit opens.
+While it is open, calls fail immediately with ``CircuitOpenError``, or go to
+the caller's fallback, instead of hanging on a degraded provider. After
+``CIRCUIT_OPEN_S`` one probe call is let through (half-open). If it succeeds,
+the circuit closes; if it fails, the circuit opens again.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from .deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+WINDOW_S = float(os.getenv('CIRCUIT_WINDOW_S', '60'))
+MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', '5'))
+FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', '0.5'))
+SLOW_CALL_MS = float(os.getenv('CIRCUIT_SLOW_CALL_MS', '30000'))
+OPEN_S = float(os.getenv('CIRCUIT_OPEN_S', '30'))
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """The provider is considered unavailable; the call was not attempted."""
+
+    def __init__(self, name: str, retry_after_s: float):
+        super().__init__(f"Service busy: {name} is unavailable, retry in {math.ceil(retry_after_s)}s")
+        self.retry_after_s = retry_after_s
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker with half-open probing."""
+
+    def __init__(self, name: str, window_s: float = WINDOW_S, min_calls: int = MIN_CALLS,
+                 failure_rate: float = FAILURE_RATE, slow_call_ms: float = SLOW_CALL_MS, open_s: float = OPEN_S):
+        self.name = name
+        self.window_s = window_s
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.open_s = open_s
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        # (finished at, failed, slow)
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self.rejected = 0
+
+    def _trim(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_s:
+            self._calls.popleft()
+
+    def _acquire(self) -> bool:
+        """Whether a call may go ahead; True marks it as the half-open probe."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self._opened_at >= self.open_s:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit {self.name} half-open, probing")
+            if self.state == CLOSED:
+                return False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            retry_after = max(0.0, self.open_s - (now - self._opened_at))
+        raise CircuitOpenError(self.name, retry_after)
+
+    def _record(self, failed: bool, latency_ms: float, probe: bool) -> None:
+        slow = latency_ms > self.slow_call_ms
+        with self._lock:
+            now = time.monotonic()
+            if probe:
+                self._probing = False
+                if failed or slow:
+                    self._open(now, "probe failed")
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    logger.info(f"Circuit {self.name} closed")
+                return
+            self._calls.append((now, failed, slow))
+            self._trim(now)
+            if self.state != CLOSED or len(self._calls) < self.min_calls:
+                return
+            failures = sum(1 for _, f, _ in self._calls if f) / len(self._calls)
+            slow_calls = sum(1 for _, _, s in self._calls if s) / len(self._calls)
+            if failures >= self.failure_rate or slow_calls >= self.failure_rate:
+                self._open(now, f"failure rate {failures:.0%}, slow rate {slow_calls:.0%}")
+
+    def _open(self, now: float, reason: str) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        logger.warning(f"Circuit {self.name} opened: {reason}")
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected without a probe slot."""
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self._opened_at < self.open_s
+
+    def call(self, fn: Callable[[], T], fallback: Optional[Callable[[CircuitOpenError], T]] = None) -> T:
+        """Run ``fn`` through the breaker; while open, use ``fallback`` or raise CircuitOpenError."""
+        try:
+            probe = self._acquire()
+        except CircuitOpenError as e:
+            if fallback is None:
+                raise
+            logger.info(f"{str(e)}; using fallback")
+            return fallback(e)
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except DeadlineExceeded:
+            # Our own budget ran out; that says nothing about the provider
+            if probe:
+                with self._lock:
+                    self._probing = False
+            raise
+        except Exception:
+            self._record(True, (time.perf_counter() - started) * 1000, probe)
+            raise
+        self._record(False, (time.perf_counter() - started) * 1000, probe)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = list(self._calls)
+            return {
+                'state': self.state,
+                'calls': len(calls),
+                'failures': sum(1 for _, f, _ in calls if f),
+                'slow': sum(1 for _, _, s in calls if s),
+                'rejected': self.rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for a provider."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
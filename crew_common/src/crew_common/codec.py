@@ -0,0 +1,27 @@
+"""JSON codec for request and response bodies.
+
+Uses orjson when it is installed, and the standard library json module
+otherwise. ``loads`` raises ``json.JSONDecodeError`` on bad input with
+either backend (orjson's error subclasses it).
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj)
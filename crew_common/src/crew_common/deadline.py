@@ -0,0 +1,73 @@
+"""Per-request deadline derived from the Lambda invocation's remaining time.
+
+The handler builds a ``Deadline`` from ``context.get_remaining_time_in_millis()``
+less a safety margin for returning the response, and passes it down. Stages
+call ``require`` before starting work that must not be cut off (an LLM parse,
+a charge), and ``timeout`` to cap each outgoing LLM or Stripe call.
+"""
+import math
+import os
+import time
+from typing import Any, Dict, Optional
+
+# Time kept back for building and returning the response
+SAFETY_MARGIN_MS = int(os.getenv('DEADLINE_MARGIN_MS', '1500'))
+# Shortest per-call timeout worth attempting
+MIN_CALL_TIMEOUT_S = 1.0
+
+
+class DeadlineExceeded(Exception):
+    """Not enough time is left to start (or finish) a stage."""
+
+
+class Deadline:
+    """A point in time by which the request must have answered."""
+
+    def __init__(self, budget_s: Optional[float] = None):
+        self.budget_s = budget_s
+        self._expires_at = None if budget_s is None else time.monotonic() + budget_s
+
+    @classmethod
+    def from_context(cls, context: Any, margin_ms: int = SAFETY_MARGIN_MS) -> 'Deadline':
+        """Deadline for a Lambda invocation; unbounded outside Lambda."""
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        if not callable(remaining):
+            return cls()
+        return cls(max(0, remaining() - margin_ms) / 1000)
+
+    @property
+    def bounded(self) -> bool:
+        return self._expires_at is not None
+
+    def remaining(self) -> float:
+        """Seconds left, or infinity for an unbounded deadline."""
+        if self._expires_at is None:
+            return math.inf
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def has(self, seconds: float) -> bool:
+        return self.remaining() >= seconds
+
+    def require(self, seconds: float, stage: str) -> None:
+        """Raise DeadlineExceeded unless ``seconds`` remain for ``stage``."""
+        if not self.has(seconds):
+            raise DeadlineExceeded(
+                f"Not enough time left for {stage}: {self.remaining():.1f}s remaining, ~{seconds:.1f}s needed"
+            )
+
+    def timeout(self, cap: float) -> float:
+        """Per-call timeout: ``cap`` seconds, or less if the deadline is closer."""
+        remaining = self.remaining()
+        if remaining < MIN_CALL_TIMEOUT_S:
+            raise DeadlineExceeded(f"Deadline reached ({remaining:.1f}s remaining)")
+        return min(cap, remaining)
+
+    def to_dict(self) -> Dict[str, Any]:
+        remaining = self.remaining()
+        return {
+            'budget_s': self.budget_s,
+            'remaining_s': None if math.isinf(remaining) else round(remaining, 2),
+        }
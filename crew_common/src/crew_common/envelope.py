@@ -0,0 +1,90 @@
+"""Request/response envelope shared by the test UI and the Lambda handler.
+
+The original wire format nests a JSON string inside JSON, ``{"body": "{...}"}``,
+in both directions, so every body is encoded and escaped twice. In the
+envelope format the body is the object itself. Bodies of at least
+``ENVELOPE_GZIP_MIN_BYTES`` can be gzipped and base64 encoded instead, flagged
+with ``isBase64Encoded`` and a ``Content-Encoding: gzip`` header as in API
+Gateway proxy events. Compression pays off over slow links rather than to a
+local container, so clients enable it with ``ENVELOPE_GZIP=1``.
+
+A client opts in with the ``X-Envelope`` request header, plus
+``Accept-Encoding: gzip`` for compressed replies. Callers without it, such as
+API Gateway (which needs string bodies) and older clients, get the original
+string-body responses. Request bodies are accepted in any of the three forms.
+"""
+import base64
+import gzip
+import os
+from typing import Any, Dict, Optional
+
+from . import codec
+
+ENVELOPE_HEADER = 'X-Envelope'
+ENVELOPE_VERSION = '1'
+GZIP_MIN_BYTES = int(os.getenv('ENVELOPE_GZIP_MIN_BYTES', '16384'))
+# Off by default: against a local container, compressing costs more than the bytes saved
+ENVELOPE_GZIP = os.getenv('ENVELOPE_GZIP', '0').strip().lower() not in ('0', 'false', 'no')
+
+
+def header(message: Dict, name: str) -> Optional[str]:
+    """A header of an event or response, matched case-insensitively."""
+    name = name.lower()
+    for key, value in (message.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def decode_body(message: Dict) -> Any:
+    """The body of a request or response in any of the wire forms; ValueError if unreadable."""
+    body = message.get('body')
+    if body is None or body == '':
+        return {}
+    if message.get('isBase64Encoded'):
+        try:
+            raw = base64.b64decode(body)
+            if (header(message, 'Content-Encoding') or '').lower() == 'gzip':
+                raw = gzip.decompress(raw)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"Invalid compressed body: {str(e)}")
+        return codec.loads(raw)
+    if isinstance(body, (str, bytes)):
+        return codec.loads(body)
+    return body
+
+
+def encode(body: Any, headers: Optional[Dict] = None, compress: bool = False) -> Dict:
+    """A message carrying ``body`` natively, or gzipped if ``compress`` and it is large."""
+    headers = dict(headers or {})
+    if compress:
+        raw = codec.dumps(body).encode('utf-8')
+        if len(raw) >= GZIP_MIN_BYTES:
+            headers['Content-Encoding'] = 'gzip'
+            return {
+                'headers': headers,
+                'body': base64.b64encode(gzip.compress(raw, compresslevel=1)).decode('ascii'),
+                'isBase64Encoded': True,
+            }
+    return {'headers': headers, 'body': body}
+
+
+def request(body: Any, headers: Optional[Dict] = None, compress: Optional[bool] = None) -> Dict:
+    """A request event in the envelope form; ``compress`` gzips large bodies both ways."""
+    compress = ENVELOPE_GZIP if compress is None else compress
+    headers = {**(headers or {}), ENVELOPE_HEADER: ENVELOPE_VERSION}
+    if compress:
+        headers['Accept-Encoding'] = 'gzip'
+    return encode(body, headers, compress)
+
+
+def response(event: Optional[Dict], status_code: int, body: Any, headers: Optional[Dict] = None) -> Dict:
+    """A handler response in the form the caller asked for."""
+    headers = {'Content-Type': 'application/json', **(headers or {})}
+    if not event or header(event, ENVELOPE_HEADER) is None:
+        return {'statusCode': status_code, 'headers': headers, 'body': codec.dumps(body)}
+    headers[ENVELOPE_HEADER] = ENVELOPE_VERSION
+    gzip_ok = 'gzip' in (header(event, 'Accept-Encoding') or '').lower()
+    message = encode(body, headers, compress=gzip_ok)
+    message['statusCode'] = status_code
+    return message
@@ -0,0 +1,36 @@
+"""Responses both crews' Lambda handlers give before any crew work.
+
+Stripe webhook deliveries and payment status lookups are answered the same
+way by either crew, from the shared payment state store.
+"""
+import base64
+import logging
+from typing import Any, Dict
+
+from . import codec, envelope
+from .payment_state import get_payment_store
+from .webhooks import WebhookError, handle_webhook
+
+logger = logging.getLogger(__name__)
+
+
+def webhook_response(event: Dict[str, Any], signature: str) -> Dict[str, Any]:
+    """Apply a Stripe webhook delivery; the raw body is needed to verify its signature."""
+    payload = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        payload = base64.b64decode(payload).decode('utf-8')
+    elif not isinstance(payload, str):
+        payload = codec.dumps(payload)
+    try:
+        return envelope.response(event, 200, handle_webhook(payload, signature))
+    except WebhookError as e:
+        logger.warning(f"Webhook rejected: {str(e)}")
+        return envelope.response(event, e.status_code, {"error": str(e)})
+
+
+def payment_status_response(event: Dict[str, Any], payment_intent: str) -> Dict[str, Any]:
+    """Last known state of a PaymentIntent created in async payment mode."""
+    state = get_payment_store().get(payment_intent)
+    if state is None:
+        return envelope.response(event, 404, {"error": f"Unknown payment intent: {payment_intent}"})
+    return envelope.response(event, 200, state.to_dict())
@@ -0,0 +1,124 @@
+"""In-process token and latency accounting for crew calls."""
+import logging
+import threading
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio used when the provider reports no usage.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a prompt from its length."""
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+@dataclass
+class UsageRecord:
+    """Token usage and latency of a single crew kickoff."""
+    stage: str
+    prompt_variant: str
+    prompt_chars: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    latency_ms: float
+    estimated: bool
+    model: str = ''
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class UsageTracker:
+    """Keeps the most recent usage records and aggregates them per stage."""
+
+    def __init__(self, max_records: int = 1000):
+        self._lock = threading.Lock()
+        self._records: Deque[UsageRecord] = deque(maxlen=max_records)
+
+    def record(self, stage: str, prompt: str, crew_output: Any, latency_s: float,
+               prompt_variant: str = 'full', model: Optional[str] = None) -> UsageRecord:
+        """Record usage for one kickoff, estimating tokens if none were reported."""
+        usage = getattr(crew_output, 'token_usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        estimated = not prompt_tokens
+        if estimated:
+            prompt_tokens = estimate_tokens(prompt)
+            completion_tokens = estimate_tokens(str(crew_output)) if crew_output is not None else 0
+        record = UsageRecord(
+            stage=stage,
+            prompt_variant=prompt_variant,
+            prompt_chars=len(prompt),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            latency_ms=round(latency_s * 1000, 1),
+            estimated=estimated,
+            model=model or '',
+        )
+        with self._lock:
+            self._records.append(record)
+        logger.info(
+            f"Usage [{stage}/{prompt_variant}{'/' + model if model else ''}]: prompt={record.prompt_tokens} "
+            f"completion={record.completion_tokens} latency={record.latency_ms}ms"
+            f"{' (estimated)' if estimated else ''}"
+        )
+        return record
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Average tokens and latency per stage and prompt variant."""
+        with self._lock:
+            records = list(self._records)
+        groups: Dict[str, list] = defaultdict(list)
+        for record in records:
+            groups[f"{record.stage}/{record.prompt_variant}"].append(record)
+        summary = {}
+        for key, group in groups.items():
+            n = len(group)
+            prompt = sum(r.prompt_tokens for r in group) / n
+            latency = sum(r.latency_ms for r in group) / n
+            summary[key] = {
+                'requests': n,
+                'avg_prompt_tokens': round(prompt, 1),
+                'avg_completion_tokens': round(sum(r.completion_tokens for r in group) / n, 1),
+                'avg_latency_ms': round(latency, 1),
+                'ms_per_1k_prompt_tokens': round(latency / prompt * 1000, 1) if prompt else 0.0,
+            }
+        return summary
+
+    def model_summary(self) -> Dict[str, Dict[str, float]]:
+        """Latency and token figures per model, for tuning per-agent routing."""
+        with self._lock:
+            records = list(self._records)
+        groups: Dict[str, list] = defaultdict(list)
+        for record in records:
+            groups[record.model or 'default'].append(record)
+        summary = {}
+        for model, group in groups.items():
+            n = len(group)
+            latencies = sorted(r.latency_ms for r in group)
+            completion = sum(r.completion_tokens for r in group)
+            summary[model] = {
+                'requests': n,
+                'avg_latency_ms': round(sum(latencies) / n, 1),
+                'p95_latency_ms': latencies[min(n - 1, int(n * 0.95))],
+                'avg_prompt_tokens': round(sum(r.prompt_tokens for r in group) / n, 1),
+                'avg_completion_tokens': round(completion / n, 1),
+                'ms_per_completion_token': round(sum(latencies) / completion, 2) if completion else 0.0,
+            }
+        return summary
+
+    def last(self, stage: Optional[str] = None) -> Optional[UsageRecord]:
+        with self._lock:
+            for record in reversed(self._records):
+                if stage is None or record.stage == stage:
+                    return record
+        return None
+
+
+usage_tracker = UsageTracker()
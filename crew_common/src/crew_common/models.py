@@ -0,0 +1,34 @@
+"""Request body pieces shared by both crews' typed requests."""
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from . import envelope
+
+
+class RequestError(ValueError):
+    """A request body that cannot be accepted; maps to a 400 response."""
+
+
+class Customer(BaseModel):
+    """Customer details sent with a request; fields the crew never reads are dropped."""
+    model_config = ConfigDict(extra='ignore')
+
+    id: Optional[str] = None
+    payment_method_id: Optional[str] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[Dict[str, Any]] = None
+    description: Optional[str] = None
+
+
+def request_body(event: Dict) -> Dict:
+    """Decode an event's body: a JSON string, a native object, or gzipped base64."""
+    try:
+        body = envelope.decode_body(event)
+    except ValueError:
+        raise RequestError("Invalid JSON in request body")
+    if not isinstance(body, dict):
+        raise RequestError("Request body must be a JSON object")
+    return body
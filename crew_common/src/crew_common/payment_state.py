@@ -0,0 +1,185 @@
+"""Local store of PaymentIntent state, kept current by Stripe webhooks.
+
+In async payment mode a request returns as soon as the PaymentIntent has been
+created. The intent is recorded here with the status Stripe reported, and
+webhook events (``payment_intent.succeeded``, ``payment_intent.payment_failed``
+etc.) move it to its final state. Events are applied at most once, and an
+event older than the state already stored is ignored, since Stripe does not
+guarantee delivery order. A final state (succeeded, canceled) is never
+replaced by a non-final one.
+
+The store is a SQLite file (PAYMENT_STATE_DB), by default in the container's
+/tmp. That is local to one container: a webhook delivery and a later status
+lookup only see each other's state if they reach the same container. With
+more than one container, point PAYMENT_STATE_DB at a filesystem they all
+mount, such as EFS.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_STATE_DB = os.getenv('PAYMENT_STATE_DB', '/tmp/payment_state.db')
+# Seconds to wait for another process's write lock on a shared store
+PAYMENT_STATE_LOCK_TIMEOUT_S = 10.0
+
+# Statuses after which no further webhook is expected for the intent
+FINAL_STATUSES = ('succeeded', 'canceled')
+
+PAYMENT_MODES = ('sync', 'async')
+
+# How far along a PaymentIntent is, to order two states stamped in the same
+# second (Stripe timestamps have one-second resolution). A failed attempt goes
+# back to requires_payment_method, so it ranks after processing.
+STATUS_RANK = {
+    'requires_confirmation': 0,
+    'requires_action': 1,
+    'processing': 2,
+    'requires_payment_method': 3,
+    'requires_capture': 3,
+    'succeeded': 4,
+    'canceled': 4,
+}
+
+
+def _rank_sql(column: str) -> str:
+    cases = ' '.join(f"WHEN '{status}' THEN {rank}" for status, rank in STATUS_RANK.items())
+    return f"(CASE {column} {cases} ELSE 0 END)"
+
+
+def payment_mode(requested: Optional[str] = None) -> str:
+    """The payment mode for a request: ``requested``, else PAYMENT_MODE, else sync."""
+    mode = (requested or os.getenv('PAYMENT_MODE', 'sync')).strip().lower()
+    if mode not in PAYMENT_MODES:
+        raise ValueError(f"payment_mode must be one of {PAYMENT_MODES}")
+    return mode
+
+
+@dataclass
+class PaymentState:
+    """Last known state of one PaymentIntent."""
+    payment_intent: str
+    status: str
+    amount: Optional[int] = None
+    currency: Optional[str] = None
+    last_error: Optional[str] = None
+    last_event: Optional[str] = None
+    # Unix time of the Stripe object or event the state was taken from
+    updated: int = 0
+
+    @property
+    def final(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        state = asdict(self)
+        state['final'] = self.final
+        return state
+
+
+def _value(obj: Any, key: str) -> Any:
+    """Read a field from a Stripe object or a plain dict."""
+    if isinstance(obj, dict):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+
+def _error_message(intent: Any) -> Optional[str]:
+    error = _value(intent, 'last_payment_error')
+    return _value(error, 'message') if error else None
+
+
+class PaymentStateStore:
+    """SQLite table of PaymentIntent states plus the ids of applied events."""
+
+    def __init__(self, path: str = PAYMENT_STATE_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=PAYMENT_STATE_LOCK_TIMEOUT_S, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS payment_intents (payment_intent TEXT PRIMARY KEY, status TEXT, "
+            "amount INTEGER, currency TEXT, last_error TEXT, last_event TEXT, updated INTEGER)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS events (event_id TEXT PRIMARY KEY, received REAL)")
+        self._db.commit()
+
+    def _upsert(self, state: PaymentState) -> None:
+        # A state older than the stored one (a late or replayed event) is ignored.
+        # A final status is never replaced by a non-final one, and a tie within
+        # the same second goes to the status further along.
+        final = ', '.join(f"'{status}'" for status in FINAL_STATUSES)
+        self._db.execute(
+            "INSERT INTO payment_intents VALUES (:payment_intent, :status, :amount, :currency, :last_error, "
+            ":last_event, :updated) ON CONFLICT(payment_intent) DO UPDATE SET status = excluded.status, "
+            "amount = excluded.amount, currency = excluded.currency, last_error = excluded.last_error, "
+            "last_event = COALESCE(excluded.last_event, last_event), updated = excluded.updated "
+            f"WHERE (payment_intents.status NOT IN ({final}) OR excluded.status IN ({final})) "
+            "AND (excluded.updated > payment_intents.updated OR (excluded.updated = payment_intents.updated "
+            f"AND {_rank_sql('excluded.status')} >= {_rank_sql('payment_intents.status')}))",
+            asdict(state),
+        )
+
+    def record_intent(self, intent: Any) -> PaymentState:
+        """Record a PaymentIntent as returned by the create call."""
+        state = PaymentState(
+            payment_intent=_value(intent, 'id'),
+            status=_value(intent, 'status'),
+            amount=_value(intent, 'amount'),
+            currency=_value(intent, 'currency'),
+            last_error=_error_message(intent),
+            updated=_value(intent, 'created') or int(time.time()),
+        )
+        with self._lock:
+            self._upsert(state)
+            self._db.commit()
+        return self.get(state.payment_intent) or state
+
+    def apply_event(self, event_id: str, event_type: str, intent: Dict, created: int) -> bool:
+        """Apply a webhook event's PaymentIntent; False if the event was already applied."""
+        state = PaymentState(
+            payment_intent=intent['id'],
+            status=intent.get('status'),
+            amount=intent.get('amount'),
+            currency=intent.get('currency'),
+            last_error=_error_message(intent),
+            last_event=event_type,
+            updated=created,
+        )
+        with self._lock:
+            try:
+                self._db.execute("INSERT INTO events VALUES (?, ?)", (event_id, time.time()))
+            except sqlite3.IntegrityError:
+                return False
+            self._upsert(state)
+            self._db.commit()
+        logger.info(f"Payment {state.payment_intent} -> {state.status} ({event_type})")
+        return True
+
+    def get(self, payment_intent: str) -> Optional[PaymentState]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payment_intent, status, amount, currency, last_error, last_event, updated "
+                "FROM payment_intents WHERE payment_intent = ?",
+                (payment_intent,),
+            ).fetchone()
+        return PaymentState(*row) if row else None
+
+
+_default_store: Optional[PaymentStateStore] = None
+
+
+def get_payment_store() -> PaymentStateStore:
+    global _default_store
+    if _default_store is None:
+        if os.getenv('AWS_LAMBDA_FUNCTION_NAME') and PAYMENT_STATE_DB.startswith('/tmp/'):
+            logger.warning(
+                f"Payment state is kept in {PAYMENT_STATE_DB}, local to this container; "
+                "set PAYMENT_STATE_DB to a shared mount if webhooks may reach other containers"
+            )
+        _default_store = PaymentStateStore()
+    return _default_store
@@ -0,0 +1,102 @@
+"""Prompt templates loaded once from a crew's YAML config.
+
+Each crew builds one ``PromptConfig`` for its own config directory, which
+holds agents.yaml and tasks.yaml.
+"""
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Union
+
+import yaml
+
+# Only bare identifiers in braces are placeholders, so literal JSON examples
+# such as {"type": "payment_link"} pass through untouched.
+_PLACEHOLDER = re.compile(r'\{([A-Za-z_][A-Za-z0-9_]*)\}')
+
+PROMPT_VARIANTS = ('full', 'compact')
+
+
+class PromptTemplate:
+    """A prompt split into literal text and placeholders at load time."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._parts: List[Union[str, int]] = []
+        self._fields: List[str] = []
+        last = 0
+        for match in _PLACEHOLDER.finditer(text):
+            self._parts.append(text[last:match.start()])
+            self._parts.append(len(self._fields))
+            self._fields.append(match.group(1))
+            last = match.end()
+        self._parts.append(text[last:])
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._fields)
+
+    def render(self, **values) -> str:
+        """Substitute placeholders, leaving unknown ones in place."""
+        if not self._fields:
+            return self.text
+        out = []
+        for part in self._parts:
+            if isinstance(part, int):
+                name = self._fields[part]
+                out.append(str(values[name]) if name in values else '{' + name + '}')
+            else:
+                out.append(part)
+        return ''.join(out)
+
+
+def get_prompt_variant() -> str:
+    """Return the configured prompt variant ("full" or "compact")."""
+    variant = os.getenv('PROMPT_VARIANT', 'full').strip().lower()
+    if variant not in PROMPT_VARIANTS:
+        raise ValueError(f"PROMPT_VARIANT must be one of {PROMPT_VARIANTS}, got '{variant}'")
+    return variant
+
+
+def _variant_entry(config: Dict, name: str, variant: str) -> Dict:
+    key = f"{name}_{variant}" if variant != 'full' else name
+    entry = config.get(key) or config.get(name)
+    if entry is None:
+        raise KeyError(f"No prompt configuration named '{name}'")
+    return entry
+
+
+class PromptConfig:
+    """Agent and task prompts from the agents.yaml and tasks.yaml in ``config_dir``."""
+
+    def __init__(self, config_dir: str):
+        self.config_dir = config_dir
+
+    @lru_cache(maxsize=None)
+    def _load_yaml(self, filename: str) -> Dict:
+        with open(os.path.join(self.config_dir, filename), 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+
+    @lru_cache(maxsize=None)
+    def agent_prompt(self, name: str, variant: str = 'full') -> Dict[str, str]:
+        """Return role, goal and backstory for an agent from agents.yaml."""
+        entry = _variant_entry(self._load_yaml('agents.yaml'), name, variant)
+        return {field: entry[field].strip() for field in ('role', 'goal', 'backstory')}
+
+    @lru_cache(maxsize=None)
+    def agent_llm(self, name: str) -> Dict[str, Any]:
+        """Return the optional ``llm`` block (model, fallback, latency budget) for an agent."""
+        entry = self._load_yaml('agents.yaml').get(name) or {}
+        return dict(entry.get('llm') or {})
+
+    @lru_cache(maxsize=None)
+    def task_template(self, name: str, variant: str = 'full') -> PromptTemplate:
+        """Return the precompiled description template for a task in tasks.yaml."""
+        entry = _variant_entry(self._load_yaml('tasks.yaml'), name, variant)
+        return PromptTemplate(entry['description'].strip())
+
+    @lru_cache(maxsize=None)
+    def task_expected_output(self, name: str, variant: str = 'full') -> str:
+        """Return the expected output for a task in tasks.yaml."""
+        entry = _variant_entry(self._load_yaml('tasks.yaml'), name, variant)
+        return entry['expected_output'].strip()
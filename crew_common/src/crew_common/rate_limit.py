@@ -0,0 +1,200 @@
+"""Process-wide rate limiting for Stripe and LLM calls.
+
+Each call class (``stripe_write``, ``stripe_read``, ``llm``) has a token
+bucket and a concurrency cap, configured from the environment, e.g.
+``STRIPE_WRITE_RPS``, ``STRIPE_WRITE_BURST``, ``STRIPE_WRITE_CONCURRENCY``.
+A 429 from the provider halves the class's rate and pauses it for the
+``Retry-After`` period (or a jittered exponential backoff) before the call
+is retried. The rate then recovers gradually as calls succeed.
+"""
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from .deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# (requests per second, burst, max concurrent calls) per call class
+DEFAULT_LIMITS = {
+    'stripe_write': (25.0, 25, 10),
+    'stripe_read': (25.0, 25, 10),
+    'llm': (2.0, 4, 4),
+}
+MAX_RETRIES = int(os.getenv('RATE_LIMIT_RETRIES', '3'))
+BACKOFF_BASE_S = 0.5
+BACKOFF_CAP_S = 20.0
+# Rate after a 429 is multiplied by this; each success recovers a little
+THROTTLE_FACTOR = 0.5
+RECOVERY_FACTOR = 1.05
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an exception from Stripe or an LLM provider is a 429."""
+    if type(error).__name__ in ('RateLimitError', 'RateLimitException'):
+        return True
+    for attr in ('http_status', 'status_code'):
+        if getattr(error, attr, None) == 429:
+            return True
+    return getattr(getattr(error, 'response', None), 'status_code', None) == 429
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds to wait from the error's Retry-After header, if it has one."""
+    headers = getattr(error, 'headers', None) or getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        # Neither seconds nor an HTTP date; back off as if there were no header
+        return None
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+@dataclass
+class RateLimitStats:
+    """Call counts, queue wait and throttling for one call class."""
+    calls: int = 0
+    queued_s: float = 0.0
+    max_queued_s: float = 0.0
+    throttled: int = 0
+    retries: int = 0
+    rate: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats['avg_queue_ms'] = round(self.queued_s / self.calls * 1000, 1) if self.calls else 0.0
+        stats['queued_s'] = round(self.queued_s, 3)
+        stats['max_queued_s'] = round(self.max_queued_s, 3)
+        stats['rate'] = round(self.rate, 2)
+        return stats
+
+
+class RateLimiter:
+    """Token bucket plus concurrency cap, adapting its rate to 429 responses."""
+
+    def __init__(self, name: str, rate: float, burst: int, max_concurrency: int):
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._stats = RateLimitStats(rate=rate)
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    @contextmanager
+    def slot(self, deadline: Optional[Deadline] = None) -> Iterator[None]:
+        """Wait for a token and a concurrency slot, recording the time spent queued."""
+        started = time.monotonic()
+        wait = self._reserve()
+        if deadline is not None and not deadline.has(wait):
+            raise DeadlineExceeded(f"{self.name} rate limit would delay the call {wait:.1f}s past the deadline")
+        if wait > 0:
+            time.sleep(wait)
+        timeout = None if deadline is None or not deadline.bounded else deadline.remaining()
+        if not self._slots.acquire(timeout=timeout):
+            raise DeadlineExceeded(f"Deadline reached waiting for a {self.name} slot")
+        queued = time.monotonic() - started
+        with self._lock:
+            self._stats.calls += 1
+            self._stats.queued_s += queued
+            self._stats.max_queued_s = max(self._stats.max_queued_s, queued)
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def throttle(self, delay: float) -> None:
+        """Back off after a 429: pause the class and halve its rate."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self.rate = max(self.max_rate * 0.05, self.rate * THROTTLE_FACTOR)
+            self._stats.throttled += 1
+            self._stats.rate = self.rate
+        logger.warning(f"Rate limited on {self.name}: pausing {delay:.1f}s, rate now {self.rate:.2f}/s")
+
+    def _recover(self) -> None:
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate * RECOVERY_FACTOR)
+                self._stats.rate = self.rate
+
+    def run(self, fn: Callable[[], T], deadline: Optional[Deadline] = None, retries: int = MAX_RETRIES) -> T:
+        """Call ``fn`` under the limit, retrying 429s with Retry-After or jittered backoff."""
+        attempt = 0
+        while True:
+            with self.slot(deadline):
+                try:
+                    result = fn()
+                except Exception as e:
+                    if not is_rate_limited(e) or attempt >= retries:
+                        raise
+                    delay = retry_after(e)
+                    if delay is None:
+                        delay = min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt) * random.uniform(0.5, 1.5)
+                    self.throttle(delay)
+                    attempt += 1
+                    with self._lock:
+                        self._stats.retries += 1
+                    continue
+            self._recover()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._stats.to_dict()
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(name: str) -> RateLimiter:
+    """Return the process-wide limiter for a call class."""
+    with _limiters_lock:
+        if name not in _limiters:
+            rate, burst, concurrency = DEFAULT_LIMITS[name]
+            prefix = name.upper()
+            _limiters[name] = RateLimiter(
+                name,
+                rate=float(os.getenv(f'{prefix}_RPS', rate)),
+                burst=int(os.getenv(f'{prefix}_BURST', burst)),
+                max_concurrency=int(os.getenv(f'{prefix}_CONCURRENCY', concurrency)),
+            )
+        return _limiters[name]
+
+
+def rate_limit_summary() -> Dict[str, Dict[str, Any]]:
+    """Queue wait and throttling figures for every call class used so far."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: lim.stats() for name, lim in limiters.items()}
@@ -0,0 +1,120 @@
+"""Per-agent model routing with optional latency budgets.
+
+Each agent may name its own model, a faster fallback and a latency budget,
+either in the ``llm`` block of its crew's agents.yaml or through environment
+variables named after the agent (e.g. ``PAYMENT_MANAGER_MODEL``,
+``PAYMENT_MANAGER_FALLBACK_MODEL``, ``PAYMENT_MANAGER_LATENCY_BUDGET_MS``).
+The environment wins over the YAML. Agents without a model use crewAI's
+default (``MODEL``).
+"""
+import logging
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .prompts import PromptConfig
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest observation in the per-model latency average
+LATENCY_EWMA_ALPHA = 0.3
+# While routed to the fallback, send every Nth call to the primary so its
+# latency estimate can recover
+PROBE_EVERY = 10
+
+
+@dataclass
+class ModelRoute:
+    """Model choice for one agent."""
+    agent: str
+    model: Optional[str] = None
+    fallback: Optional[str] = None
+    latency_budget_ms: Optional[float] = None
+
+    @property
+    def primary(self) -> str:
+        return model_name(self.model)
+
+
+def model_name(model: Optional[str]) -> str:
+    """Name under which a model's latency and usage are recorded."""
+    return model or os.getenv('MODEL') or 'default'
+
+
+def build_llm(model: Optional[str], timeout: Optional[float] = None):
+    """Return a crewAI LLM for the model, or None to keep crewAI's default.
+
+    With a timeout, crewAI's default model (MODEL) is built explicitly so the
+    timeout applies to it too.
+    """
+    model = model or (os.getenv('MODEL') if timeout else None)
+    if not model:
+        return None
+    from crewai import LLM
+    return LLM(model=model, timeout=timeout) if timeout else LLM(model=model)
+
+
+def agent_route(agent: str, prompts: PromptConfig) -> ModelRoute:
+    """Return the configured route for an agent of the crew whose prompts are ``prompts``."""
+    config = prompts.agent_llm(agent)
+    prefix = agent.upper()
+    budget = os.getenv(f'{prefix}_LATENCY_BUDGET_MS') or config.get('latency_budget_ms')
+    return ModelRoute(
+        agent=agent,
+        model=os.getenv(f'{prefix}_MODEL') or config.get('model'),
+        fallback=os.getenv(f'{prefix}_FALLBACK_MODEL') or config.get('fallback'),
+        latency_budget_ms=float(budget) if budget else None,
+    )
+
+
+class ModelRouter:
+    """Chooses each agent's model from recent per-model latency."""
+
+    def __init__(self, alpha: float = LATENCY_EWMA_ALPHA):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._latency: Dict[str, float] = {}
+        self._fallback_calls: Dict[str, int] = defaultdict(int)
+
+    def observe(self, model: str, latency_ms: float) -> None:
+        """Fold one call's latency into the model's moving average."""
+        with self._lock:
+            previous = self._latency.get(model)
+            self._latency[model] = latency_ms if previous is None else (
+                self.alpha * latency_ms + (1 - self.alpha) * previous
+            )
+
+    def expected_latency(self, model: str) -> Optional[float]:
+        with self._lock:
+            return self._latency.get(model)
+
+    def choose(self, route: ModelRoute) -> Optional[str]:
+        """Return the model to use, or None for crewAI's default.
+
+        Falls back when the primary's recent latency exceeds the budget.
+        """
+        if not (route.latency_budget_ms and route.fallback):
+            return route.model
+        expected = self.expected_latency(route.primary)
+        if expected is None or expected <= route.latency_budget_ms:
+            return route.model
+        with self._lock:
+            self._fallback_calls[route.agent] += 1
+            probe = self._fallback_calls[route.agent] % PROBE_EVERY == 0
+        if probe:
+            logger.info(f"Probing {route.primary} for {route.agent} (recent {expected:.0f}ms)")
+            return route.model
+        logger.info(
+            f"Routing {route.agent} to {route.fallback}: {route.primary} averages {expected:.0f}ms, "
+            f"budget {route.latency_budget_ms:.0f}ms"
+        )
+        return route.fallback
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            return {model: round(latency, 1) for model, latency in self._latency.items()}
+
+
+model_router = ModelRouter()
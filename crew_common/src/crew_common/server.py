@@ -0,0 +1,211 @@
+"""HTTP server that runs a crew's Lambda handler outside Lambda.
+
+Each crew's ``server`` module sets its own pool size and request timeout and
+calls ``serve`` with its ``lambda_handler``. Two forms of request are accepted:
+
+* ``POST /2015-03-31/functions/function/invocations`` with a Lambda event as
+  the body, as the runtime interface emulator takes it.
+* Any other ``POST`` is a plain HTTP request, turned into an API Gateway proxy
+  event, e.g. a Stripe webhook delivery to ``/webhook``.
+
+``GET /health`` reports the pool's size and load. Requests run on a fixed pool
+of worker threads. Beyond the pool and the backlog of waiting connections,
+requests get an immediate 503.
+"""
+import base64
+import logging
+import os
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Dict
+
+from . import codec
+
+logger = logging.getLogger(__name__)
+
+SERVER_DRAIN_S = float(os.getenv('SERVER_DRAIN_S', '30'))
+# A client that stalls while sending its request is dropped after this
+SERVER_READ_TIMEOUT_S = 5.0
+INVOCATIONS_PATH = '/2015-03-31/functions/function/invocations'
+
+Handler = Callable[[Dict[str, Any], Any], Dict[str, Any]]
+
+
+class RequestContext:
+    """The parts of the Lambda context object the handler uses, for one request."""
+
+    def __init__(self, timeout_s: float, function_name: str):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self._expires_at = time.monotonic() + timeout_s
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._expires_at - time.monotonic()) * 1000))
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.0: one request per connection, so an idle keep-alive client never
+    # holds a worker that queued requests are waiting for
+    protocol_version = 'HTTP/1.0'
+    timeout = SERVER_READ_TIMEOUT_S
+
+    def do_GET(self) -> None:
+        if self.path.rstrip('/') == '/health':
+            self.send_json(200, self.server.health())
+        else:
+            self.send_json(404, {'error': f"Not found: {self.path}"})
+
+    def do_POST(self) -> None:
+        raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        invocation = self.path.rstrip('/') == INVOCATIONS_PATH
+        try:
+            event = codec.loads(raw) if invocation else self.proxy_event(raw)
+        except ValueError:
+            self.send_json(400, {'error': "Invalid JSON in invocation payload"})
+            return
+        context = RequestContext(self.server.request_timeout_s, self.server.function_name)
+        try:
+            result = self.server.handler(event, context)
+        except Exception as e:
+            logger.exception(f"Request {context.aws_request_id} failed")
+            result = {'statusCode': 500, 'body': codec.dumps({'error': f"Internal server error - {str(e)}"})}
+        if invocation:
+            # The emulator returns the handler's response object itself
+            self.send_json(200, result)
+        else:
+            self.send_proxy_response(result)
+
+    def proxy_event(self, raw: bytes) -> Dict[str, Any]:
+        """An API Gateway proxy event for a plain HTTP request."""
+        event = {
+            'httpMethod': self.command,
+            'path': self.path,
+            'headers': dict(self.headers.items()),
+            'isBase64Encoded': False,
+        }
+        if (self.headers.get('Content-Encoding') or '').lower() == 'gzip':
+            event['body'] = base64.b64encode(raw).decode('ascii')
+            event['isBase64Encoded'] = True
+        else:
+            event['body'] = raw.decode('utf-8')
+        return event
+
+    def send_proxy_response(self, result: Dict[str, Any]) -> None:
+        body = result.get('body', '')
+        if result.get('isBase64Encoded'):
+            data = base64.b64decode(body)
+        else:
+            data = (body if isinstance(body, str) else codec.dumps(body)).encode('utf-8')
+        self.send_response(result.get('statusCode', 200))
+        headers = {'Content-Type': 'application/json', **(result.get('headers') or {})}
+        for name, value in headers.items():
+            if name.lower() != 'content-length':
+                self.send_header(name, str(value))
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status: int, body: Any) -> None:
+        data = codec.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+class CrewServer(HTTPServer):
+    """HTTP server that runs each connection on a bounded pool of worker threads."""
+
+    allow_reuse_address = True
+
+    def __init__(self, address, handler: Handler, workers: int, backlog: int, request_timeout_s: float,
+                 function_name: str = 'crew-server'):
+        super().__init__(address, RequestHandler)
+        self.handler = handler
+        self.function_name = function_name
+        self.workers = max(1, workers)
+        self.request_timeout_s = request_timeout_s
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='server')
+        self.slots = threading.BoundedSemaphore(self.workers + max(0, backlog))
+        self._active = 0
+        self._idle = threading.Condition()
+        self.rejected = 0
+
+    def process_request(self, request, client_address) -> None:
+        if not self.slots.acquire(blocking=False):
+            self.rejected += 1
+            self.reject(request)
+            return
+        with self._idle:
+            self._active += 1
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+            with self._idle:
+                self._active -= 1
+                self._idle.notify_all()
+
+    def reject(self, request) -> None:
+        """Answer 503 without reading the request: every worker and queue slot is taken."""
+        body = b'{"error":"Server overloaded"}'
+        try:
+            request.sendall(
+                b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\nContent-Type: application/json\r\n"
+                b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body)
+            )
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def health(self) -> Dict[str, Any]:
+        return {'status': 'ok', 'workers': self.workers, 'active': self._active, 'rejected': self.rejected}
+
+    def drain(self, timeout_s: float = SERVER_DRAIN_S) -> bool:
+        """Wait for in-flight requests to finish; False if some were still running at the timeout."""
+        deadline = time.monotonic() + timeout_s
+        with self._idle:
+            while self._active:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        self.pool.shutdown(wait=True)
+        return True
+
+
+def serve(handler: Handler, host: str, port: int, workers: int, backlog: int, request_timeout_s: float,
+          drain_s: float = SERVER_DRAIN_S, function_name: str = 'crew-server') -> int:
+    """Serve until SIGTERM or SIGINT, then drain in-flight requests."""
+    server = CrewServer((host, port), handler, workers, backlog, request_timeout_s, function_name)
+
+    def stop(signum, frame) -> None:
+        logger.info(f"Received signal {signum}, shutting down")
+        # shutdown() waits for serve_forever to return, so it cannot run on this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(f"Serving on {host}:{port} with {server.workers} workers")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        drained = server.drain(drain_s)
+        logger.info("Shut down cleanly" if drained else f"Shut down with requests still running after {drain_s}s")
+    return 0
+
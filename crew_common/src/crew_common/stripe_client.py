@@ -0,0 +1,38 @@
+"""Per-instance Stripe API clients.
+
+Each crew holds its own ``stripe.StripeClient``, carrying its API key and
+timeout, instead of setting the module-global ``stripe.api_key`` and
+``stripe.default_http_client``. Requests for different accounts or keys can
+then run concurrently on the threads of one process. The clients share one
+pooled requests.Session, so a new client reuses open connections.
+"""
+import threading
+from typing import Optional
+
+import requests
+import stripe
+from requests.adapters import HTTPAdapter
+
+_session = None
+_lock = threading.Lock()
+
+
+def get_stripe_session() -> requests.Session:
+    """Return the process-wide session for Stripe API calls, creating it on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def build_stripe_client(api_key: str, timeout: Optional[float] = None) -> stripe.StripeClient:
+    """A client for ``api_key``; ``timeout`` caps each call (the Stripe default otherwise)."""
+    options = {'session': get_stripe_session()}
+    if timeout is not None:
+        options['timeout'] = timeout
+    return stripe.StripeClient(api_key, http_client=stripe.RequestsClient(**options))
@@ -0,0 +1,88 @@
+"""Warmup for provisioned concurrency and scheduled keep-warm pings.
+
+A warmup event, ``{"warmup": true}`` or an EventBridge scheduled event,
+initializes what the first real request would otherwise pay for. Each crew's
+``warmup`` module lists its components as ``(name, init)`` pairs and passes
+them to ``warm``; the shared ones (the Stripe HTTP session, the payment state
+store, the rate limiters and circuit breaker) are defined here. Each component
+is initialized once per process. Later pings skip it, so a warm container
+answers in milliseconds. The report gives each component's status and how
+long it took.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Open a connection to the Stripe API during warmup (no API key is sent)
+WARMUP_CONNECT = os.getenv('WARMUP_CONNECT', '1').strip().lower() not in ('0', 'false', 'no')
+STRIPE_API_BASE = 'https://api.stripe.com'
+
+Component = Tuple[str, Callable[[], None]]
+
+# Initialization time in ms of each component warmed in this process
+_warmed: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def is_warmup_event(event: Any) -> bool:
+    """A keep-warm ping: ``{"warmup": true}`` or an EventBridge scheduled event."""
+    if not isinstance(event, dict):
+        return False
+    if event.get('warmup'):
+        return True
+    return event.get('source') == 'aws.events' and event.get('detail-type') == 'Scheduled Event'
+
+
+def stripe_http() -> None:
+    from .stripe_client import get_stripe_session
+    session = get_stripe_session()
+    if WARMUP_CONNECT:
+        # DNS, TCP and TLS now; the pooled connection is reused by the first real call
+        session.head(STRIPE_API_BASE, timeout=3)
+
+
+def payment_state() -> None:
+    from .payment_state import get_payment_store
+    get_payment_store()
+
+
+def limits() -> None:
+    from .circuit_breaker import breaker
+    from .rate_limit import limiter
+    for name in ('stripe_write', 'stripe_read', 'llm'):
+        limiter(name)
+    breaker('llm')
+
+
+def warm(components: List[Component]) -> Dict[str, Any]:
+    """Initialize every component not yet warm in this process and report on each."""
+    started = time.perf_counter()
+    report_components = {}
+    with _lock:
+        cold = not _warmed
+        for name, init in components:
+            if name in _warmed:
+                report_components[name] = {'status': 'warm', 'init_ms': _warmed[name]}
+                continue
+            component_started = time.perf_counter()
+            try:
+                init()
+            except Exception as e:
+                # Not remembered, so the next ping tries again
+                logger.warning(f"Warmup of {name} failed: {str(e)}")
+                report_components[name] = {'status': 'failed', 'error': str(e)}
+                continue
+            _warmed[name] = round((time.perf_counter() - component_started) * 1000, 1)
+            report_components[name] = {'status': 'initialized', 'init_ms': _warmed[name]}
+    report = {
+        'warmup': True,
+        'cold': cold,
+        'components': report_components,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+    logger.info(f"Warmup: {report}")
+    return report
@@ -0,0 +1,60 @@
+"""Unit tests for the PaymentIntent state store.
+
+Run from the package root: `python -m unittest discover tests` (or `pytest tests`).
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from crew_common.payment_state import PaymentStateStore
+
+
+def intent(status, **fields):
+    return {'id': 'pi_1', 'status': status, 'amount': 500, 'currency': 'usd', **fields}
+
+
+class EventOrdering(unittest.TestCase):
+
+    def setUp(self):
+        self.store = PaymentStateStore(':memory:')
+
+    def apply(self, event_id, status, created):
+        return self.store.apply_event(event_id, f"payment_intent.{status}", intent(status), created)
+
+    def test_newer_event_replaces_state(self):
+        self.apply('evt_1', 'processing', 1000)
+        self.apply('evt_2', 'succeeded', 1001)
+        self.assertEqual(self.store.get('pi_1').status, 'succeeded')
+
+    def test_older_event_is_ignored(self):
+        self.apply('evt_2', 'succeeded', 1001)
+        self.apply('evt_1', 'processing', 1000)
+        self.assertEqual(self.store.get('pi_1').status, 'succeeded')
+
+    def test_late_processing_in_same_second_keeps_final_state(self):
+        self.apply('evt_2', 'succeeded', 1000)
+        self.apply('evt_1', 'processing', 1000)
+        state = self.store.get('pi_1')
+        self.assertEqual(state.status, 'succeeded')
+        self.assertTrue(state.final)
+
+    def test_final_state_is_never_replaced_by_non_final(self):
+        self.apply('evt_1', 'canceled', 1000)
+        self.apply('evt_2', 'requires_action', 1005)
+        self.assertEqual(self.store.get('pi_1').status, 'canceled')
+
+    def test_failure_in_same_second_replaces_processing(self):
+        self.apply('evt_1', 'processing', 1000)
+        self.apply('evt_2', 'requires_payment_method', 1000)
+        self.assertEqual(self.store.get('pi_1').status, 'requires_payment_method')
+
+    def test_replayed_event_is_not_applied(self):
+        self.assertTrue(self.apply('evt_1', 'processing', 1000))
+        self.assertFalse(self.apply('evt_1', 'processing', 1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+"""Bulk payment-link creation from CSV or JSONL.
+
+Usage:
+    batch products.csv --output links.jsonl
+    batch products.jsonl --output links.jsonl --concurrency 8
+
+Rows are streamed from the input file. Rows that are already structured, with a
+``product`` (or ``name``) and an ``amount`` in dollars (or ``amount_cents``),
+go straight to ``StripeCrew.create_payment_link`` without the LLM. Rows with a
+free-text ``query`` column are read by the local parser, and only go to the LLM
+if that fails.
+
+Each row's result is appended to the output JSONL as soon as it is known. It is
+keyed by the row's ``id`` column, or its position in the file. Rerunning with
+the same output skips rows that already succeeded and retries the rest. Stripe
+idempotency keys derived from each row make the retry of a row cut off
+mid-flight return its link rather than create a second one.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from dotenv import load_dotenv
+
+from src.stripe_crew.models import PaymentRequest
+
+logger = logging.getLogger(__name__)
+
+# Rows in flight at once; each makes three Stripe writes under the stripe_write limiter
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+
+
+@dataclass
+class BatchStats:
+    """Outcome counts for one batch run."""
+    rows: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    llm_parsed: int = 0
+    elapsed_s: float = 0.0
+
+    def to_dict(self) -> Dict:
+        stats = asdict(self)
+        stats['elapsed_s'] = round(self.elapsed_s, 2)
+        stats['rows_per_s'] = round((self.succeeded + self.failed) / self.elapsed_s, 2) if self.elapsed_s else 0.0
+        return stats
+
+
+class InvalidRow(ValueError):
+    """An input line that is not a JSON object; yielded in place of its row."""
+
+
+def read_rows(path: str) -> Iterator[Tuple[str, Union[Dict, InvalidRow]]]:
+    """Yield (row id, row) from a CSV or JSONL file without loading it whole.
+
+    A JSONL line that is not a JSON object is yielded as an ``InvalidRow``
+    keyed by its line number, so one bad line fails only its own row.
+    """
+    is_csv = path.lower().endswith('.csv')
+    with open(path, newline='' if is_csv else None, encoding='utf-8') as f:
+        if is_csv:
+            for number, row in enumerate(csv.DictReader(f), start=1):
+                yield str(row.get('id') or number), row
+            return
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield str(number), InvalidRow(f"Line {number} is not valid JSON: {e.msg}")
+                continue
+            if not isinstance(row, dict):
+                yield str(number), InvalidRow(f"Line {number} is not a JSON object")
+                continue
+            yield str(row.get('id') or number), row
+
+
+def row_request(row: Dict) -> Optional[PaymentRequest]:
+    """The payment link a structured row describes, or None if it has no product and price."""
+    product = (row.get('product') or row.get('name') or '').strip()
+    if row.get('amount_cents') not in (None, ''):
+        amount = int(row['amount_cents']) / 100
+    elif row.get('amount') not in (None, ''):
+        amount = float(str(row['amount']).lstrip('$').replace(',', ''))
+    else:
+        return None
+    if not product:
+        return None
+    return PaymentRequest(type='payment_link', product=product, amount=amount)
+
+
+def completed_rows(output: str) -> Set[str]:
+    """Ids of rows that already succeeded in an earlier run writing to ``output``."""
+    done: Set[str] = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            if record.get('success'):
+                done.add(str(record['id']))
+    return done
+
+
+def idempotency_key(row_id: str, payment: PaymentRequest) -> str:
+    digest = hashlib.sha256(f"{row_id}\0{payment.product}\0{payment.amount_cents}".encode('utf-8')).hexdigest()
+    return f"batch-{digest[:32]}"
+
+
+class BatchRunner:
+    """Creates the payment links for a stream of rows with bounded concurrency.
+
+    Each worker thread gets its own crew from ``crew_factory``. The crew's
+    manager agent keeps per-run executor state, so two rows must never run
+    an LLM parse on the same agent at the same time.
+    """
+
+    def __init__(self, crew_factory: Callable[[], Any], output: str, concurrency: int = BATCH_CONCURRENCY):
+        self.crew_factory = crew_factory
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.stats = BatchStats()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def crew(self):
+        """The calling worker thread's crew, created on its first row."""
+        crew = getattr(self._local, 'crew', None)
+        if crew is None:
+            crew = self._local.crew = self.crew_factory()
+        return crew
+
+    def operations(self, row: Dict) -> Tuple[List[PaymentRequest], str]:
+        """The payment links for a row and where they came from: row, local or llm."""
+        payment = row_request(row)
+        if payment is not None:
+            return [payment], 'row'
+        query = (row.get('query') or '').strip()
+        if not query:
+            raise ValueError("Row needs product and amount, or a query")
+        operations = self.crew.local_parse_operations(query)
+        source = 'local'
+        if not operations:
+            operations, source = self.crew.llm_parse_operations(query), 'llm'
+        if any(op.type != 'payment_link' for op in operations):
+            raise ValueError("Batch rows may only create payment links")
+        return operations, source
+
+    def process(self, row_id: str, row: Dict) -> Dict:
+        record = {'id': row_id}
+        try:
+            operations, record['source'] = self.operations(row)
+            record['links'] = [
+                {
+                    'product': op.product,
+                    'amount': op.amount,
+                    'url': self.crew.create_payment_link(
+                        op.product, op.amount_cents, idempotency_key=f"{idempotency_key(row_id, op)}-{index}"
+                    ),
+                }
+                for index, op in enumerate(operations)
+            ]
+            record['success'] = True
+        except Exception as e:
+            logger.error(f"Row {row_id} failed: {str(e)}")
+            # The crew itself may be what failed to build
+            crew = getattr(self._local, 'crew', None)
+            record['error'] = crew.format_error(e) if crew is not None else f"Error: {str(e)}"
+            record['success'] = False
+        return record
+
+    def write(self, out, record: Dict) -> None:
+        with self._lock:
+            out.write(json.dumps(record) + '\n')
+            # Flushed per row so an interrupted run keeps every finished row
+            out.flush()
+            if record['success']:
+                self.stats.succeeded += 1
+            else:
+                self.stats.failed += 1
+            if record.get('source') == 'llm':
+                self.stats.llm_parsed += 1
+
+    def run(self, rows: Iterator[Tuple[str, Union[Dict, InvalidRow]]]) -> BatchStats:
+        done = completed_rows(self.output)
+        started = time.perf_counter()
+        # Caps rows read ahead of the workers, so the input is streamed rather than queued whole
+        in_flight = threading.BoundedSemaphore(self.concurrency * 2)
+        with open(self.output, 'a', encoding='utf-8') as out, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='batch') as executor:
+
+            def finished(future: Future) -> None:
+                in_flight.release()
+                self.write(out, future.result())
+
+            for row_id, row in rows:
+                self.stats.rows += 1
+                if row_id in done:
+                    self.stats.skipped += 1
+                    continue
+                if isinstance(row, InvalidRow):
+                    logger.error(f"Row {row_id} failed: {str(row)}")
+                    self.write(out, {'id': row_id, 'error': f"Error: {str(row)}", 'success': False})
+                    continue
+                in_flight.acquire()
+                executor.submit(self.process, row_id, row).add_done_callback(finished)
+        self.stats.elapsed_s = time.perf_counter() - started
+        return self.stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="CSV or JSONL file of products or queries")
+    parser.add_argument('--output', required=True, help="JSONL file for results; reused to resume a run")
+    parser.add_argument('--concurrency', type=int, default=BATCH_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    if not os.getenv("STRIPE_API_KEY"):
+        print("Error: STRIPE_API_KEY environment variable is not set")
+        return 1
+
+    from src.stripe_crew.crew import StripeCrew
+    from crew_common.rate_limit import rate_limit_summary
+
+    runner = BatchRunner(StripeCrew, args.output, args.concurrency)
+    stats = runner.run(read_rows(args.input))
+    print(json.dumps({'batch': stats.to_dict(), 'rate_limits': rate_limit_summary()}))
+    return 0 if not stats.failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
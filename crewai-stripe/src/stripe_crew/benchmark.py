@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""Benchmarks for the Stripe crew.
+
+Usage:
+    python -m src.stripe_crew.benchmark request-overhead --customer-kb 1 16 128
+    python -m src.stripe_crew.benchmark throughput --concurrency 1 4 8 --requests 200
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from crew_common import codec
+from crew_common.models import request_body
+
+from src.stripe_crew.models import StripeRequest
+
+
+def large_customer(size_kb: int) -> Dict:
+    """A customer payload padded to roughly ``size_kb`` KB with extra fields."""
+    customer = {
+        'id': 'cus_bench',
+        'payment_method_id': 'pm_bench',
+        'name': 'Bench Customer',
+        'email': 'bench@example.com',
+        'phone': '+1234567890',
+        'address': {'line1': '123 Main St', 'city': 'San Francisco', 'state': 'CA', 'postal_code': '94105'},
+        'description': 'Benchmark customer',
+    }
+    index = 0
+    while len(json.dumps(customer)) < size_kb * 1024:
+        customer[f'note_{index}'] = f"order {index}: " + 'x' * 200
+        index += 1
+    return customer
+
+
+def legacy_path(event: Dict) -> str:
+    """Handler work before typed requests: validate with json, then parse again in the crew."""
+    body = json.loads(event['body'])
+    if not isinstance(body, dict) or 'query' not in body:
+        raise ValueError("invalid body")
+    # StripeCrew decoded the raw event body a second time to find the customer
+    customer = json.loads(event['body']).get('customer')
+    return json.dumps({'result': f"SUCCESS: {customer['id']}", 'operations': []})
+
+
+def typed_path(event: Dict) -> str:
+    """Handler work with the typed request: decode and validate once, encode with the codec."""
+    stripe_request = StripeRequest.from_body(request_body(event))
+    customer = stripe_request.customer.model_dump(exclude_none=True)
+    return codec.dumps({'result': f"SUCCESS: {customer['id']}", 'operations': []})
+
+
+def time_per_call(fn: Callable[[Dict], str], event: Dict, iterations: int) -> float:
+    """Best-of-three microseconds per call."""
+    best = float('inf')
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn(event)
+        best = min(best, time.perf_counter() - started)
+    return best / iterations * 1e6
+
+
+def bench_request_overhead(args: argparse.Namespace) -> List[Dict]:
+    """Handler decode/validate/encode time per request, legacy vs typed, by customer payload size."""
+    rows = []
+    for size_kb in args.customer_kb:
+        body = json.dumps({'query': 'Pay $25 to acct_123', 'customer': large_customer(size_kb)})
+        event = {'body': body}
+        iterations = max(20, args.iterations // max(1, size_kb))
+        legacy_us = time_per_call(legacy_path, event, iterations)
+        typed_us = time_per_call(typed_path, event, iterations)
+        row = {
+            'customer_kb': size_kb,
+            'body_bytes': len(body),
+            'codec': codec.BACKEND,
+            'legacy_us': round(legacy_us, 1),
+            'typed_us': round(typed_us, 1),
+            'speedup': round(legacy_us / typed_us, 2) if typed_us else None,
+        }
+        rows.append(row)
+        print(json.dumps(row))
+    return rows
+
+
+def load_test(url: str, body: Dict, concurrency: int, total: int) -> Dict:
+    """Send ``total`` requests from ``concurrency`` client threads; throughput and latency."""
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+
+    # The emulator takes a Lambda event; a plain HTTP endpoint takes the body itself
+    payload = json.dumps({'body': json.dumps(body)} if url.rstrip('/').endswith('/invocations') else body)
+    local = threading.local()
+
+    def send(_: int) -> Tuple[float, bool]:
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            ok = session.post(url, data=payload, headers={'Content-Type': 'application/json'}, timeout=300).status_code < 500
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, range(total)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'requests': total,
+        'errors': sum(1 for _, ok in results if not ok),
+        'rps': round(total / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+    }
+
+
+def bench_throughput(args: argparse.Namespace) -> List[Dict]:
+    """Requests per second against the Lambda emulator and the server, by client concurrency."""
+    body = json.loads(args.body)
+    rows = []
+    for name, url in (('emulator', args.emulator_url), ('server', args.server_url)):
+        if not url:
+            continue
+        # One request first, so neither side is timed loading on a cold start
+        load_test(url, body, 1, 1)
+        for concurrency in args.concurrency:
+            row = {'target': name, 'concurrency': concurrency, **load_test(url, body, concurrency, args.requests)}
+            rows.append(row)
+            print(json.dumps(row))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    overhead = commands.add_parser('request-overhead', help=bench_request_overhead.__doc__)
+    overhead.add_argument('--customer-kb', type=int, nargs='+', default=[1, 16, 128, 512])
+    overhead.add_argument('--iterations', type=int, default=2000)
+    overhead.set_defaults(func=bench_request_overhead)
+
+    throughput = commands.add_parser('throughput', help=bench_throughput.__doc__)
+    throughput.add_argument('--emulator-url', default='http://localhost:9000/2015-03-31/functions/function/invocations')
+    throughput.add_argument('--server-url', default='http://localhost:8080/2015-03-31/functions/function/invocations')
+    throughput.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    throughput.add_argument('--requests', type=int, default=200)
+    throughput.add_argument('--body', default=json.dumps({'payment_status': 'pi_benchmark'}),
+                            help="Request body; the default is a payment status lookup, which charges no one")
+    throughput.set_defaults(func=bench_throughput)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+"""Local SQLite index of Stripe Products, Prices and PaymentLinks.
+
+Usage:
+    catalog-sync            # incremental: objects created since the last sync
+    catalog-sync --full     # everything, picking up archived products and deactivated links
+
+The sync streams each object type page by page and upserts it in batches,
+so memory stays flat for large catalogs. Every page is fetched under the
+``stripe_read`` rate limiter. The sync remembers the newest ``created``
+timestamp per type and asks only for newer objects next time. An incremental
+sync therefore never sees links deactivated, or products and prices archived,
+after they were indexed; only ``--full`` does.
+
+With CATALOG_LOOKUP on, ``create_payment_link`` looks up the index in-process
+for a link or price that already exists for the same product and amount. A
+match is checked with Stripe before it is used, since the index may be stale.
+Links created here are added to the index as well.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DB = os.getenv('CATALOG_DB', '/tmp/stripe_catalog.db')
+PAGE_SIZE = 100
+# Rows written per transaction while streaming
+WRITE_BATCH = 500
+
+OBJECT_TYPES = ('products', 'prices', 'payment_links')
+# List endpoints that take a created filter; PaymentLinks do not, so their sync
+# stops at the cursor instead (lists come newest first)
+CREATED_FILTER = ('products', 'prices')
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS products (id TEXT PRIMARY KEY, name TEXT, name_key TEXT, active INTEGER, created INTEGER)",
+    "CREATE INDEX IF NOT EXISTS products_name_key ON products (name_key)",
+    "CREATE TABLE IF NOT EXISTS prices (id TEXT PRIMARY KEY, product TEXT, unit_amount INTEGER, currency TEXT, "
+    "recurring INTEGER, active INTEGER, created INTEGER)",
+    "CREATE INDEX IF NOT EXISTS prices_product ON prices (product, unit_amount, currency)",
+    "CREATE TABLE IF NOT EXISTS payment_links (id TEXT PRIMARY KEY, url TEXT, active INTEGER, created INTEGER)",
+    "CREATE TABLE IF NOT EXISTS link_prices (link TEXT, price TEXT, PRIMARY KEY (link, price))",
+    "CREATE INDEX IF NOT EXISTS link_prices_price ON link_prices (price)",
+    "CREATE TABLE IF NOT EXISTS sync_state (object TEXT PRIMARY KEY, created_cursor INTEGER, synced_at REAL)",
+)
+
+
+def name_key(name: str) -> str:
+    """Product names match case-insensitively and ignoring repeated whitespace."""
+    return re.sub(r'\s+', ' ', name).strip().casefold()
+
+
+def _value(obj: Any, key: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+
+class CatalogIndex:
+    """Products, prices and payment links, indexed for lookup by product name and amount."""
+
+    def __init__(self, path: str = CATALOG_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    def _write(self, sql: str, rows: List[tuple]) -> None:
+        with self._lock:
+            self._db.executemany(sql, rows)
+            self._db.commit()
+
+    @staticmethod
+    def product_row(product: Any) -> tuple:
+        name = _value(product, 'name') or ''
+        return (_value(product, 'id'), name, name_key(name), int(bool(_value(product, 'active'))), _value(product, 'created'))
+
+    @staticmethod
+    def price_row(price: Any) -> tuple:
+        product = _value(price, 'product')
+        return (
+            _value(price, 'id'), product if isinstance(product, str) else _value(product, 'id'),
+            _value(price, 'unit_amount'), _value(price, 'currency'), int(bool(_value(price, 'recurring'))),
+            int(bool(_value(price, 'active'))), _value(price, 'created'),
+        )
+
+    def add_products(self, products: Iterable[Any]) -> None:
+        self._write("INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?)", [self.product_row(p) for p in products])
+
+    def add_prices(self, prices: Iterable[Any]) -> None:
+        self._write("INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)", [self.price_row(p) for p in prices])
+
+    def add_payment_links(self, links: Iterable[Any], price_ids: Optional[Dict[str, List[str]]] = None) -> None:
+        """Index payment links; their prices come from expanded line_items or ``price_ids``."""
+        links = list(links)
+        price_ids = dict(price_ids or {})
+        for link in links:
+            items = _value(_value(link, 'line_items'), 'data')
+            if items is not None:
+                price_ids[_value(link, 'id')] = [_value(_value(item, 'price'), 'id') for item in items]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO payment_links VALUES (?, ?, ?, ?)",
+                [(_value(l, 'id'), _value(l, 'url'), int(bool(_value(l, 'active'))), _value(l, 'created')) for l in links],
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO link_prices VALUES (?, ?)",
+                [(link, price) for link, prices in price_ids.items() for price in prices if price],
+            )
+            self._db.commit()
+
+    def find_price(self, product_name: str, amount_cents: int, currency: str = 'usd') -> Optional[str]:
+        """An active one-time price for an active product with this name and amount."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT prices.id FROM prices JOIN products ON products.id = prices.product "
+                "WHERE products.name_key = ? AND products.active AND prices.active AND NOT prices.recurring "
+                "AND prices.unit_amount = ? AND prices.currency = ? ORDER BY prices.created DESC LIMIT 1",
+                (name_key(product_name), amount_cents, currency),
+            ).fetchone()
+        return row[0] if row else None
+
+    def find_payment_link(self, product_name: str, amount_cents: int, currency: str = 'usd') -> Optional[Tuple[str, str]]:
+        """Id and URL of an active single-price payment link selling this product at this amount."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payment_links.id, payment_links.url FROM payment_links "
+                "JOIN link_prices ON link_prices.link = payment_links.id "
+                "JOIN prices ON prices.id = link_prices.price JOIN products ON products.id = prices.product "
+                "WHERE products.name_key = ? AND products.active AND prices.active AND NOT prices.recurring "
+                "AND prices.unit_amount = ? AND prices.currency = ? AND payment_links.active "
+                "AND (SELECT COUNT(*) FROM link_prices AS other WHERE other.link = payment_links.id) = 1 "
+                "ORDER BY payment_links.created DESC LIMIT 1",
+                (name_key(product_name), amount_cents, currency),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def mark_inactive(self, object_type: str, object_id: str) -> None:
+        """Stop offering an object Stripe no longer has, until a sync says otherwise."""
+        if object_type not in OBJECT_TYPES:
+            raise ValueError(f"Unknown object type: {object_type}")
+        self._write(f"UPDATE {object_type} SET active = 0 WHERE id = ?", [(object_id,)])
+
+    def cursor(self, object_type: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute("SELECT created_cursor FROM sync_state WHERE object = ?", (object_type,)).fetchone()
+        return row[0] if row else None
+
+    def set_cursor(self, object_type: str, created: Optional[int]) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)", (object_type, created, time.time())
+            )
+            self._db.commit()
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                table: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in OBJECT_TYPES
+            }
+
+
+_default_index: Optional[CatalogIndex] = None
+
+
+def get_catalog() -> CatalogIndex:
+    global _default_index
+    if _default_index is None:
+        _default_index = CatalogIndex()
+    return _default_index
+
+
+def stream(resource: Any, params: Dict) -> Iterator[Any]:
+    """Every object a list endpoint returns, newest first, each page fetched under the stripe_read limiter."""
+    from crew_common.rate_limit import limiter
+
+    params = {'limit': PAGE_SIZE, **params}
+    while True:
+        page = limiter('stripe_read').run(lambda: resource.list(params=params))
+        yield from page.data
+        if not page.has_more or not page.data:
+            return
+        params = {**params, 'starting_after': _value(page.data[-1], 'id')}
+
+
+def sync(index: CatalogIndex, client: Any, object_types: Iterable[str] = OBJECT_TYPES, full: bool = False) -> Dict[str, int]:
+    """Stream objects from Stripe into the index with ``client``; returns how many of each were written."""
+    resources = {
+        'products': (client.products, index.add_products, {}),
+        'prices': (client.prices, index.add_prices, {}),
+        'payment_links': (client.payment_links, index.add_payment_links, {'expand': ['data.line_items']}),
+    }
+    written = {}
+    for object_type in object_types:
+        resource, add, params = resources[object_type]
+        cursor = None if full else index.cursor(object_type)
+        if cursor is not None and object_type in CREATED_FILTER:
+            # gte rather than gt: objects created in the cursor's second may not all have been seen
+            params = {**params, 'created': {'gte': cursor}}
+        newest, batch, count = cursor, [], 0
+        for obj in stream(resource, params):
+            created = _value(obj, 'created')
+            if cursor is not None and created < cursor:
+                break
+            batch.append(obj)
+            newest = created if newest is None else max(newest, created)
+            if len(batch) >= WRITE_BATCH:
+                add(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            add(batch)
+            count += len(batch)
+        index.set_cursor(object_type, newest)
+        written[object_type] = count
+        logger.info(f"Synced {count} {object_type} (cursor {newest})")
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--full', action='store_true', help="Ignore the created cursors and resync everything")
+    parser.add_argument('--only', nargs='+', choices=OBJECT_TYPES, default=list(OBJECT_TYPES))
+    parser.add_argument('--db', default=CATALOG_DB)
+    args = parser.parse_args(argv)
+
+    if not os.getenv("STRIPE_API_KEY"):
+        print("Error: STRIPE_API_KEY environment variable is not set")
+        return 1
+    from crew_common.stripe_client import build_stripe_client
+
+    index = CatalogIndex(args.db)
+    started = time.perf_counter()
+    written = sync(index, build_stripe_client(os.getenv("STRIPE_API_KEY")), args.only, args.full)
+    print(json.dumps({'synced': written, 'indexed': index.counts(), 'elapsed_s': round(time.perf_counter() - started, 2)}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
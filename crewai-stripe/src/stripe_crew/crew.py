@@ -3,11 +3,31 @@ from crewai import Agent, Crew, Process, Task
 import os
 from dotenv import load_dotenv
 import json
-from typing import Dict, Union, Optional, Any
+from typing import Dict, List, Union, Optional, Any
 import logging
 import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
 from crewai.crews.crew_output import CrewOutput
 
+from crew_common.circuit_breaker import CircuitOpenError, breaker
+from crew_common.deadline import Deadline, DeadlineExceeded
+from crew_common.metrics import usage_tracker
+from crew_common.models import request_body
+from crew_common.payment_state import get_payment_store, payment_mode
+from crew_common.prompts import get_prompt_variant
+from crew_common.rate_limit import is_rate_limited, limiter, rate_limit_summary
+from crew_common.routing import agent_route, build_llm, model_name, model_router
+from crew_common.stripe_client import build_stripe_client
+
+from src.stripe_crew.catalog import get_catalog
+from src.stripe_crew.local_parser import parse_query
+from src.stripe_crew.metrics import parse_stats, speculation_stats
+from src.stripe_crew.models import PaymentPlan, PaymentRequest, StripeRequest
+from src.stripe_crew.prompts import agent_prompt, prompts, task_expected_output, task_template
+
 # Configure logging
 logging.basicConfig(
 	level=logging.INFO,
@@ -18,47 +38,81 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# How the parse task returns its result: as a PaymentRequest model, as
+# schema-constrained JSON, or as free text scraped for a JSON object.
+STRUCTURED_OUTPUT_MODES = ('pydantic', 'json', 'off')
+
+# Upper bound on Stripe operations from one query that run at the same time
+MAX_CONCURRENT_OPERATIONS = int(os.getenv("MAX_CONCURRENT_OPERATIONS", "4"))
+
+# Opt-in: for queries the deterministic local parser recognizes, race it
+# against the LLM parse and take the first valid result. Other queries only
+# go to the LLM.
+SPECULATIVE_PARSE = os.getenv("SPECULATIVE_PARSE", "0").strip().lower() not in ("0", "false", "no")
+
+# Deadline budgeting: per-call caps for LLM and Stripe requests, the time an
+# LLM parse is assumed to take before its latency has been observed, and the
+# time Stripe operations need so a charge is never started too late to finish.
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "30"))
+STRIPE_TIMEOUT_S = float(os.getenv("STRIPE_TIMEOUT_S", "10"))
+DEFAULT_PARSE_ESTIMATE_S = 8.0
+STRIPE_STAGE_S = 5.0
+
+# Opt-in: consult the local catalog index (catalog.py) before creating payment
+# links. Matches are checked with Stripe before use, as the index may be stale.
+CATALOG_LOOKUP = os.getenv("CATALOG_LOOKUP", "0").strip().lower() not in ("0", "false", "no")
+
 class StripeCrew:
 	"""Stripe payment processing crew"""
 
-	def __init__(self, crew_inputs: Optional[Dict] = None):
-		"""Initialize the Stripe crew with optional inputs."""
+	def __init__(self, crew_inputs: Optional[Dict] = None, request: Optional[StripeRequest] = None,
+			api_key: Optional[str] = None, client: Optional[stripe.StripeClient] = None):
+		"""Initialize the Stripe crew with optional inputs.
+
+		``request`` is the already validated request; without it, one is built
+		from crew_inputs (an event with a body, or a dict with a query).
+		Stripe calls go through ``client`` if given, otherwise through a client
+		of this crew's own for ``api_key`` (STRIPE_API_KEY by default).
+		"""
 		logger.info("Initializing StripeCrew...")
 		if crew_inputs is None:
 			crew_inputs = {}
 		if not isinstance(crew_inputs, dict):
 			raise ValueError("crew_inputs must be a dictionary")
 		self.crew_inputs = crew_inputs
+		if request is None and ('body' in crew_inputs or 'query' in crew_inputs):
+			request = StripeRequest.from_body(request_body(crew_inputs) if 'body' in crew_inputs else crew_inputs)
+		self.request = request
 		
 		# Initialize Stripe
 		logger.info("Initializing Stripe...")
-		self.api_key = os.getenv("STRIPE_API_KEY")
-		if not self.api_key:
-			raise ValueError("STRIPE_API_KEY environment variable is required")
-		if not self.api_key.startswith(('sk_test_', 'sk_live_')):
-			raise ValueError("Invalid Stripe API key format")
+		self.api_key = api_key or os.getenv("STRIPE_API_KEY")
+		if client is None:
+			if not self.api_key:
+				raise ValueError("STRIPE_API_KEY environment variable is required")
+			if not self.api_key.startswith(('sk_test_', 'sk_live_')):
+				raise ValueError("Invalid Stripe API key format")
 		
-		# Configure Stripe with the API key
-		stripe.api_key = self.api_key
+		# A client per crew rather than the global stripe.api_key, so crews for
+		# different keys can run on concurrent threads
+		self.owns_client = client is None
+		self.stripe = client or build_stripe_client(self.api_key)
 		
-		# Initialize manager agent
+		# Initialize manager agent from the YAML prompt config
 		logger.info("Initializing manager agent...")
+		self.prompt_variant = get_prompt_variant()
+		self.output_mode = os.getenv("STRUCTURED_OUTPUT", "pydantic").strip().lower()
+		if self.output_mode not in STRUCTURED_OUTPUT_MODES:
+			raise ValueError(f"STRUCTURED_OUTPUT must be one of {STRUCTURED_OUTPUT_MODES}")
+		manager_prompt = agent_prompt('payment_manager', self.prompt_variant)
+		# The parse step only extracts fields, so a small fast model is enough
+		self.manager_route = agent_route('payment_manager', prompts)
+		self.manager_model = model_router.choose(self.manager_route)
 		self.manager = Agent(
-			role="Payment Manager",
-			goal="Process payments and create payment links",
-			backstory="""Expert at processing payments and creating payment links.
-			
-			When parsing requests:
-			1. For payment links:
-			   - Extract product name
-			   - Extract dollar amount
-			   
-			2. For account payments:
-			   - Look for account ID starting with 'acct_'
-			   - Extract dollar amount
-			   - Ensure account ID is properly formatted
-			   
-			3. Return data in exact JSON format""",
+			role=manager_prompt['role'],
+			goal=manager_prompt['goal'],
+			backstory=manager_prompt['backstory'],
+			llm=build_llm(self.manager_model),
 			verbose=True
 		)
 		logger.info("Agent initialized successfully")
@@ -69,39 +123,31 @@ class StripeCrew:
 		if not isinstance(query, str):
 			raise ValueError("Query must be a string")
 			
-		return Task(
-			description=f"""Parse payment request: "{query}"
-			If the request mentions "payment link" or "create a payment link", use type "payment_link".
-			If it mentions "pay to" or "send" or "transfer", use type "connect_payment".
-			
-			For payment_link:
-			- Set product to the product name (in quotes if present)
-			- Set amount to the specified dollar amount
-			
-			For connect_payment:
-			- Set account_id to the specified account ID (must start with acct_)
-			- Set amount to the specified dollar amount
-			
-			Return ONLY a JSON object in this exact format:
-			For payment_link:
-			{{"type": "payment_link", "product": "name", "amount": number}}
+		output_schema = {}
+		if self.output_mode == 'pydantic':
+			output_schema['output_pydantic'] = PaymentPlan
+		elif self.output_mode == 'json':
+			output_schema['output_json'] = PaymentPlan
 			
-			For connect_payment:
-			{{"type": "connect_payment", "account_id": "acct_*", "amount": number}}
-			
-			Note: Always use the amount specified in the query.
-			Note: For connect_payment, extract the account ID starting with 'acct_'.
-			Note: If no valid account ID is found in a payment request, return an error message.""",
-			expected_output="JSON payment data",
-			agent=self.manager
+		return Task(
+			description=task_template('analyze_request_task', self.prompt_variant).render(query=query),
+			expected_output=task_expected_output('analyze_request_task', self.prompt_variant),
+			agent=self.manager,
+			**output_schema
 		)
 
-	def process_connect_payment(self, account_id: str, amount: float, customer_data: Optional[Dict] = None) -> str:
-		"""Process a payment to a connected account."""
+	def process_connect_payment(self, account_id: str, amount_cents: int, customer_data: Optional[Dict] = None) -> str:
+		"""Process a payment to a connected account.
+
+		In async payment mode the intent id is returned whatever its status;
+		webhooks settle it in the payment state store.
+		"""
 		try:
+			mode = payment_mode(self.request.payment_mode if self.request else None)
+
 			# Verify the account exists
 			try:
-				stripe.Account.retrieve(account_id)
+				self.stripe_call('stripe_read', self.stripe.accounts.retrieve, account_id)
 			except stripe.error.StripeError:
 				raise ValueError(f"Invalid or non-existent account ID: {account_id}")
 
@@ -120,57 +166,82 @@ class StripeCrew:
 					if 'description' in customer_data:
 						update_data['description'] = customer_data['description']
 					
-					stripe.Customer.modify(
-						customer_id,
-						**update_data
-					)
+					self.stripe_call('stripe_write', self.stripe.customers.update, customer_id, params=update_data)
 					logger.info(f"Updated customer {customer_id} with new information")
 			else:
 				logger.info("No customer data provided, creating test customer")
-				customer = stripe.Customer.create(
-					name="Test Customer",
-					email="test@example.com",
-					description="Test customer created by Stripe crew",
-					metadata={'source': 'stripe_crew_test'}
-				)
-				payment_method = stripe.PaymentMethod.create(
-					type="card",
-					card={"token": "tok_visa"},
-					billing_details={
+				customer = self.stripe_call('stripe_write', self.stripe.customers.create, params={
+					'name': "Test Customer",
+					'email': "test@example.com",
+					'description': "Test customer created by Stripe crew",
+					'metadata': {'source': 'stripe_crew_test'}
+				})
+				payment_method = self.stripe_call('stripe_write', self.stripe.payment_methods.create, params={
+					'type': "card",
+					'card': {"token": "tok_visa"},
+					'billing_details': {
 						"name": "Test Customer",
 						"email": "test@example.com"
 					}
-				)
-				stripe.PaymentMethod.attach(payment_method.id, customer=customer.id)
+				})
+				self.stripe_call('stripe_write', self.stripe.payment_methods.attach, payment_method.id, params={'customer': customer.id})
 				customer_id = customer.id
 				payment_method_id = payment_method.id
 			
-			# Process payment with additional metadata
-			payment_intent = stripe.PaymentIntent.create(
-				amount=int(amount * 100),
-				currency="usd",
-				customer=customer_id,
-				payment_method=payment_method_id,
-				off_session=True,
-				confirm=True,
-				transfer_data={'destination': account_id},
-				metadata={
+			# Process payment with additional metadata; the idempotency key lets a
+			# rate-limited attempt be retried without charging twice
+			payment_intent = self.stripe_call('stripe_write', self.stripe.payment_intents.create, params={
+				'amount': amount_cents,
+				'currency': "usd",
+				'customer': customer_id,
+				'payment_method': payment_method_id,
+				'off_session': True,
+				'confirm': True,
+				'transfer_data': {'destination': account_id},
+				'metadata': {
 					'payment_type': 'connect',
 					'recipient_account': account_id,
 					'source': 'stripe_crew',
 					'customer_email': customer_data.get('email') if customer_data else 'test@example.com'
 				}
-			)
+			}, options={'idempotency_key': str(uuid.uuid4())})
 			
+			if mode == 'async':
+				get_payment_store().record_intent(payment_intent)
+				logger.info(f"Payment {payment_intent.id} created ({payment_intent.status}), final state by webhook")
+				return payment_intent.id
 			return payment_intent.id if payment_intent.status == "succeeded" else payment_intent.client_secret
 				
 		except stripe.error.StripeError as e:
 			logger.error(f"Failed to process connect payment: {str(e)}")
 			raise
 
-	def create_payment_link(self, product_name: str, amount_cents: int, customer_data: Optional[Dict] = None) -> str:
-		"""Create a new payment link."""
+	def create_payment_link(self, product_name: str, amount_cents: int, customer_data: Optional[Dict] = None, idempotency_key: Optional[str] = None) -> str:
+		"""Create a new payment link.
+
+		With an idempotency key, retrying the same link (e.g. a resumed batch)
+		returns the objects already created instead of duplicating them.
+		With CATALOG_LOOKUP on, a link or price already in the local catalog
+		index is reused for requests without customer details, once Stripe
+		confirms it is still active.
+		"""
+		def idempotency(step: str) -> Dict:
+			return {'idempotency_key': f"{idempotency_key}-{step}"} if idempotency_key else {}
+
 		try:
+			# Customer prefill makes a link specific to one customer, so only generic links are shared
+			catalog = get_catalog() if CATALOG_LOOKUP and not customer_data else None
+			price_id = None
+			if catalog is not None:
+				link = catalog.find_payment_link(product_name, amount_cents)
+				url = self.live_payment_link(catalog, link[0]) if link else None
+				if url:
+					logger.info(f"Reusing indexed payment link for {product_name} ({amount_cents}c)")
+					return url
+				price_id = catalog.find_price(product_name, amount_cents)
+				if price_id and not self.live_price(catalog, price_id):
+					price_id = None
+
 			metadata = {
 				'source': 'stripe_crew',
 				'created_by': 'payment_crew'
@@ -184,21 +255,26 @@ class StripeCrew:
 					'customer_name': customer_data.get('name', '')
 				})
 			
-			product = stripe.Product.create(
-				name=product_name,
-				description=f"{product_name} - One-time purchase",
-				metadata=metadata
-			)
-			
-			price = stripe.Price.create(
-				product=product.id,
-				unit_amount=amount_cents,
-				currency="usd",
-				metadata=metadata
-			)
+			if price_id is None:
+				product = self.stripe_call('stripe_write', self.stripe.products.create, params={
+					'name': product_name,
+					'description': f"{product_name} - One-time purchase",
+					'metadata': metadata
+				}, options=idempotency('product'))
+				
+				price = self.stripe_call('stripe_write', self.stripe.prices.create, params={
+					'product': product.id,
+					'unit_amount': amount_cents,
+					'currency': "usd",
+					'metadata': metadata
+				}, options=idempotency('price'))
+				price_id = price.id
+				if catalog is not None:
+					catalog.add_products([product])
+					catalog.add_prices([price])
 			
 			payment_link_data = {
-				'line_items': [{"price": price.id, "quantity": 1}],
+				'line_items': [{"price": price_id, "quantity": 1}],
 				'metadata': metadata
 			}
 			
@@ -208,7 +284,10 @@ class StripeCrew:
 				payment_link_data['automatic_tax'] = {'enabled': True}
 				payment_link_data['customer_email'] = customer_data.get('email')
 				
-			payment_link = stripe.PaymentLink.create(**payment_link_data)
+			payment_link = self.stripe_call('stripe_write', self.stripe.payment_links.create,
+				params=payment_link_data, options=idempotency('link'))
+			if catalog is not None:
+				catalog.add_payment_links([payment_link], {payment_link.id: [price_id]})
 			
 			return payment_link.url
 			
@@ -216,62 +295,281 @@ class StripeCrew:
 			logger.error(f"Failed to create payment link: {str(e)}")
 			raise
 
-	def handle_request(self, query: str) -> str:
-		"""Process payment request end-to-end."""
+	def live_payment_link(self, catalog: Any, link_id: str) -> Optional[str]:
+		"""URL of an indexed link if Stripe still has it, its price and its product active.
+
+		The index is updated from what Stripe returns either way.
+		"""
+		try:
+			link = self.stripe_call('stripe_read', self.stripe.payment_links.retrieve, link_id,
+				params={'expand': ['line_items.data.price.product']})
+		except stripe.error.InvalidRequestError:
+			catalog.mark_inactive('payment_links', link_id)
+			return None
+		prices = [item.price for item in link.line_items.data]
+		catalog.add_products([price.product for price in prices])
+		catalog.add_prices(prices)
+		catalog.add_payment_links([link])
+		if link.active and prices and all(price.active and price.product.active for price in prices):
+			return link.url
+		logger.info(f"Indexed payment link {link_id} is no longer usable")
+		return None
+
+	def live_price(self, catalog: Any, price_id: str) -> bool:
+		"""Whether an indexed price and its product are still active in Stripe; updates the index."""
+		try:
+			price = self.stripe_call('stripe_read', self.stripe.prices.retrieve, price_id, params={'expand': ['product']})
+		except stripe.error.InvalidRequestError:
+			catalog.mark_inactive('prices', price_id)
+			return False
+		catalog.add_products([price.product])
+		catalog.add_prices([price])
+		return bool(price.active and price.product.active)
+
+	def customer_data(self) -> Optional[Dict]:
+		"""Customer details from the request, if present."""
+		if self.request is None or self.request.customer is None:
+			return None
+		customer_data = self.request.customer.model_dump(exclude_none=True)
+		if customer_data:
+			logger.info(f"Found customer data in request: {customer_data}")
+			# Validate required customer fields
+			required_fields = ['id', 'payment_method_id', 'email']
+			missing_fields = [field for field in required_fields if field not in customer_data]
+			if missing_fields:
+				logger.warning(f"Missing required customer fields: {missing_fields}")
+		return customer_data
+
+	def parse_operations(self, query: str, deadline: Optional[Deadline] = None) -> List[PaymentRequest]:
+		"""Parse the query, racing the local parser against the LLM when speculation is on.
+
+		Only queries whose every clause matches a known shape are raced; the
+		rest wait for the LLM.
+		"""
+		deadline = deadline or Deadline()
+		if not SPECULATIVE_PARSE or not parse_query(query):
+			try:
+				deadline.require(self.parse_estimate(), "the LLM parse")
+				return self.llm_parse_operations(query, deadline)
+			except CircuitOpenError:
+				# The LLM is failing fast; the local parser is the only way through
+				operations = self.local_parse_operations(query)
+				if operations:
+					return operations
+				raise
+
+		executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='parse')
+		local = executor.submit(self.local_parse_operations, query)
+		llm = executor.submit(self.llm_parse_operations, query, deadline)
+		# Don't block on the loser; it finishes in the background for the agreement stats
+		executor.shutdown(wait=False)
+		self.record_agreement(local, llm)
+
+		sources = {local: 'local', llm: 'llm'}
+		wait_s = None if not deadline.bounded else deadline.remaining()
+		try:
+			for future in as_completed(sources, timeout=wait_s):
+				if future.exception() is None and future.result():
+					speculation_stats.record_winner(sources[future])
+					logger.info(f"Parsed with the {sources[future]} parser; speculation stats: {speculation_stats.summary()}")
+					return future.result()
+		except FutureTimeout:
+			raise DeadlineExceeded("Deadline reached while waiting for the LLM parse")
+		speculation_stats.record_winner(None)
+		raise llm.exception() or ValueError("Invalid payment request format")
+
+	def local_parse_operations(self, query: str) -> List[PaymentRequest]:
+		"""Parse the query without the LLM; empty if its shape is not recognized."""
+		operations = parse_query(query)
+		if not operations:
+			return []
+		try:
+			self.validate_payment_data(operations)
+			return [PaymentRequest.model_validate(op) for op in operations]
+		except ValueError as e:
+			logger.info(f"Local parse rejected: {str(e)}")
+			return []
+
+	@staticmethod
+	def record_agreement(local: Future, llm: Future) -> None:
+		"""Once both parses finish, record whether they produced the same operations."""
+		lock = threading.Lock()
+		pending = [2]
+
+		def outcome(future: Future) -> Optional[List[Dict]]:
+			if future.exception() is not None or not future.result():
+				return None
+			return sorted(
+				(op.model_dump(exclude_none=True) for op in future.result()),
+				key=lambda op: json.dumps(op, sort_keys=True)
+			)
+
+		def done(_: Future) -> None:
+			with lock:
+				pending[0] -= 1
+				if pending[0]:
+					return
+			local_ops, llm_ops = outcome(local), outcome(llm)
+			agreed = None if local_ops is None or llm_ops is None else local_ops == llm_ops
+			if agreed is False:
+				logger.warning(f"Local and LLM parses disagree: {local_ops} vs {llm_ops}")
+			speculation_stats.record_agreement(agreed)
+
+		local.add_done_callback(done)
+		llm.add_done_callback(done)
+
+	def parse_estimate(self) -> float:
+		"""Expected seconds for an LLM parse, from the manager model's recent latency."""
+		expected_ms = model_router.expected_latency(model_name(self.manager_model))
+		return expected_ms / 1000 if expected_ms else DEFAULT_PARSE_ESTIMATE_S
+
+	def llm_parse_operations(self, query: str, deadline: Optional[Deadline] = None) -> List[PaymentRequest]:
+		"""Parse every payment operation in the query with a single LLM call."""
+		if deadline is not None and deadline.bounded:
+			# Cap the LLM call so a slow provider cannot outlive the invocation
+			self.manager.llm = build_llm(self.manager_model, deadline.timeout(LLM_TIMEOUT_S))
+		parse_task = self.parse_request(query)
+		parse_crew = Crew(
+			agents=[self.manager],
+			tasks=[parse_task],
+			verbose=True,
+			process=Process.sequential
+		)
+		
+		started = time.perf_counter()
+		# While the LLM circuit is open this raises CircuitOpenError at once
+		parse_result = breaker('llm').call(lambda: limiter('llm').run(parse_crew.kickoff, deadline))
+		record = usage_tracker.record(
+			'parse_request',
+			self.manager.backstory + parse_task.description,
+			parse_result,
+			time.perf_counter() - started,
+			self.prompt_variant,
+			model_name(self.manager_model)
+		)
+		model_router.observe(record.model, record.latency_ms)
+		attempts = getattr(getattr(parse_result, 'token_usage', None), 'successful_requests', 0) or 1
+		try:
+			operations = self.parse_payment_result(parse_result)
+		except ValueError:
+			parse_stats.record(self.output_mode, False, attempts)
+			raise
+		parse_stats.record(self.output_mode, True, attempts)
+		logger.info(f"Parse stats by output mode: {parse_stats.summary()}")
+		return operations
+
+	def execute_operation(self, payment: PaymentRequest, customer_data: Optional[Dict] = None) -> str:
+		"""Run a single parsed payment operation against Stripe."""
+		if payment.type == 'connect_payment':
+			return self.process_connect_payment(payment.account_id, payment.amount_cents, customer_data)
+		if payment.type == 'payment_link':
+			return self.create_payment_link(payment.product, payment.amount_cents, customer_data)
+		raise ValueError("Invalid payment type")
+
+	def execute_operations(self, operations: List[PaymentRequest], customer_data: Optional[Dict] = None, deadline: Optional[Deadline] = None) -> List[Dict]:
+		"""Run independent operations concurrently and collect a result for each."""
+		deadline = deadline or Deadline()
+
+		def run(index: int, payment: PaymentRequest) -> Dict:
+			result = {'index': index, **payment.model_dump(exclude_none=True)}
+			try:
+				# Queued operations are skipped rather than started too late to finish
+				deadline.require(STRIPE_STAGE_S, f"operation {index}")
+				result['result'] = self.execute_operation(payment, customer_data)
+				result['success'] = True
+			except Exception as e:
+				logger.error(f"Operation {index} ({payment.type}) failed: {str(e)}")
+				result['error'] = self.format_error(e)
+				result['success'] = False
+			return result
+
+		if len(operations) == 1:
+			return [run(0, operations[0])]
+		with ThreadPoolExecutor(max_workers=min(len(operations), MAX_CONCURRENT_OPERATIONS)) as executor:
+			return list(executor.map(run, range(len(operations)), operations))
+
+	def process_request(self, query: str, deadline: Optional[Deadline] = None) -> Dict:
+		"""Process a request with one or more operations and report each outcome.
+
+		With a deadline, stages that cannot finish in time are refused before
+		they start, and the result carries status_code 503. So does a query
+		that needs the LLM while its circuit breaker is open.
+		"""
 		logger.info(f"Processing payment request: {query}")
+		deadline = deadline or Deadline()
 		
 		if not query or not isinstance(query, str):
-			return "Error: Invalid payment request"
+			return {'result': "Error: Invalid payment request", 'operations': []}
 
 		try:
-			# Extract customer data if available in crew_inputs
-			customer_data = None
-			if isinstance(self.crew_inputs, dict):
-				body = self.crew_inputs.get('body', '{}')
-				if isinstance(body, str):
-					body = json.loads(body)
-				customer_data = body.get('customer')
-				if customer_data:
-					logger.info(f"Found customer data in request: {customer_data}")
-					# Validate required customer fields
-					required_fields = ['id', 'payment_method_id', 'email']
-					missing_fields = [field for field in required_fields if field not in customer_data]
-					if missing_fields:
-						logger.warning(f"Missing required customer fields: {missing_fields}")
-
-			# Parse request
-			parse_crew = Crew(
-				agents=[self.manager],
-				tasks=[self.parse_request(query)],
-				verbose=True,
-				process=Process.sequential
-			)
-			
-			parse_result = parse_crew.kickoff()
-			data = self.parse_json_result(parse_result)
-			
-			# Process payment based on type
-			if data['type'] == 'connect_payment':
-				payment_id = self.process_connect_payment(data['account_id'], data['amount'], customer_data)
-				return f"SUCCESS: {payment_id}"
-			elif data['type'] == 'payment_link':
-				payment_link = self.create_payment_link(data['product'], int(data['amount'] * 100), customer_data)
-				return f"SUCCESS: {payment_link}"
-			else:
-				return "Error: Invalid payment type"
-
+			customer_data = self.customer_data()
+			operations = self.parse_operations(query, deadline)
+			deadline.require(STRIPE_STAGE_S, "Stripe operations")
+		except DeadlineExceeded as e:
+			logger.warning(f"Request refused: {str(e)}")
+			return {'result': f"Error: {str(e)}", 'operations': [], 'status_code': 503}
+		except CircuitOpenError as e:
+			logger.warning(f"Request refused: {str(e)}; circuit stats: {breaker('llm').stats()}")
+			return {'result': f"Error: {str(e)}", 'operations': [], 'status_code': 503, 'retry_after': e.retry_after_s}
 		except Exception as e:
-			error_msg = str(e).lower()
-			logger.error(f"Request handling failed: {error_msg}")
-			
-			if "rate limit" in error_msg:
-				return "Error: Rate limit reached. Please try again later."
-			if "api_key" in error_msg:
-				return "Error: Invalid Stripe API key."
-			if "no such" in error_msg:
-				return "Error: Invalid resource ID."
-			
-			return f"Error: {str(e)}"
+			logger.error(f"Request handling failed: {str(e).lower()}")
+			return {'result': self.format_error(e), 'operations': []}
+
+		self.configure_stripe_timeout(deadline)
+		results = self.execute_operations(operations, customer_data, deadline)
+		logger.info(f"Rate limiter queue wait and throttling: {rate_limit_summary()}")
+		succeeded = [r for r in results if r['success']]
+		if len(results) == 1:
+			summary = f"SUCCESS: {results[0]['result']}" if succeeded else results[0]['error']
+		elif len(succeeded) == len(results):
+			summary = "SUCCESS: " + "; ".join(r['result'] for r in results)
+		elif succeeded:
+			summary = f"PARTIAL: {len(succeeded)} of {len(results)} operations succeeded"
+		else:
+			summary = "Error: " + "; ".join(r['error'] for r in results)
+		return {'result': summary, 'operations': results}
+
+	def handle_request(self, query: str, deadline: Optional[Deadline] = None) -> str:
+		"""Process payment request end-to-end."""
+		return self.process_request(query, deadline)['result']
+
+	@staticmethod
+	def stripe_call(kind: str, method: Any, *args, **kwargs) -> Any:
+		"""Call a Stripe API method under the shared rate limiter for its class."""
+		return limiter(kind).run(lambda: method(*args, **kwargs))
+
+	def configure_stripe_timeout(self, deadline: Deadline) -> None:
+		"""Cap each of this crew's Stripe API calls by the time left.
+
+		An injected client keeps the timeout it was built with.
+		"""
+		if deadline.bounded and self.owns_client:
+			self.stripe = build_stripe_client(self.api_key, deadline.timeout(STRIPE_TIMEOUT_S))
+
+	@staticmethod
+	def format_error(e: Exception) -> str:
+		"""Map an exception to the user-facing error message."""
+		error_msg = str(e).lower()
+		if is_rate_limited(e):
+			return "Error: Rate limit reached. Please try again later."
+		if "api_key" in error_msg:
+			return "Error: Invalid Stripe API key."
+		if "no such" in error_msg:
+			return "Error: Invalid resource ID."
+		return f"Error: {str(e)}"
+
+	def parse_payment_result(self, result: Any) -> List[PaymentRequest]:
+		"""Return the typed payment operations, scraping the raw text only as a fallback."""
+		if isinstance(result, CrewOutput):
+			if isinstance(result.pydantic, PaymentPlan):
+				return result.pydantic.operations
+			if result.json_dict:
+				try:
+					return PaymentPlan.model_validate(result.json_dict).operations
+				except ValueError as e:
+					logger.warning(f"Structured output failed validation, falling back to text: {str(e)}")
+		data = self.parse_json_result(result)
+		return [PaymentRequest.model_validate(op) for op in self.payment_operations(data)]
 
 	def parse_json_result(self, result: Any) -> Dict:
 		"""Parse and validate JSON result."""
@@ -279,12 +577,14 @@ class StripeCrew:
 			if isinstance(result, CrewOutput):
 				result = str(result.result if hasattr(result, 'result') else result)
 			
-			# Extract JSON from string if needed
+			# Extract the JSON object (or list of operations) from string if needed
 			if isinstance(result, str):
-				json_start = result.find('{')
-				json_end = result.rfind('}') + 1
-				if json_start >= 0 and json_end > json_start:
-					result = result[json_start:json_end]
+				starts = [i for i in (result.find('{'), result.find('[')) if i >= 0]
+				if starts:
+					json_start = min(starts)
+					json_end = result.rfind('}' if result[json_start] == '{' else ']') + 1
+					if json_end > json_start:
+						result = result[json_start:json_end]
 			
 			data = json.loads(result if isinstance(result, str) else json.dumps(result))
 			self.validate_payment_data(data)
@@ -294,8 +594,29 @@ class StripeCrew:
 			logger.error(f"Failed to parse result: {str(e)}")
 			raise ValueError(f"Invalid payment request format: {str(e)}")
 
-	def validate_payment_data(self, data: Dict) -> None:
-		"""Validate payment data structure."""
+	@staticmethod
+	def payment_operations(data: Any) -> List[Dict]:
+		"""Normalize parsed data to a list of operations.
+
+		Accepts {"operations": [...]}, a bare list, or a single operation object.
+		"""
+		if isinstance(data, dict) and 'operations' in data:
+			data = data['operations']
+		if isinstance(data, dict):
+			return [data]
+		if isinstance(data, list) and data:
+			return data
+		raise ValueError("Payment data must contain at least one operation")
+
+	def validate_payment_data(self, data: Any) -> None:
+		"""Validate payment data structure for one or more operations."""
+		if not isinstance(data, (dict, list)):
+			raise ValueError("Payment data must be a dictionary")
+		for operation in self.payment_operations(data):
+			self.validate_operation(operation)
+
+	def validate_operation(self, data: Dict) -> None:
+		"""Validate a single payment operation."""
 		if not isinstance(data, dict):
 			raise ValueError("Payment data must be a dictionary")
 			
@@ -319,7 +640,7 @@ class StripeCrew:
 	def run(self) -> str:
 		"""Execute the payment processing crew."""
 		logger.info("Starting StripeCrew execution...")
-		query = self.crew_inputs.get('query', '')
+		query = self.request.query if self.request else ''
 		result = self.handle_request(query)
 		logger.info("StripeCrew execution completed")
 		return result
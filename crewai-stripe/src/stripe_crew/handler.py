@@ -0,0 +1,110 @@
+"""Request handler shared by the Lambda entry point and the long-lived server."""
+import json
+import logging
+import math
+from typing import Dict, Any
+
+from crew_common import envelope
+from crew_common.deadline import Deadline
+from crew_common.handler import payment_status_response, webhook_response
+from crew_common.models import RequestError, request_body
+from crew_common.warmup import is_warmup_event
+
+from src.stripe_crew.crew import StripeCrew
+from src.stripe_crew.models import StripeRequest
+from src.stripe_crew.warmup import warm
+
+logger = logging.getLogger(__name__)
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    AWS Lambda handler for Stripe payment processing.
+    
+    Expected input format:
+    {
+        "body": {
+            "query": "The payment request query, possibly with several operations",
+            "customer": {  # Optional
+                "id": "cus_xxx",
+                "payment_method_id": "pm_xxx",
+                "name": "Customer Name",
+                "email": "customer@example.com",
+                "phone": "+1234567890",
+                "address": {
+                    "line1": "123 Main St",
+                    "city": "San Francisco",
+                    "state": "CA",
+                    "postal_code": "94105"
+                },
+                "description": "Optional description"
+            },
+            "payment_mode": "sync"  # Optional: "async" returns once intents are created
+        }
+    }
+
+    Stripe webhook deliveries (recognized by their Stripe-Signature header)
+    update the payment state store, and a body of {"payment_status": "pi_xxx"}
+    returns the intent's last known state.
+
+    A warmup event ({"warmup": true}, or an EventBridge schedule) initializes
+    the container without charging anyone or calling the LLM, and reports
+    how long each component took.
+    """
+    try:
+        if is_warmup_event(event):
+            return envelope.response(event, 200, warm())
+        
+        logger.info(f"Received event: {event}")
+        
+        headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+        if 'stripe-signature' in headers:
+            return webhook_response(event, headers['stripe-signature'])
+        
+        # Parse and validate the body once; the typed request is passed to the crew
+        try:
+            body = request_body(event)
+            if 'payment_status' in body:
+                return payment_status_response(event, body['payment_status'])
+            stripe_request = StripeRequest.from_body(body)
+        except RequestError as e:
+            return envelope.response(event, 400, {"error": str(e)})
+        
+        query = stripe_request.query
+        logger.info(f"Processing query: {query}")
+        
+        # Stages are budgeted against the invocation's remaining time
+        deadline = Deadline.from_context(context)
+        stripe_crew = StripeCrew(request=stripe_request)
+        outcome = stripe_crew.process_request(query, deadline)
+        result = outcome['result']
+        
+        # Determine status code based on result; 207 when only some operations succeeded
+        if result.startswith("SUCCESS:"):
+            status_code = 200
+        elif result.startswith("PARTIAL:"):
+            status_code = 207
+        else:
+            status_code = outcome.get('status_code', 400)
+        
+        headers = {
+            "Access-Control-Allow-Origin": "*",  # Enable CORS for local testing
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Allow-Methods": "POST, OPTIONS"
+        }
+        if outcome.get('retry_after') is not None:
+            # Service busy: the LLM circuit breaker is open
+            headers["Retry-After"] = str(max(1, math.ceil(outcome['retry_after'])))
+        # Envelope-aware callers get the body as an object, gzipped when large
+        response = envelope.response(
+            event, status_code, {"result": result, "operations": outcome['operations']}, headers
+        )
+        logger.info(f"Returning response: {response}")
+        return response
+        
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decode error: {str(e)}")
+        return envelope.response(event, 400, {"error": "Invalid JSON in request body"})
+    except Exception as e:
+        logger.error(f"Error processing request: {str(e)}")
+        return envelope.response(event, 500, {"error": f"Internal server error - {str(e)}"})
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""Deterministic parser for payment queries with a familiar shape.
+
+Handles queries such as "Process a payment of $25 to account acct_123" and
+"Create a payment link for 'Product Name' for $19.99", including several of
+them joined by "and", "then" or semicolons. Each clause has to match one of a
+few fixed imperative shapes from start to end, e.g. "send <amount> to
+<account>". Any query that contains a negation, refund or cancel words, a
+question, or a repeat count ("10 times", "each month") is rejected outright,
+whatever its shape. The LLM handles everything the parser rejects. In those
+cases the parser returns no operations rather than guess.
+"""
+import re
+from typing import Dict, List, Optional
+
+_AMOUNT_PATTERN = r'(?:\$\s?(?P<dollars>\d{1,6}(?:,\d{3})*(?:\.\d{1,2})?)|(?P<plain>\d{1,6}(?:\.\d{1,2})?)\s?(?:dollars|usd))'
+_ACCOUNT_PATTERN = r'(?:(?:connected\s+)?account\s+)?(?P<account>acct_[A-Za-z0-9]+)'
+_PRODUCT_PATTERN = r'(?:[\'"‘“](?P<quoted>[^\'"‘’“”]+)[\'"’”]|(?P<bare>[^\'"‘’“”$]+?))'
+_POLITE = r'(?:please\s+)?'
+_END = r'\s*[.!]?'
+
+_AMOUNT = re.compile(_AMOUNT_PATTERN, re.IGNORECASE)
+
+# Whole-clause shapes; a clause that matches none of them is left to the LLM
+_CONNECT_SHAPES = [re.compile(f'^{_POLITE}{shape}{_END}$', re.IGNORECASE) for shape in (
+    rf'(?:send|pay|transfer)\s+{_AMOUNT_PATTERN}\s+to\s+{_ACCOUNT_PATTERN}',
+    rf'pay\s+{_ACCOUNT_PATTERN}\s+{_AMOUNT_PATTERN}',
+    rf'(?:process|make|send)\s+an?\s+(?:connect\s+)?payment\s+of\s+{_AMOUNT_PATTERN}\s+to\s+{_ACCOUNT_PATTERN}',
+)]
+# "... and $35 to acct_B": the verb is carried over from a connect payment clause before it
+_CONTINUATION_SHAPE = re.compile(f'^(?:also\\s+)?{_AMOUNT_PATTERN}\\s+to\\s+{_ACCOUNT_PATTERN}{_END}$', re.IGNORECASE)
+_LINK_SHAPE = re.compile(
+    f'^{_POLITE}(?:create|make|generate|set\\s+up)\\s+(?:an?\\s+)?(?:payment\\s+|checkout\\s+)?link\\s+'
+    f'(?:for|to\\s+buy|to\\s+sell)\\s+{_PRODUCT_PATTERN}\\s+(?:for|at|costing|priced\\s+at)\\s+{_AMOUNT_PATTERN}{_END}$',
+    re.IGNORECASE,
+)
+
+# Words that change what a matching shape would mean: negation, reversal,
+# questions and conditions, and repetition. Any of them sends the query to the LLM.
+_REJECT = re.compile(
+    r"\b(?:not|no|never|don'?t|doesn'?t|won'?t|shouldn'?t|can'?t|cannot|stop|without|instead|unless|if"
+    r"|refund\w*|cancel\w*|revers\w*|void\w*|undo|chargeback|dispute\w*|withdraw\w*|from"
+    r"|what|why|how|when|which|who|whether|balance|status|check|should|would|could|maybe"
+    r"|times|twice|thrice|each|every|per|daily|weekly|monthly|yearly|recurring|repeat\w*|split)\b"
+    r"|n't\b|\?|\b\d+\s*x\b|\bx\s*\d+\b",
+    re.IGNORECASE,
+)
+
+_CLAUSE_SPLIT = re.compile(
+    r'\s*;\s*|,?\s+(?:and\s+)?then\s+|,?\s+and\s+(?=(?:also\s+)?(?:\$|send|pay|process|transfer|create|make|generate|set up|\d))'
+    r'|,\s*(?=(?:send|pay|process|transfer|create|make|generate|set up)\b)',
+    re.IGNORECASE,
+)
+
+
+def _amount(match: 're.Match') -> float:
+    return float((match.group('dollars') or match.group('plain')).replace(',', ''))
+
+
+def _operation(clause: str, previous: Optional[Dict]) -> Dict:
+    for shape in _CONNECT_SHAPES:
+        match = shape.match(clause)
+        if match:
+            return {'type': 'connect_payment', 'amount': _amount(match), 'account_id': match.group('account')}
+    match = _CONTINUATION_SHAPE.match(clause)
+    if match and previous is not None and previous['type'] == 'connect_payment':
+        return {'type': 'connect_payment', 'amount': _amount(match), 'account_id': match.group('account')}
+    match = _LINK_SHAPE.match(clause)
+    if match:
+        product = (match.group('quoted') or match.group('bare') or '').strip()
+        if product and not _AMOUNT.search(product):
+            return {'type': 'payment_link', 'amount': _amount(match), 'product': product}
+    return {}
+
+
+def parse_query(query: str) -> List[Dict]:
+    """Return one operation dict per clause, or an empty list if any clause is unclear."""
+    query = query.strip()
+    if not query or _REJECT.search(query):
+        return []
+    clauses = [c.strip() for c in _CLAUSE_SPLIT.split(query) if c and c.strip()]
+    operations = []
+    for clause in clauses:
+        operation = _operation(clause, operations[-1] if operations else None)
+        if not operation:
+            return []
+        operations.append(operation)
+    # Every amount in the query must belong to exactly one operation
+    if len(operations) != len(_AMOUNT.findall(query)):
+        return []
+    return operations
@@ -14,6 +14,7 @@ def get_user_input() -> str:
     print("\nExample queries:")
     print("1. Process a payment of $25 to account acct_1QYv4YCd615Z2kol")
     print("2. Create a payment link for 'Product Name' for $19.99")
+    print("3. Send $20 to acct_A and $35 to acct_B, and make a payment link for 'Tutoring' for $40")
     
     while True:
         query = input("\nWhat would you like to do? ").strip()
@@ -0,0 +1,78 @@
+"""Parse and speculation counters for the Stripe crew.
+
+Token and latency accounting is shared with the web summarizer in
+``crew_common.metrics``.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+
+class ParseStats:
+    """Parse outcomes per output mode, for comparing failure rates and LLM attempts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {'requests': 0, 'failures': 0, 'attempts': 0, 'successful_attempts': 0}
+        )
+
+    def record(self, mode: str, success: bool, attempts: int) -> None:
+        attempts = max(1, attempts)
+        with self._lock:
+            stats = self._stats[mode]
+            stats['requests'] += 1
+            stats['attempts'] += attempts
+            if success:
+                stats['successful_attempts'] += attempts
+            else:
+                stats['failures'] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Failure rate and average LLM attempts per successful parse for each mode."""
+        with self._lock:
+            stats = {mode: dict(values) for mode, values in self._stats.items()}
+        summary = {}
+        for mode, values in stats.items():
+            successes = values['requests'] - values['failures']
+            summary[mode] = {
+                'requests': values['requests'],
+                'failure_rate': round(values['failures'] / values['requests'], 3) if values['requests'] else 0.0,
+                'avg_attempts_per_success': round(values['successful_attempts'] / successes, 2) if successes else 0.0,
+            }
+        return summary
+
+
+parse_stats = ParseStats()
+
+
+class SpeculationStats:
+    """Outcomes of racing the local parser against the LLM parse."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = defaultdict(int)
+
+    def record_winner(self, source: Optional[str]) -> None:
+        with self._lock:
+            self._counts['races'] += 1
+            self._counts[f"{source}_wins" if source else 'both_failed'] += 1
+
+    def record_agreement(self, agreed: Optional[bool]) -> None:
+        """Record whether both parsers produced the same operations (None if either failed)."""
+        with self._lock:
+            if agreed is None:
+                self._counts['incomparable'] += 1
+            else:
+                self._counts['compared'] += 1
+                self._counts['agreed'] += int(agreed)
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            counts = dict(self._counts)
+        compared = counts.get('compared', 0)
+        counts['agreement_rate'] = round(counts.get('agreed', 0) / compared, 3) if compared else 0.0
+        return counts
+
+
+speculation_stats = SpeculationStats()
@@ -0,0 +1,52 @@
+"""Typed request bodies and the payment data returned by the parse step."""
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+from crew_common.models import Customer, RequestError
+
+
+class PaymentRequest(BaseModel):
+    """A single parsed payment operation."""
+    type: Literal['payment_link', 'connect_payment'] = Field(
+        ..., description="payment_link for payment links, connect_payment for payments to an account"
+    )
+    amount: float = Field(..., gt=0, le=999999.99, description="Amount in dollars")
+    product: Optional[str] = Field(None, description="Product name, required for payment_link")
+    account_id: Optional[str] = Field(None, description="Destination account ID starting with acct_, required for connect_payment")
+
+    @model_validator(mode='after')
+    def check_type_fields(self) -> 'PaymentRequest':
+        if self.type == 'payment_link' and not self.product:
+            raise ValueError("Product name is required")
+        if self.type == 'connect_payment' and not (self.account_id or '').startswith('acct_'):
+            raise ValueError("Invalid account ID format")
+        return self
+
+    @property
+    def amount_cents(self) -> int:
+        return int(round(self.amount * 100))
+
+
+class PaymentPlan(BaseModel):
+    """All payment operations requested in a single query."""
+    operations: List[PaymentRequest] = Field(..., min_length=1, description="One entry per requested operation, in order")
+
+
+class StripeRequest(BaseModel):
+    """A validated payment request, built once per invocation."""
+    query: str = Field(..., min_length=1)
+    customer: Optional[Customer] = None
+    payment_mode: Optional[Literal['sync', 'async']] = None
+
+    @classmethod
+    def from_body(cls, body: Dict) -> 'StripeRequest':
+        if 'query' not in body:
+            raise RequestError("Missing 'query' in request body")
+        try:
+            return cls.model_validate(body)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = '.'.join(str(part) for part in error['loc'])
+            raise RequestError(f"Invalid '{field}' in request body: {error['msg']}")
+
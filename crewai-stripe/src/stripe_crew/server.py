@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""Long-lived HTTP server for the Stripe crew, for running outside Lambda.
+
+Usage:
+    stripe-server --port 8080 --workers 8
+
+Requests go to the same ``lambda_handler`` as in the Lambda image, so the wire
+format (envelopes, webhooks, payment status lookups) is unchanged. Two forms
+are accepted:
+
+* ``POST /2015-03-31/functions/function/invocations`` with a Lambda event as
+  the body, as the runtime interface emulator takes it. Clients written for
+  the emulator, such as the test UI, can point at the server unchanged.
+* Any other ``POST`` is a plain HTTP request, turned into an API Gateway proxy
+  event, e.g. a Stripe webhook delivery to ``/webhook``.
+
+Requests run on a fixed pool of worker threads. Beyond the pool and
+``SERVER_BACKLOG`` waiting connections, requests get an immediate 503. What
+is loaded once stays warm and is shared by all requests: the crew modules
+and prompts, the pooled Stripe HTTP session, the rate limiters and circuit
+breakers, and the catalog index. Each request still gets its own crew, Stripe
+client and deadline (``SERVER_REQUEST_TIMEOUT_S``). SIGTERM and SIGINT stop
+accepting new connections. In-flight requests are then given up to
+``SERVER_DRAIN_S`` to finish.
+"""
+import argparse
+import logging
+import os
+import sys
+from typing import List, Optional
+
+from crew_common.server import SERVER_DRAIN_S, serve
+
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', '8'))
+SERVER_BACKLOG = int(os.getenv('SERVER_BACKLOG', '32'))
+SERVER_REQUEST_TIMEOUT_S = float(os.getenv('SERVER_REQUEST_TIMEOUT_S', '60'))
+FUNCTION_NAME = 'stripe-crew-server'
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '8080')))
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS)
+    parser.add_argument('--backlog', type=int, default=SERVER_BACKLOG)
+    parser.add_argument('--drain', type=float, default=SERVER_DRAIN_S, help="Seconds to let in-flight requests finish")
+    args = parser.parse_args(argv)
+
+    if not os.getenv("STRIPE_API_KEY"):
+        print("Error: STRIPE_API_KEY environment variable is not set")
+        return 1
+
+    # The crew stack and connections are loaded now rather than by the first request
+    from src.stripe_crew.handler import lambda_handler
+    from src.stripe_crew.warmup import warm
+    warm()
+    return serve(lambda_handler, args.host, args.port, args.workers, args.backlog,
+                 SERVER_REQUEST_TIMEOUT_S, args.drain, FUNCTION_NAME)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Warmup for provisioned concurrency and scheduled keep-warm pings.
+
+A warmup event, ``{"warmup": true}`` or an EventBridge scheduled event,
+initializes what the first real request would otherwise pay for. That is the
+crew with its agent, prompts and parse task, the local parser, the Stripe
+HTTP session with a connection open to the API, the catalog index, the
+payment state store, and the rate limiters and circuit breaker. No one is
+charged and the LLM is not called. Each component is initialized once per
+process. Later pings skip it, so a warm container answers in milliseconds.
+The report gives each component's status and how long it took.
+"""
+from typing import Any, Dict, List
+
+from crew_common import warmup
+from crew_common.warmup import Component
+
+
+def _crew() -> None:
+    from src.stripe_crew.crew import StripeCrew
+    crew = StripeCrew()
+    # Renders the prompt templates and builds the task without running it
+    crew.parse_request("Create a payment link for Warmup for $1")
+
+
+def _local_parser() -> None:
+    from src.stripe_crew.local_parser import parse_query
+    parse_query("Create a payment link for Warmup for $1")
+
+
+def _catalog() -> None:
+    from src.stripe_crew.catalog import get_catalog
+    get_catalog().counts()
+
+
+COMPONENTS: List[Component] = [
+    ('crew', _crew),
+    ('local_parser', _local_parser),
+    ('stripe_http', warmup.stripe_http),
+    ('catalog', _catalog),
+    ('payment_state', warmup.payment_state),
+    ('limits', warmup.limits),
+]
+
+
+def warm() -> Dict[str, Any]:
+    """Initialize every component not yet warm in this process and report on each."""
+    return warmup.warm(COMPONENTS)
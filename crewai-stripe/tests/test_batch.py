@@ -0,0 +1,64 @@
+"""Unit tests for the bulk payment-link runner.
+
+Run from the project root: `python -m unittest tests/test_batch.py` (or `pytest tests/test_batch.py`).
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'crew_common', 'src'))
+
+from src.stripe_crew.batch import BatchRunner, read_rows
+
+
+class FakeCrew:
+    """Stands in for StripeCrew: returns a link URL without calling Stripe."""
+
+    def create_payment_link(self, product, amount_cents, idempotency_key=None):
+        return f"https://buy.stripe.test/{product}/{amount_cents}"
+
+    @staticmethod
+    def format_error(error):
+        return f"Error: {str(error)}"
+
+
+class MalformedInput(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.input = os.path.join(self.dir, 'rows.jsonl')
+        self.output = os.path.join(self.dir, 'links.jsonl')
+
+    def run_batch(self, lines):
+        with open(self.input, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        stats = BatchRunner(FakeCrew, self.output, concurrency=2).run(read_rows(self.input))
+        with open(self.output, encoding='utf-8') as f:
+            records = {record['id']: record for record in map(json.loads, f)}
+        return stats, records
+
+    def test_bad_line_fails_only_its_row(self):
+        stats, records = self.run_batch([
+            json.dumps({'id': 'a', 'product': 'Lamp', 'amount': 40}),
+            '{"id": "b", "product": ',
+            '["not", "an", "object"]',
+            json.dumps({'id': 'd', 'product': 'Desk', 'amount_cents': 19999}),
+        ])
+        self.assertEqual((stats.rows, stats.succeeded, stats.failed), (4, 2, 2))
+        self.assertTrue(records['a']['success'])
+        self.assertTrue(records['d']['success'])
+        self.assertEqual(records['d']['links'][0]['url'], "https://buy.stripe.test/Desk/19999")
+        self.assertFalse(records['2']['success'])
+        self.assertIn("Line 2 is not valid JSON", records['2']['error'])
+        self.assertFalse(records['3']['success'])
+        self.assertIn("Line 3 is not a JSON object", records['3']['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Unit tests for the deterministic payment query parser.
+
+The local parser's result is executed without the LLM, so anything it is not
+sure of must come back empty. Run from the project root:
+`python -m unittest tests/test_local_parser.py` (or `pytest tests/test_local_parser.py`).
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.stripe_crew.local_parser import parse_query
+
+
+class RecognizedShapes(unittest.TestCase):
+
+    def test_connect_payment(self):
+        self.assertEqual(parse_query("Pay $25 to acct_123"),
+                         [{'type': 'connect_payment', 'amount': 25.0, 'account_id': 'acct_123'}])
+
+    def test_process_payment_to_account(self):
+        self.assertEqual(parse_query("Process a payment of $25 to account acct_123."),
+                         [{'type': 'connect_payment', 'amount': 25.0, 'account_id': 'acct_123'}])
+
+    def test_pay_account_amount(self):
+        self.assertEqual(parse_query("please pay acct_A 40 dollars"),
+                         [{'type': 'connect_payment', 'amount': 40.0, 'account_id': 'acct_A'}])
+
+    def test_payment_link_quoted(self):
+        self.assertEqual(parse_query("Create a payment link for 'Lamp' for $40"),
+                         [{'type': 'payment_link', 'amount': 40.0, 'product': 'Lamp'}])
+
+    def test_payment_link_unquoted(self):
+        self.assertEqual(parse_query("Make a link to sell Garden Gnome at $1,250.50"),
+                         [{'type': 'payment_link', 'amount': 1250.5, 'product': 'Garden Gnome'}])
+
+    def test_several_operations(self):
+        self.assertEqual(
+            parse_query("send $20 to acct_A and $35 to acct_B, and make a payment link for 'Tutoring' for $40"),
+            [
+                {'type': 'connect_payment', 'amount': 20.0, 'account_id': 'acct_A'},
+                {'type': 'connect_payment', 'amount': 35.0, 'account_id': 'acct_B'},
+                {'type': 'payment_link', 'amount': 40.0, 'product': 'Tutoring'},
+            ],
+        )
+
+
+class RejectedQueries(unittest.TestCase):
+    """Queries that mention an amount and an account but must not become a payment."""
+
+    def assertRejected(self, query):
+        self.assertEqual(parse_query(query), [], query)
+
+    def test_negation(self):
+        self.assertRejected("Don't send $20 to acct_ABC")
+        self.assertRejected("Do not pay acct_XYZ $500")
+        self.assertRejected("Never send $20 to acct_ABC")
+        self.assertRejected("Send $20 to acct_ABC, no wait")
+
+    def test_refund(self):
+        self.assertRejected("Refund $20 from acct_ABC")
+        self.assertRejected("Send $20 refund to acct_ABC")
+
+    def test_cancel(self):
+        self.assertRejected("Cancel the $25 payment to acct_123")
+        self.assertRejected("Pay $25 to acct_123 then cancel it")
+
+    def test_question(self):
+        self.assertRejected("What is the balance of acct_123? It should be $50")
+        self.assertRejected("Should I pay $50 to acct_123")
+
+    def test_multiplier(self):
+        self.assertRejected("Send $5 to acct_A 10 times")
+        self.assertRejected("Send $5 to acct_A twice")
+        self.assertRejected("Pay $5 to acct_A every month")
+        self.assertRejected("Send $5 to acct_A x3")
+
+    def test_unknown_verb(self):
+        self.assertRejected("Charge $20 to acct_ABC")
+        self.assertRejected("Move $20 over to acct_ABC")
+
+    def test_continuation_needs_a_payment_before_it(self):
+        self.assertRejected("$35 to acct_B")
+        self.assertRejected("Create a payment link for 'Lamp' for $40 and $35 to acct_B")
+
+    def test_unaccounted_amount(self):
+        self.assertRejected("Send $20 to acct_A with a $5 fee")
+        self.assertRejected("Create a payment link for 'Lamp' for $40 or $45")
+
+
+if __name__ == '__main__':
+    unittest.main()
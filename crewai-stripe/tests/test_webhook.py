@@ -0,0 +1,52 @@
+"""Local webhook stand-in for async payment mode.
+
+Sends signed PaymentIntent events to the Lambda container, as the Stripe CLI
+would, then reads the intent's state back. Run the container with the same
+STRIPE_WEBHOOK_SECRET, e.g. `docker run -p 9000:8080 -e STRIPE_WEBHOOK_SECRET=whsec_test ...`.
+"""
+
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'crew_common', 'src'))
+
+from crew_common.webhooks import sign_payload
+
+# URL for the local AWS Lambda Docker invocation
+url = "http://localhost:9000/2015-03-31/functions/function/invocations"
+secret = os.getenv("STRIPE_WEBHOOK_SECRET", "whsec_test")
+payment_intent = os.getenv("PAYMENT_INTENT", "pi_test_webhook")
+
+
+def send_event(event_id, event_type, status, created):
+    payload = json.dumps({
+        "id": event_id,
+        "type": event_type,
+        "created": created,
+        "data": {"object": {"id": payment_intent, "object": "payment_intent", "status": status,
+                            "amount": 5000, "currency": "usd"}}
+    })
+    response = requests.post(url, json={
+        "headers": {"Stripe-Signature": sign_payload(payload, secret)},
+        "body": payload
+    })
+    print(event_type, response.json())
+
+
+now = int(time.time())
+send_event("evt_test_1", "payment_intent.processing", "processing", now)
+send_event("evt_test_2", "payment_intent.succeeded", "succeeded", now + 1)
+# A redelivery and a late, older event must not change the final state
+send_event("evt_test_2", "payment_intent.succeeded", "succeeded", now + 1)
+send_event("evt_test_3", "payment_intent.processing", "processing", now)
+
+response = requests.post(url, json={"body": json.dumps({"payment_status": payment_intent})})
+print(response.json())
+
+"""
+output: {'statusCode': 200, ..., 'body': '{"payment_intent": "pi_test_webhook", "status": "succeeded", ..., "final": true}'}
+"""
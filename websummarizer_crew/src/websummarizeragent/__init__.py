@@ -1,3 +1,9 @@
 """Web summarizer agent with Stripe payment integration."""
-from .crew import WebSummarizer
 
+
+def __getattr__(name):
+    # Imported lazily so light modules (models, preflight) load without crewai
+    if name == 'WebSummarizer':
+        from .crew import WebSummarizer
+        return WebSummarizer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,406 @@
+#!/usr/bin/env python
+"""Benchmarks for the summarization pipeline.
+
+Usage:
+    python -m websummarizeragent.benchmark map-reduce --lengths 5000 20000 80000
+    python -m websummarizeragent.benchmark embedder --backends huggingface onnx
+    python -m websummarizeragent.benchmark batch-sizes --batch-sizes 1 8 16 32 64
+    python -m websummarizeragent.benchmark fast-tier --lengths 5000 20000 80000
+    python -m websummarizeragent.benchmark request-overhead --customer-kb 1 16 128
+    python -m websummarizeragent.benchmark wire-format --summary-kb 4 64 256
+    python -m websummarizeragent.benchmark throughput --concurrency 1 4 8 --requests 200
+"""
+import argparse
+import json
+import logging
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+_WORDS = (
+    "market policy energy research model data growth risk study result network customer "
+    "product system analysis report region price supply demand team platform cost value "
+    "security design process strategy impact trend measure outcome source evidence"
+).split()
+
+
+def synthetic_text(length: int, seed: int = 0) -> str:
+    """Generate paragraph-structured filler text of roughly ``length`` characters."""
+    rng = random.Random(seed)
+    paragraphs: List[str] = []
+    size = 0
+    while size < length:
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 20))]
+            sentences.append(' '.join(words).capitalize() + '.')
+        paragraph = ' '.join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return '\n\n'.join(paragraphs)[:length]
+
+
+def page_text(url: Optional[str], length: int) -> str:
+    if not url:
+        return synthetic_text(length)
+    from .fetch import fetch_text
+    text, _ = fetch_text(url)
+    while len(text) < length:
+        text = f"{text}\n\n{text}"
+    return text[:length]
+
+
+def bench_map_reduce(args: argparse.Namespace) -> List[Dict]:
+    """Wall-clock time of the map-reduce engine against page length."""
+    from .summarize import MapReduceConfig, MapReduceSummarizer
+
+    rows = []
+    for length in args.lengths:
+        text = page_text(args.url, length)
+        config = MapReduceConfig.from_inputs({'map_reduce': {
+            'chunk_size': args.chunk_size, 'fan_out': args.fan_out, 'model': args.model,
+        }})
+        summarizer = MapReduceSummarizer(config)
+        started = time.perf_counter()
+        summarizer.summarize(args.url or 'synthetic://page', text=text)
+        elapsed = time.perf_counter() - started
+        row = {'chars': length, 'wall_s': round(elapsed, 2), **summarizer.stats.to_dict()}
+        rows.append(row)
+        print(json.dumps(row))
+    return rows
+
+
+def _chunks(count: int, size: int = 1000) -> List[str]:
+    text = synthetic_text(count * size, seed=1)
+    return [text[i:i + size] for i in range(0, len(text), size)][:count]
+
+
+def bench_embedder_backend(args: argparse.Namespace) -> Dict:
+    """Load time, latency and peak RSS of one embedder backend (run in its own process)."""
+    from .embeddings import build_embedder, embedder_config
+
+    started = time.perf_counter()
+    embedder = build_embedder(embedder_config(args.backend))
+    load_s = time.perf_counter() - started
+    texts = _chunks(args.chunks)
+    embedder.embed(texts[:2])  # warm up
+    started = time.perf_counter()
+    embedder.embed(texts, batch_size=args.batch_size)
+    embed_s = time.perf_counter() - started
+    row = {
+        'backend': args.backend,
+        'load_s': round(load_s, 2),
+        'embed_ms_per_chunk': round(embed_s / len(texts) * 1000, 2),
+        'chunks_per_s': round(len(texts) / embed_s, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    print(json.dumps(row))
+    return row
+
+
+def bench_embedder(args: argparse.Namespace) -> List[Dict]:
+    """Compare embedder backends: parity of embeddings, latency and peak RSS."""
+    rows = []
+    for backend in args.backends:
+        # Each backend runs in a fresh interpreter so import cost and RSS are not shared
+        output = subprocess.run(
+            [sys.executable, '-m', 'websummarizeragent.benchmark', 'embedder-backend',
+             '--backend', backend, '--chunks', str(args.chunks), '--batch-size', str(args.batch_size)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        row = json.loads(output.strip().splitlines()[-1])
+        rows.append(row)
+        print(json.dumps(row))
+    if len(args.backends) >= 2:
+        from .embeddings import build_embedder, embedder_config, parity_check
+        reference, candidate = (build_embedder(embedder_config(b)) for b in args.backends[:2])
+        print(json.dumps({'parity': parity_check(_chunks(args.chunks), reference, candidate)}))
+    return rows
+
+
+def bench_batch_sizes(args: argparse.Namespace) -> List[Dict]:
+    """Chunks/sec of the embedding executor for a range of batch sizes."""
+    from .embeddings import EmbeddingExecutor, build_embedder, embed_threads, embedder_config
+
+    config = embedder_config(args.backend)
+    config['config']['num_threads'] = args.threads or embed_threads()
+    executor = EmbeddingExecutor(build_embedder(config))
+    # Mixed chunk lengths, as produced by real pages
+    rng = random.Random(2)
+    texts = [t[:rng.randint(80, len(t))] for t in _chunks(args.chunks)]
+    executor.embed(texts[:4])  # warm up
+    rows = []
+    for batch_size in args.batch_sizes:
+        started = time.perf_counter()
+        executor.embed(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        row = {
+            'backend': args.backend, 'threads': config['config']['num_threads'],
+            'batch_size': batch_size, 'chunks_per_s': round(len(texts) / elapsed, 1),
+        }
+        rows.append(row)
+        print(json.dumps(row))
+    return rows
+
+
+def bench_fast_tier(args: argparse.Namespace) -> List[Dict]:
+    """Latency of the extractive fast tier against the LLM map-reduce path."""
+    from .embeddings import build_executor, embedder_config
+    from .extractive import ExtractiveSummarizer
+    from .summarize import MapReduceConfig, MapReduceSummarizer
+
+    executor = build_executor(embedder_config(args.backend))
+    executor.embed(_chunks(4))  # warm up
+    rows = []
+    for length in args.lengths:
+        text = page_text(args.url, length)
+        url = args.url or 'synthetic://page'
+        extractive = ExtractiveSummarizer(executor)
+        started = time.perf_counter()
+        extractive.summarize(url, text=text)
+        row = {'chars': length, 'extractive_s': round(time.perf_counter() - started, 3),
+               'sentences': extractive.stats.sentences}
+        if not args.skip_llm:
+            summarizer = MapReduceSummarizer(MapReduceConfig.from_inputs({'map_reduce': {'model': args.model}}))
+            started = time.perf_counter()
+            summarizer.summarize(url, text=text)
+            row['llm_s'] = round(time.perf_counter() - started, 3)
+            row['llm_calls'] = summarizer.stats.llm_calls
+            row['speedup'] = round(row['llm_s'] / max(row['extractive_s'], 1e-6), 1)
+        rows.append(row)
+        print(json.dumps(row))
+    return rows
+
+
+def large_customer(size_kb: int) -> Dict:
+    """A customer payload padded to roughly ``size_kb`` KB with extra fields."""
+    customer = {
+        'id': 'cus_bench', 'payment_method_id': 'pm_bench', 'name': 'Bench Customer',
+        'email': 'bench@example.com', 'phone': '+1234567890',
+        'address': {'line1': '123 Main St', 'city': 'San Francisco', 'state': 'CA', 'postal_code': '94105'},
+    }
+    index = 0
+    while len(json.dumps(customer)) < size_kb * 1024:
+        customer[f'note_{index}'] = f"order {index}: " + 'x' * 200
+        index += 1
+    return customer
+
+
+def legacy_request_path(event: Dict) -> str:
+    """Handler work before typed requests: json decode, field checks, re-marshalled inputs."""
+    body = json.loads(event['body'])
+    if not isinstance(body, dict) or 'url' not in body or 'customer' not in body:
+        raise ValueError("invalid body")
+    crew_inputs = {
+        'url': body['url'], 'customer': body['customer'], 'summary_engine': body.get('summary_engine'),
+        'map_reduce': body.get('map_reduce'), 'payment_mode': body.get('payment_mode'),
+    }
+    return json.dumps({'success': True, 'summary': '# Summary', 'payment_intent': crew_inputs['customer']['id']})
+
+
+def typed_request_path(event: Dict) -> str:
+    """Handler work with the typed request: decode and validate once, encode with the codec."""
+    from crew_common import codec
+    from crew_common.models import request_body
+    from .models import SummaryRequest
+    crew_inputs = SummaryRequest.from_body(request_body(event)).crew_inputs()
+    return codec.dumps({'success': True, 'summary': '# Summary', 'payment_intent': crew_inputs['customer']['id']})
+
+
+def bench_request_overhead(args: argparse.Namespace) -> List[Dict]:
+    """Handler decode/validate/encode time per request, legacy vs typed, by customer payload size."""
+    from crew_common import codec
+    rows = []
+    for size_kb in args.customer_kb:
+        body = json.dumps({'url': 'https://example.com/page', 'customer': large_customer(size_kb)})
+        event = {'body': body}
+        iterations = max(20, args.iterations // max(1, size_kb))
+        timings = {}
+        for name, path in (('legacy', legacy_request_path), ('typed', typed_request_path)):
+            best = float('inf')
+            for _ in range(3):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    path(event)
+                best = min(best, time.perf_counter() - started)
+            timings[name] = best / iterations * 1e6
+        row = {
+            'customer_kb': size_kb,
+            'body_bytes': len(body),
+            'codec': codec.BACKEND,
+            'legacy_us': round(timings['legacy'], 1),
+            'typed_us': round(timings['typed'], 1),
+            'speedup': round(timings['legacy'] / timings['typed'], 2),
+        }
+        rows.append(row)
+        print(json.dumps(row))
+    return rows
+
+
+def wire_round_trip(body: Dict, response_body: Dict, mode: str) -> int:
+    """One UI -> Lambda -> UI exchange, both ends included; returns bytes on the wire."""
+    from crew_common import codec, envelope
+    if mode != 'nested':
+        sent = codec.dumps(envelope.request(body, compress=mode == 'gzip'))
+        event = codec.loads(sent)
+        envelope.decode_body(event)
+        received = codec.dumps(envelope.response(event, 200, response_body))
+        envelope.decode_body(codec.loads(received))
+    else:
+        sent = json.dumps({'body': json.dumps(body)})
+        json.loads(json.loads(sent)['body'])
+        received = json.dumps({'statusCode': 200, 'body': json.dumps(response_body)})
+        json.loads(json.loads(received)['body'])
+    return len(sent) + len(received)
+
+
+def bench_wire_format(args: argparse.Namespace) -> List[Dict]:
+    """UI <-> Lambda encode/decode time and bytes: nested JSON strings, envelope, gzipped envelope."""
+    from crew_common import codec
+    body = {'url': 'https://example.com/page', 'customer': large_customer(1)}
+    rows = []
+    for size_kb in args.summary_kb:
+        # Markdown with quotes and newlines, which the nested format escapes twice
+        summary = '\n'.join(f'## "Section {i}"\n{synthetic_text(900, seed=i)}' for i in range(max(1, size_kb)))
+        response_body = {'success': True, 'summary': summary, 'payment_intent': 'pi_bench', 'usage': {}}
+        iterations = max(10, args.iterations // max(1, size_kb))
+        row = {'summary_kb': round(len(summary) / 1024, 1), 'codec': codec.BACKEND}
+        for mode in ('nested', 'envelope', 'gzip'):
+            best = float('inf')
+            for _ in range(3):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    row[f'{mode}_bytes'] = wire_round_trip(body, response_body, mode)
+                best = min(best, time.perf_counter() - started)
+            row[f'{mode}_us'] = round(best / iterations * 1e6, 1)
+        row['speedup'] = round(row['nested_us'] / row['envelope_us'], 2)
+        rows.append(row)
+        print(json.dumps(row))
+    return rows
+
+
+def load_test(url: str, body: Dict, concurrency: int, total: int) -> Dict:
+    """Send ``total`` requests from ``concurrency`` client threads; throughput and latency."""
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+
+    # The emulator takes a Lambda event; a plain HTTP endpoint takes the body itself
+    payload = json.dumps({'body': json.dumps(body)} if url.rstrip('/').endswith('/invocations') else body)
+    local = threading.local()
+
+    def send(_: int) -> Tuple[float, bool]:
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            ok = session.post(url, data=payload, headers={'Content-Type': 'application/json'}, timeout=300).status_code < 500
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, range(total)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'requests': total,
+        'errors': sum(1 for _, ok in results if not ok),
+        'rps': round(total / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+    }
+
+
+def bench_throughput(args: argparse.Namespace) -> List[Dict]:
+    """Requests per second against the Lambda emulator and the server, by client concurrency."""
+    body = json.loads(args.body)
+    rows = []
+    for name, url in (('emulator', args.emulator_url), ('server', args.server_url)):
+        if not url:
+            continue
+        # One request first, so neither side is timed loading on a cold start
+        load_test(url, body, 1, 1)
+        for concurrency in args.concurrency:
+            row = {'target': name, 'concurrency': concurrency, **load_test(url, body, concurrency, args.requests)}
+            rows.append(row)
+            print(json.dumps(row))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    map_reduce = commands.add_parser('map-reduce', help=bench_map_reduce.__doc__)
+    map_reduce.add_argument('--url', help="Page to summarize (repeated/truncated to each length); synthetic text if omitted")
+    map_reduce.add_argument('--lengths', type=int, nargs='+', default=[5000, 20000, 80000, 200000])
+    map_reduce.add_argument('--chunk-size', type=int, default=None)
+    map_reduce.add_argument('--fan-out', type=int, default=None)
+    map_reduce.add_argument('--model', default=None)
+    map_reduce.set_defaults(func=bench_map_reduce)
+
+    embedder = commands.add_parser('embedder', help=bench_embedder.__doc__)
+    embedder.add_argument('--backends', nargs='+', default=['huggingface', 'onnx'])
+    embedder.add_argument('--chunks', type=int, default=256)
+    embedder.add_argument('--batch-size', type=int, default=32)
+    embedder.set_defaults(func=bench_embedder)
+
+    backend = commands.add_parser('embedder-backend', help=bench_embedder_backend.__doc__)
+    backend.add_argument('--backend', required=True)
+    backend.add_argument('--chunks', type=int, default=256)
+    backend.add_argument('--batch-size', type=int, default=32)
+    backend.set_defaults(func=bench_embedder_backend)
+
+    batch_sizes = commands.add_parser('batch-sizes', help=bench_batch_sizes.__doc__)
+    batch_sizes.add_argument('--backend', default=None)
+    batch_sizes.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8, 16, 32, 64, 128])
+    batch_sizes.add_argument('--chunks', type=int, default=256)
+    batch_sizes.add_argument('--threads', type=int, default=None)
+    batch_sizes.set_defaults(func=bench_batch_sizes)
+
+    fast_tier = commands.add_parser('fast-tier', help=bench_fast_tier.__doc__)
+    fast_tier.add_argument('--url', help="Page to summarize (repeated/truncated to each length); synthetic text if omitted")
+    fast_tier.add_argument('--lengths', type=int, nargs='+', default=[5000, 20000, 80000])
+    fast_tier.add_argument('--backend', default=None)
+    fast_tier.add_argument('--model', default=None)
+    fast_tier.add_argument('--skip-llm', action='store_true', help="Time only the extractive tier")
+    fast_tier.set_defaults(func=bench_fast_tier)
+
+    overhead = commands.add_parser('request-overhead', help=bench_request_overhead.__doc__)
+    overhead.add_argument('--customer-kb', type=int, nargs='+', default=[1, 16, 128, 512])
+    overhead.add_argument('--iterations', type=int, default=2000)
+    overhead.set_defaults(func=bench_request_overhead)
+
+    wire = commands.add_parser('wire-format', help=bench_wire_format.__doc__)
+    wire.add_argument('--summary-kb', type=int, nargs='+', default=[4, 16, 64, 256])
+    wire.add_argument('--iterations', type=int, default=500)
+    wire.set_defaults(func=bench_wire_format)
+
+    throughput = commands.add_parser('throughput', help=bench_throughput.__doc__)
+    throughput.add_argument('--emulator-url', default='http://localhost:9000/2015-03-31/functions/function/invocations')
+    throughput.add_argument('--server-url', default='http://localhost:8080/2015-03-31/functions/function/invocations')
+    throughput.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    throughput.add_argument('--requests', type=int, default=200)
+    throughput.add_argument('--body', default=json.dumps({'payment_status': 'pi_benchmark'}),
+                            help="Request body; the default is a payment status lookup, which charges no one")
+    throughput.set_defaults(func=bench_throughput)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
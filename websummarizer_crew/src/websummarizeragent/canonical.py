@@ -0,0 +1,81 @@
+"""URL canonicalization so one article maps to one cache and store key."""
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# Query parameters that only track the visit and never change the content
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'twclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'ref_url',
+    'spm', 'cmpid', 'ncid', 'sr_share', 'oly_enc_id', 'oly_anon_id', 'vero_id', 'amp',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_', 'hsa_')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_LINK_TAG = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+_ATTR = re.compile(r'([a-zA-Z-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+_AMP_PATH = re.compile(r'(/amp)+/?$|\.amp(?=\.html?$|$)', re.IGNORECASE)
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so trivially different links to the same page compare equal.
+
+    The result is a cache and store key, not an address to fetch: AMP
+    variants, for one, map to the same key as the page they mirror.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters, AMP variants and trailing slashes, and sorts the query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower().rstrip('.')
+    if host.startswith('amp.'):
+        host = host[4:]
+    if ':' in host:
+        # IPv6 literal: urlsplit drops the brackets, which the netloc needs
+        host = f"[{host}]"
+    netloc = host
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}{':' + parts.password if parts.password else ''}@{netloc}"
+
+    path = _AMP_PATH.sub('', parts.path)
+    path = re.sub(r'/{2,}', '/', path).rstrip('/') or '/'
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)
+    ))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def _site(url: str) -> str:
+    host = urlsplit(url).hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def resolve_canonical(html: str, base_url: str) -> Optional[str]:
+    """Return the canonicalized ``<link rel="canonical">`` target of a page, if any.
+
+    ``base_url`` is the URL the page was fetched from, after redirects. The
+    canonical becomes the page's store key, so a target on another host is
+    ignored: otherwise any page could file its content under someone else's URL.
+    """
+    end = html.lower().find('</head>')
+    head = html[:end] if end != -1 else html[:100000]
+    for tag in _LINK_TAG.findall(head):
+        attrs = {m.group(1).lower(): next(g for g in m.groups()[1:] if g is not None)
+                 for m in _ATTR.finditer(tag)}
+        if 'canonical' in attrs.get('rel', '').lower().split() and attrs.get('href'):
+            target = urljoin(base_url, attrs['href'].strip())
+            if urlsplit(target).scheme not in ('http', 'https'):
+                return None
+            canonical = canonicalize_url(target)
+            if _site(canonical) != _site(canonicalize_url(base_url)):
+                return None
+            return canonical
+    return None
@@ -1,12 +1,30 @@
 import stripe
 from crewai import Agent, Crew, Process, Task
-from crewai_tools import WebsiteSearchTool
 import os
 from dotenv import load_dotenv
 import json
 from typing import Dict, Union, Optional, Any
 import logging
 import sys
+import time
+import uuid
+
+from crew_common.circuit_breaker import CircuitOpenError, breaker
+from crew_common.deadline import Deadline, DeadlineExceeded
+from crew_common.metrics import usage_tracker
+from crew_common.payment_state import get_payment_store, payment_mode
+from crew_common.prompts import get_prompt_variant
+from crew_common.rate_limit import limiter, rate_limit_summary
+from crew_common.routing import agent_route, build_llm, model_name, model_router
+from crew_common.stripe_client import build_stripe_client
+
+from .embeddings import build_search_tool, embedder_config, get_executor
+from .extractive import ExtractiveSummarizer
+from .fetch import fetch_page, get_page_cache
+from .models import SummaryRequest
+from .preflight import PreflightError, preflight
+from .prompts import agent_prompt, prompts, task_expected_output, task_template
+from .summarize import MapReduceConfig, MapReduceSummarizer
 
 # Configure logging
 logging.basicConfig(
@@ -18,64 +36,90 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Deadline budgeting: per-call caps for LLM and Stripe requests, and rough
+# stage durations used before the summarizer model's latency is observed.
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+STRIPE_TIMEOUT_S = float(os.getenv("STRIPE_TIMEOUT_S", "10"))
+DEFAULT_SUMMARY_ESTIMATE_S = 25.0
+EXTRACTIVE_ESTIMATE_S = 3.0
+PAYMENT_STAGE_S = 5.0
+
 class WebSummarizer():
     """WebSummarizer crew that handles billing and web summarization"""
 
     # Service provider's Stripe Connect account ID
     CONNECT_ACCOUNT_ID = "acct_1QYv4YCd615Z2gbp"
     SUMMARY_PRICE = 500  # $5.00 in cents
+    FAST_SUMMARY_PRICE = 100  # $1.00 in cents, extractive tier
+
+    # "agent" lets the summarizer agent drive WebsiteSearchTool; "map_reduce"
+    # summarizes page chunks in parallel and merges the partial summaries;
+    # "extractive" ranks page sentences with the embedder and makes no LLM call.
+    SUMMARY_ENGINES = ('agent', 'map_reduce', 'extractive')
 
-    def __init__(self, crew_inputs: Optional[Dict] = None):
-        """Initialize the web summarizer crew with optional inputs."""
+    def __init__(self, crew_inputs: Optional[Dict] = None, request: Optional[SummaryRequest] = None,
+                 api_key: Optional[str] = None, client: Optional[stripe.StripeClient] = None):
+        """Initialize the web summarizer crew with optional inputs, or an already validated request.
+
+        Stripe calls go through ``client`` if given, otherwise through a client
+        of this crew's own for ``api_key`` (STRIPE_API_KEY by default).
+        """
         logger.info("Initializing WebSummarizer...")
+        self.request = request
+        if request is not None:
+            crew_inputs = request.crew_inputs()
         if crew_inputs is None:
             crew_inputs = {}
         if not isinstance(crew_inputs, dict):
             raise ValueError("crew_inputs must be a dictionary")
         self.crew_inputs = crew_inputs
+        self.last_usage = None
+        self.last_extraction = None
+        self.map_reduce_config = None
         
         # Initialize Stripe
         logger.info("Initializing Stripe...")
-        self.api_key = os.getenv("STRIPE_API_KEY")
-        if not self.api_key:
-            raise ValueError("STRIPE_API_KEY environment variable is required")
-        if not self.api_key.startswith(('sk_test_', 'sk_live_')):
-            raise ValueError("Invalid Stripe API key format")
+        self.api_key = api_key or os.getenv("STRIPE_API_KEY")
+        if client is None:
+            if not self.api_key:
+                raise ValueError("STRIPE_API_KEY environment variable is required")
+            if not self.api_key.startswith(('sk_test_', 'sk_live_')):
+                raise ValueError("Invalid Stripe API key format")
         
-        # Configure Stripe with the API key
-        stripe.api_key = self.api_key
+        # A client per crew rather than the global stripe.api_key, so crews for
+        # different keys can run on concurrent threads
+        self.owns_client = client is None
+        self.stripe = client or build_stripe_client(self.api_key)
         
-        # Configure WebsiteSearchTool with HuggingFace embeddings
-        self.search_tool = WebsiteSearchTool(
-            config=dict(
-                embedder=dict(
-                    provider="huggingface",
-                    config=dict(
-                        model="sentence-transformers/all-MiniLM-L6-v2"
-                    ),
-                ),
-            )
-        )
+        # Configure WebsiteSearchTool with MiniLM embeddings, on torch
+        # (provider "huggingface") or the int8 ONNX runtime (provider "onnx")
+        self.embedder_config = self.crew_inputs.get('embedder') or embedder_config()
+        # Shared by every crew in the process; the search tool is per request
+        self.embedder = get_executor(self.embedder_config)
+        self.search_tool = build_search_tool(self.embedder_config, self.embedder)
         
-        # Initialize agents
+        # Initialize agents from the YAML prompt config
+        self.prompt_variant = get_prompt_variant()
+        # Each agent runs on its routed model: a fast one suits billing,
+        # a stronger one the summary
+        self.billing_model = model_router.choose(agent_route('billing_agent', prompts))
+        self.summarizer_model = model_router.choose(agent_route('web_summarizer_agent', prompts))
+        billing_prompt = agent_prompt('billing_agent', self.prompt_variant)
         self.billing_agent = Agent(
-            role="Billing Manager",
-            goal="Process Stripe Connect payments and ensure successful transactions",
-            backstory="""Expert at processing Stripe Connect payments and verifying transactions.
-            You handle customer payments through Stripe and ensure they are completed
-            before allowing the service to proceed. You ensure the payment is properly
-            routed to the service provider's Stripe Connect account.""",
+            role=billing_prompt['role'],
+            goal=billing_prompt['goal'],
+            backstory=billing_prompt['backstory'],
+            llm=build_llm(self.billing_model),
             verbose=True
         )
 
+        summarizer_prompt = agent_prompt('web_summarizer_agent', self.prompt_variant)
         self.web_summarizer_agent = Agent(
-            role="Web Content Summarizer",
-            goal="Create concise and accurate summaries of web content",
-            backstory="""Expert at analyzing web content and extracting key information.
-            You create clear, concise summaries that capture the three most important
-            points from any webpage. You use the WebsiteSearchTool to extract and
-            understand content, ensuring the summary is valuable to the customer.""",
+            role=summarizer_prompt['role'],
+            goal=summarizer_prompt['goal'],
+            backstory=summarizer_prompt['backstory'],
             tools=[self.search_tool],
+            llm=build_llm(self.summarizer_model),
             verbose=True
         )
 
@@ -85,75 +129,209 @@ class WebSummarizer():
         
         # Payment task
         payment_task = Task(
-            description=f"""
-            Process a Stripe Connect payment of ${self.SUMMARY_PRICE/100:.2f} for web summarization service.
-            The payment should be routed to the service provider's Stripe Connect account: {self.CONNECT_ACCOUNT_ID}
-            
-            Steps:
-            1. Process payment using customer's payment method
-            2. Ensure payment is routed to the Connect account
-            3. Verify payment was successful
-            4. Return payment intent ID
-            """,
-            expected_output="""A confirmed payment intent ID indicating successful payment processing and routing to the Connect account.""",
+            description=task_template('process_payment_task', self.prompt_variant).render(
+                price=f"{self.SUMMARY_PRICE/100:.2f}",
+                connect_account_id=self.CONNECT_ACCOUNT_ID
+            ),
+            expected_output=task_expected_output('process_payment_task', self.prompt_variant),
             agent=self.billing_agent
         )
         tasks.append(payment_task)
         
-        # Updated summarization task for more detailed output
+        # Summarization task with the three-section markdown output
         summary_task = Task(
-            description=f"""
-            Analyze and create a detailed summary of the content from: {url}
-            
-            Create a comprehensive summary with exactly three sections in markdown format:
-            
-            1. Key Points (3-5 bullet points)
-            - List the most important takeaways
-            - Focus on main arguments or findings
-            - Include critical data points or statistics
-            
-            2. Detailed Analysis (2-3 paragraphs)
-            - Provide deeper context and background
-            - Explain relationships between key concepts
-            - Include relevant examples or case studies
-            
-            3. Implications & Conclusions (2-3 bullet points)
-            - Discuss potential impact or consequences
-            - Highlight recommendations if any
-            - Note limitations or areas for further consideration
-            
-            Format the output in proper markdown with headers, bullet points, and paragraphs.
-            Ensure the summary is both comprehensive and easy to read.
-            """,
-            expected_output="""A structured markdown summary with three distinct sections: Key Points, Detailed Analysis, and Implications & Conclusions.""",
+            description=task_template('summarize_webpage_task', self.prompt_variant).render(url=url),
+            expected_output=task_expected_output('summarize_webpage_task', self.prompt_variant),
             agent=self.web_summarizer_agent
         )
         tasks.append(summary_task)
         
         return tasks
 
-    def process_payment(self, customer: Dict) -> str:
-        """Process the Stripe Connect payment."""
+    def kickoff(self, tasks: list[Task]) -> Any:
+        """Run the summarization crew and record its token usage and latency."""
+        crew = Crew(
+            agents=[self.billing_agent, self.web_summarizer_agent],
+            tasks=tasks,
+            process=Process.sequential,
+            verbose=True
+        )
+        prompt = ''.join(
+            [self.billing_agent.backstory, self.web_summarizer_agent.backstory]
+            + [task.description for task in tasks]
+        )
+        # Tasks run in order, so each one's latency runs from the previous task's completion to its own
+        finished: Dict[int, float] = {}
+        for index, task in enumerate(tasks):
+            task.callback = lambda output, index=index: finished.__setitem__(index, time.perf_counter())
+        started = time.perf_counter()
+        result = breaker('llm').call(lambda: limiter('llm').run(crew.kickoff))
+        self.last_usage = usage_tracker.record(
+            'summarize', prompt, result, time.perf_counter() - started, self.prompt_variant,
+            model_name(self.summarizer_model)
+        )
+        models = {id(self.billing_agent): self.billing_model, id(self.web_summarizer_agent): self.summarizer_model}
+        previous = started
+        for index, task in enumerate(tasks):
+            if index not in finished:
+                break
+            # Each agent's model gets its own sample, so either one's budget and fallback can trigger
+            model_router.observe(model_name(models.get(id(task.agent))), (finished[index] - previous) * 1000)
+            previous = finished[index]
+        return result
+
+    def summary_engine(self) -> str:
+        """Return the summarization engine requested in crew_inputs or the environment."""
+        engine = (self.crew_inputs.get('summary_engine') or os.getenv('SUMMARY_ENGINE', 'agent')).strip().lower()
+        if engine not in self.SUMMARY_ENGINES:
+            raise ValueError(f"summary_engine must be one of {self.SUMMARY_ENGINES}")
+        return engine
+
+    def summary_estimate(self, engine: str) -> float:
+        """Expected seconds for a summary with the engine, from its models' recent latency."""
+        if engine == 'extractive':
+            return EXTRACTIVE_ESTIMATE_S
+        expected_ms = model_router.expected_latency(model_name(self.summarizer_model))
+        if not expected_ms:
+            return DEFAULT_SUMMARY_ESTIMATE_S
+        if engine == 'map_reduce':
+            # A map round and at least one reduce call
+            return expected_ms / 1000 * 2
+        # The agent crew runs the billing task, on the billing model, before the summary
+        billing_ms = model_router.expected_latency(model_name(self.billing_model)) or 0
+        return (expected_ms + billing_ms) / 1000
+
+    def summary_price(self, engine: str) -> int:
+        """Price in cents for a summary made with the given engine."""
+        return self.FAST_SUMMARY_PRICE if engine == 'extractive' else self.SUMMARY_PRICE
+
+    def prepare_search_tool(self, url: str) -> None:
+        """Load the page's main content into the search tool before the agent runs.
+
+        Navigation, cookie banners, footers and scripts are stripped first, so
+        they are never chunked or embedded. Pages come through the conditional-GET
+        cache, and a page already indexed unchanged is not chunked again. The tool is then pinned to this
+        content: it searches only chunks stored under the page's canonical URL and current content
+        hash, and the agent cannot point it at the raw page. A changed page's old chunks are
+        deleted before the new ones are added.
+        """
+        if os.getenv('CONTENT_EXTRACTION', '1').strip().lower() in ('0', 'false', 'no'):
+            return
+        from crewai_tools.tools.website_search.website_search_tool import FixedWebsiteSearchToolSchema
+        from embedchain.models.data_type import DataType
+
+        page = fetch_page(url)
+        self.last_extraction = page.extraction
+        cache = get_page_cache()
+        if cache.is_indexed(page.canonical_url, page.fetch.content_hash):
+            logger.info(f"Page unchanged since it was indexed, skipping chunking: {page.canonical_url}")
+        else:
+            # Chunks of an earlier version of the page would be mixed into retrievals
+            try:
+                self.search_tool.adapter.remove_page(page.canonical_url)
+            except Exception as e:
+                logger.warning(f"Could not delete old chunks of {page.canonical_url}: {str(e)}")
+            self.search_tool.adapter.add(
+                page.text, data_type=DataType.TEXT,
+                metadata={'url': page.canonical_url, 'content_hash': page.fetch.content_hash},
+            )
+            cache.mark_indexed(page.canonical_url, page.fetch.content_hash)
+        # The vector store holds other pages and older versions of this one;
+        # retrieve only the current version's chunks
+        self.search_tool.adapter.url = page.canonical_url
+        self.search_tool.adapter.content_hash = page.fetch.content_hash
+        self.search_tool.args_schema = FixedWebsiteSearchToolSchema
+        self.search_tool.description = f"A tool that can be used to semantic search a query the {url} website content."
+        self.search_tool._generate_description()
+
+    def summarize(self, url: str, engine: str, deadline: Optional[Deadline] = None) -> tuple[str, Dict]:
+        """Summarize the page with the chosen engine and return the summary and its usage."""
+        deadline = deadline or Deadline()
+        timeout = deadline.timeout(LLM_TIMEOUT_S) if deadline.bounded and engine != 'extractive' else None
+        if engine == 'extractive':
+            summarizer = ExtractiveSummarizer(self.embedder)
+            summary = summarizer.summarize(url)
+            return summary, summarizer.stats.to_dict()
+
+        if engine == 'map_reduce':
+            config = self.map_reduce_config or MapReduceConfig.from_inputs(self.crew_inputs)
+            config.prompt_variant = self.prompt_variant
+            config.timeout = timeout
+            summarizer = MapReduceSummarizer(config)
+            summary = summarizer.summarize(url, deadline=deadline)
+            return summary, summarizer.stats.to_dict()
+
+        if timeout:
+            self.billing_agent.llm = build_llm(self.billing_model, timeout)
+            self.web_summarizer_agent.llm = build_llm(self.summarizer_model, timeout)
+        self.prepare_search_tool(url)
+        result = self.kickoff(self.create_tasks(url))
+        usage = self.last_usage.to_dict()
+        if self.last_extraction is not None:
+            usage['extraction'] = self.last_extraction.to_dict()
+        return str(result), usage
+
+    def configure_stripe_timeout(self, deadline: Deadline) -> None:
+        """Cap each of this crew's Stripe API calls by the time left.
+
+        An injected client keeps the timeout it was built with.
+        """
+        if deadline.bounded and self.owns_client:
+            self.stripe = build_stripe_client(self.api_key, deadline.timeout(STRIPE_TIMEOUT_S))
+
+    def refund_difference(self, payment_intent_id: str, charged: int, engine: str) -> int:
+        """Refund what was charged above the price of the engine actually used; returns the cents refunded."""
+        amount = charged - self.summary_price(engine)
+        if amount <= 0:
+            return 0
         try:
-            # Create a payment intent with transfer data
-            payment_intent = stripe.PaymentIntent.create(
-                amount=self.SUMMARY_PRICE,
-                currency="usd",
-                customer=customer['id'],
-                payment_method=customer['payment_method_id'],
-                off_session=True,
-                confirm=True,
-                transfer_data={
+            limiter('stripe_write').run(lambda: self.stripe.refunds.create(params={
+                'payment_intent': payment_intent_id,
+                'amount': amount,
+                # The charge went to the connected account; take the refund back from it in proportion
+                'reverse_transfer': True,
+                'metadata': {'service': 'web_summarizer', 'reason': f"downgraded to {engine}"},
+            }, options={'idempotency_key': f"{payment_intent_id}-downgrade"}))
+        except stripe.error.StripeError as e:
+            logger.error(f"Refund of {amount}c on {payment_intent_id} failed: {str(e)}")
+            return 0
+        logger.info(f"Refunded {amount}c on {payment_intent_id} after downgrading to {engine}")
+        return amount
+
+    def process_payment(self, customer: Dict, amount: Optional[int] = None) -> str:
+        """Process the Stripe Connect payment, for SUMMARY_PRICE unless another amount is given.
+
+        In async payment mode a payment still processing is accepted; webhooks
+        settle it in the payment state store.
+        """
+        amount = amount or self.SUMMARY_PRICE
+        mode = payment_mode(self.crew_inputs.get('payment_mode'))
+        try:
+            # Create a payment intent with transfer data; the idempotency key
+            # lets a rate-limited attempt be retried without charging twice
+            idempotency_key = str(uuid.uuid4())
+            payment_intent = limiter('stripe_write').run(lambda: self.stripe.payment_intents.create(params={
+                'amount': amount,
+                'currency': "usd",
+                'customer': customer['id'],
+                'payment_method': customer['payment_method_id'],
+                'off_session': True,
+                'confirm': True,
+                'transfer_data': {
                     'destination': self.CONNECT_ACCOUNT_ID,
                 },
-                metadata={
+                'metadata': {
                     'service': 'web_summarizer',
-                    'price': '$5.00',
+                    'price': f"${amount/100:.2f}",
                     'customer_email': customer.get('email', ''),
                     'connect_account': self.CONNECT_ACCOUNT_ID
                 }
-            )
+            }, options={'idempotency_key': idempotency_key}))
             
+            if mode == 'async':
+                get_payment_store().record_intent(payment_intent)
+                if payment_intent.status in ('succeeded', 'processing'):
+                    return payment_intent.id
             if payment_intent.status != 'succeeded':
                 raise Exception(f"Payment failed: {payment_intent.last_payment_error}")
                 
@@ -175,15 +353,7 @@ class WebSummarizer():
             tasks = self.create_tasks(url)
             
             # Create and run the crew
-            crew = Crew(
-                agents=[self.billing_agent, self.web_summarizer_agent],
-                tasks=tasks,
-                process=Process.sequential,
-                verbose=True
-            )
-            
-            # Execute the tasks
-            result = crew.kickoff()
+            result = self.kickoff(tasks)
             
             return {
                 'success': True,
@@ -204,36 +374,94 @@ class WebSummarizer():
                 'details': str(e)
             }
 
-    def run(self) -> Dict:
-        """Run the crew with the provided inputs."""
+    def run(self, deadline: Optional[Deadline] = None) -> Dict:
+        """Run the crew with the provided inputs.
+
+        With a deadline, an LLM engine that cannot finish in time is swapped
+        for the extractive fast tier (and its price) before charging, and a
+        request that cannot finish at all is refused with status_code 503.
+        The same swap happens while the LLM circuit breaker is open. If the
+        LLM times out or its circuit opens after the charge, the extractive
+        summary is returned and the price difference refunded.
+        """
+        deadline = deadline or Deadline()
         url = self.crew_inputs.get('url')
         customer = self.crew_inputs.get('customer', {})
         
         if not url:
             raise ValueError("URL is required in crew_inputs")
+        # The URL is fetched as given; its canonical form is only the cache and store key (fetch.py)
+        engine = self.summary_engine()
+        if engine == 'map_reduce':
+            # Settings that cannot work are refused before anything is charged
+            try:
+                self.map_reduce_config = MapReduceConfig.from_inputs(self.crew_inputs)
+            except ValueError as e:
+                return {
+                    'success': False,
+                    'error': 'Invalid map_reduce settings',
+                    'details': str(e),
+                    'status_code': 400
+                }
+        
+        # Reject dead links, non-HTML and oversized pages before charging anything
+        if os.getenv('PREFLIGHT', '1').strip().lower() not in ('0', 'false', 'no'):
+            try:
+                url = preflight(url).final_url
+            except PreflightError as e:
+                logger.warning(f"Preflight rejected {url}: {str(e)}")
+                return {
+                    'success': False,
+                    'error': 'URL cannot be summarized',
+                    'details': str(e),
+                    'status_code': e.status_code
+                }
+        
+        # Budget the remaining time before charging anything
+        degraded = False
+        if engine != 'extractive' and not deadline.has(PAYMENT_STAGE_S + self.summary_estimate(engine)):
+            logger.warning(f"{deadline.remaining():.1f}s left is too little for the {engine} engine, using extractive")
+            engine, degraded = 'extractive', True
+        if engine != 'extractive' and breaker('llm').is_open():
+            logger.warning(f"LLM circuit is open, using extractive: {breaker('llm').stats()}")
+            engine, degraded = 'extractive', True
+        if not deadline.has(PAYMENT_STAGE_S + EXTRACTIVE_ESTIMATE_S):
+            return {
+                'success': False,
+                'error': 'Not enough time left to summarize',
+                'details': f"{deadline.remaining():.1f}s remaining",
+                'status_code': 503
+            }
         
         try:
             # Process payment first
             logger.info("Processing Stripe Connect payment...")
-            payment_intent_id = self.process_payment(customer)
+            self.configure_stripe_timeout(deadline)
+            charged = self.summary_price(engine)
+            refunded = 0
+            payment_intent_id = self.process_payment(customer, charged)
             logger.info(f"Payment successful: {payment_intent_id}")
             
-            # Create tasks
-            tasks = self.create_tasks(url)
-            
-            # Create and run the crew
-            crew = Crew(
-                agents=[self.billing_agent, self.web_summarizer_agent],
-                tasks=tasks,
-                process=Process.sequential,
-                verbose=True
-            )
+            # Summarize with the selected engine, then format the output
+            logger.info(f"Summarizing {url} with the {engine} engine")
+            try:
+                summary, usage = self.summarize(url, engine, deadline)
+            except Exception as e:
+                # The customer has paid: if the LLM ran out of time or its
+                # circuit opened, a fast extractive summary is better than an error
+                timed_out = isinstance(e, (DeadlineExceeded, CircuitOpenError)) \
+                    or 'timeout' in type(e).__name__.lower() or 'timed out' in str(e).lower()
+                if engine == 'extractive' or not timed_out or not deadline.has(EXTRACTIVE_ESTIMATE_S):
+                    raise
+                logger.warning(f"{engine} engine unavailable ({str(e)}), falling back to extractive")
+                summary, usage = self.summarize(url, 'extractive', deadline)
+                degraded = True
+                # Billed at the price of the engine that made the summary
+                refunded = self.refund_difference(payment_intent_id, charged, 'extractive')
             
-            # Execute the tasks and format the output
-            result = crew.kickoff()
+            logger.info(f"Rate limiter queue wait and throttling: {rate_limit_summary()}")
             
             # Format the summary if it's successful
-            summary = str(result)
             if not summary.startswith('#'):
                 # If the output isn't already in markdown format, structure it
                 summary = f"""
@@ -253,7 +481,11 @@ Analysis not available for this content.
             return {
                 'success': True,
                 'summary': summary,
-                'payment_intent': payment_intent_id
+                'payment_intent': payment_intent_id,
+                'usage': usage,
+                'engine': engine if not degraded else 'extractive',
+                'degraded': degraded,
+                'refunded': refunded
             }
             
         except stripe.error.StripeError as e:
@@ -0,0 +1,137 @@
+"""Content-addressed cache of chunk embeddings shared across pages.
+
+Vectors are stored as float16 rows in a memory-mapped file, one slot per
+chunk. A SQLite index maps hash(normalized chunk text, model id) to its slot
+and records when it was last used. Once the file is full, the least recently
+used slots are reused.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR', '/tmp/embedding_cache')
+DEFAULT_CAPACITY = int(os.getenv('EMBEDDING_CACHE_CAPACITY', '50000'))
+
+
+def normalize_chunk(text: str) -> str:
+    """Normalize chunk text so trivially different copies share one key."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def chunk_key(text: str, model_id: str) -> bytes:
+    """Content address of a chunk embedding: hash of (normalized text, model id)."""
+    return hashlib.sha256(f"{model_id}\0{normalize_chunk(text)}".encode('utf-8')).digest()[:16]
+
+
+class EmbeddingCache:
+    """Bounded float16 embedding store keyed by chunk content."""
+
+    def __init__(self, model_id: str, dimension: int, path: str = DEFAULT_CACHE_DIR,
+                 capacity: int = DEFAULT_CAPACITY):
+        self.model_id = model_id
+        self.dimension = dimension
+        self.capacity = capacity
+        self.directory = os.path.join(path, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_id))
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        vectors_path = os.path.join(self.directory, f'vectors-{dimension}.f16')
+        mode = 'r+' if os.path.exists(vectors_path) else 'w+'
+        self._vectors = np.memmap(vectors_path, dtype=np.float16, mode=mode, shape=(capacity, dimension))
+        self._db = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, slot INTEGER UNIQUE, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        # Drop entries that point past the end of the file if capacity shrank
+        self._db.execute("DELETE FROM entries WHERE slot >= ?", (capacity,))
+        self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get_many(self, texts: Sequence[str]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """Return cached vectors by position and the positions that missed."""
+        keys = [chunk_key(text, self.model_id) for text in texts]
+        found: Dict[int, np.ndarray] = {}
+        with self._lock:
+            slots = self._lookup(keys)
+            for i, key in enumerate(keys):
+                slot = slots.get(key)
+                if slot is not None:
+                    found[i] = np.asarray(self._vectors[slot], dtype=np.float32)
+            if slots:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in slots]
+                )
+                self._db.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found, [i for i in range(len(texts)) if i not in found]
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        """Store vectors for the given chunks, evicting least recently used slots if full."""
+        entries = {chunk_key(text, self.model_id): vector for text, vector in zip(texts, vectors)}
+        with self._lock:
+            existing = self._lookup(list(entries))
+            new_keys = [key for key in entries if key not in existing][:self.capacity]
+            if not new_keys:
+                return
+            slots = self._free_slots(len(new_keys))
+            now = time.time()
+            for key, slot in zip(new_keys, slots):
+                self._vectors[slot] = entries[key].astype(np.float16)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                [(key, slot, now) for key, slot in zip(new_keys, slots)],
+            )
+            self._db.commit()
+            self._vectors.flush()
+
+    def _lookup(self, keys: List[bytes]) -> Dict[bytes, int]:
+        slots: Dict[bytes, int] = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            slots.update(self._db.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return slots
+
+    def _free_slots(self, count: int) -> List[int]:
+        # Slots are handed out densely from 0 and evicted slots are reused,
+        # so everything past the highest used slot is free.
+        (next_slot,) = self._db.execute("SELECT COALESCE(MAX(slot) + 1, 0) FROM entries").fetchone()
+        free = list(range(next_slot, min(next_slot + count, self.capacity)))
+        if len(free) < count:
+            evicted = self._db.execute(
+                "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (count - len(free),)
+            ).fetchall()
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+            free.extend(slot for _, slot in evicted)
+            logger.info(f"Embedding cache evicted {len(evicted)} least recently used chunks")
+        return free
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
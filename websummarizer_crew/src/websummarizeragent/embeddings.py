@@ -0,0 +1,333 @@
+"""Embedding backends for the MiniLM sentence embedder.
+
+Two interchangeable backends produce the same normalized 384-d vectors:
+
+* ``huggingface`` runs sentence-transformers on torch (the default).
+* ``onnx`` runs an exported, int8-quantized ONNX copy of the same model
+  through onnxruntime and the ``tokenizers`` library, with no torch import.
+
+The backend is picked from the embedder config passed to ``WebsiteSearchTool``,
+e.g. ``{"provider": "onnx", "config": {"model": "...", "path": "models/..."}}``.
+Either way, chunks are embedded through ``EmbeddingExecutor``, which sorts
+them by length into CPU-sized batches and pins the backend's thread count,
+and which skips chunks already in the ``EmbeddingCache``.
+"""
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .embedding_cache import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_ONNX_PATH = os.getenv("ONNX_MODEL_DIR", "models/all-MiniLM-L6-v2-int8")
+EMBEDDER_PROVIDERS = ('huggingface', 'onnx')
+MAX_SEQ_LENGTH = 256
+DEFAULT_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', '32'))
+
+
+def available_cpus() -> int:
+    """CPUs this process may actually use, honoring affinity and cgroup quotas."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def embed_threads() -> int:
+    """Intra-op thread count for embedding, from EMBED_THREADS or the available CPUs."""
+    return int(os.getenv('EMBED_THREADS') or available_cpus())
+
+
+def embedder_config(provider: Optional[str] = None, model: Optional[str] = None) -> Dict[str, Any]:
+    """Return the embedder config, defaulting to EMBEDDER_PROVIDER and EMBEDDER_MODEL."""
+    provider = (provider or os.getenv('EMBEDDER_PROVIDER', 'huggingface')).strip().lower()
+    if provider not in EMBEDDER_PROVIDERS:
+        raise ValueError(f"Embedder provider must be one of {EMBEDDER_PROVIDERS}, got '{provider}'")
+    config: Dict[str, Any] = {'model': model or os.getenv('EMBEDDER_MODEL', DEFAULT_MODEL)}
+    if provider == 'onnx':
+        config['path'] = DEFAULT_ONNX_PATH
+    return {'provider': provider, 'config': config}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+class TorchEmbedder:
+    """sentence-transformers backend running on torch."""
+
+    backend = 'huggingface'
+
+    def __init__(self, model: str = DEFAULT_MODEL, num_threads: Optional[int] = None):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.model_id = model
+        self._model = SentenceTransformer(model, device='cpu')
+        self.dimension = self._model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        vectors = self._model.encode(
+            list(texts), batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0].tolist()
+
+
+class OnnxEmbedder:
+    """int8-quantized ONNX backend: tokenizers + onnxruntime + mean pooling."""
+
+    backend = 'onnx'
+
+    def __init__(self, path: str = DEFAULT_ONNX_PATH, model: str = DEFAULT_MODEL, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_file = os.path.join(path, 'model_quantized.onnx')
+        if not os.path.exists(model_file):
+            model_file = os.path.join(path, 'model.onnx')
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(
+                f"No ONNX model in {path}; export one with "
+                f"'python -m websummarizeragent.embeddings export --output {path}'"
+            )
+        self.model_id = model
+        self.path = path
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(path, 'tokenizer.json'))
+        self._tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self._tokenizer.enable_padding(pad_id=0, pad_token='[PAD]')
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self._session = ort.InferenceSession(model_file, options, providers=['CPUExecutionProvider'])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self.dimension = self._session.get_outputs()[0].shape[-1] or 384
+
+    def embed(self, texts: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        out = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self._tokenizer.encode_batch(list(texts[start:start + batch_size]))
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+            if 'token_type_ids' in self._input_names:
+                feeds['token_type_ids'] = np.zeros_like(input_ids)
+            token_embeddings = self._session.run(None, feeds)[0]
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            out.append(_normalize(pooled.astype(np.float32)))
+        if not out:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.vstack(out)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0].tolist()
+
+
+def build_embedder(config: Optional[Dict[str, Any]] = None):
+    """Create the embedder described by an embedder config."""
+    config = config or embedder_config()
+    options = config.get('config', {})
+    num_threads = options.get('num_threads') or embed_threads()
+    if config.get('provider') == 'onnx':
+        return OnnxEmbedder(
+            path=options.get('path', DEFAULT_ONNX_PATH),
+            model=options.get('model', DEFAULT_MODEL),
+            num_threads=num_threads,
+        )
+    return TorchEmbedder(options.get('model', DEFAULT_MODEL), num_threads=num_threads)
+
+
+class EmbeddingExecutor:
+    """Embed many chunks in length-bucketed batches with one forward pass per batch.
+
+    Sorting by length before batching keeps similarly sized chunks together,
+    so each batch pads only to its own longest member. With a cache, only
+    chunks never seen before (on any page) reach the model.
+    """
+
+    def __init__(self, embedder, batch_size: Optional[int] = None, cache: Optional[EmbeddingCache] = None):
+        self.embedder = embedder
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.model_id = embedder.model_id
+        self.dimension = embedder.dimension
+        self.cache = cache
+
+    def embed(self, texts: Sequence[str], batch_size: Optional[int] = None) -> np.ndarray:
+        batch_size = batch_size or self.batch_size
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        result = np.empty((len(texts), self.dimension), dtype=np.float32)
+        pending = list(range(len(texts)))
+        if self.cache is not None:
+            cached, pending = self.cache.get_many(texts)
+            for i, vector in cached.items():
+                result[i] = vector
+            if cached:
+                logger.info(f"Embedding cache: {len(cached)} of {len(texts)} chunks reused")
+
+        order = sorted(pending, key=lambda i: len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            batch = [texts[i] for i in indices]
+            result[indices] = self.embedder.embed(batch, batch_size=len(batch))
+        if self.cache is not None and order:
+            self.cache.put_many([texts[i] for i in order], result[order])
+        return result
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedder.embed([text])[0].tolist()
+
+
+def build_executor(config: Optional[Dict[str, Any]] = None) -> EmbeddingExecutor:
+    """Create the configured embedder wrapped in an EmbeddingExecutor."""
+    config = config or embedder_config()
+    embedder = build_embedder(config)
+    cache = None
+    if os.getenv('EMBEDDING_CACHE', '1').strip().lower() not in ('0', 'false', 'no'):
+        cache = EmbeddingCache(embedder.model_id, embedder.dimension)
+    return EmbeddingExecutor(embedder, config.get('config', {}).get('batch_size'), cache)
+
+
+_executors: Dict[str, EmbeddingExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(config: Optional[Dict[str, Any]] = None) -> EmbeddingExecutor:
+    """Return the process-wide executor for an embedder config, building it on first use.
+
+    The model then loads once per process, not once per WebSummarizer, and is
+    shared by every request a warm container or server worker handles.
+    """
+    config = config or embedder_config()
+    key = json.dumps(config, sort_keys=True, default=str)
+    with _executors_lock:
+        executor = _executors.get(key)
+        if executor is None:
+            executor = _executors[key] = build_executor(config)
+    return executor
+
+
+@lru_cache(maxsize=None)
+def page_search_adapter():
+    """EmbedchainAdapter subclass whose searches can be restricted to one page."""
+    from crewai_tools.adapters.embedchain_adapter import EmbedchainAdapter
+
+    class PageSearchAdapter(EmbedchainAdapter):
+        # Once set, only chunks added with this metadata url (and content hash) are retrieved
+        url: Optional[str] = None
+        content_hash: Optional[str] = None
+
+        def remove_page(self, url: str) -> None:
+            """Delete every chunk stored for ``url``, whichever version of the page it came from."""
+            self.embedchain_app.db.delete(where={'url': url})
+
+        def query(self, question: str) -> str:
+            where = None
+            if self.url:
+                where = {'url': self.url}
+                if self.content_hash:
+                    where['content_hash'] = self.content_hash
+            result, sources = self.embedchain_app.query(
+                question, citations=True, dry_run=(not self.summarize), where=where
+            )
+            if self.summarize:
+                return result
+            return "\n\n".join(source[0] for source in sources)
+
+    return PageSearchAdapter
+
+
+def build_search_tool(config: Optional[Dict[str, Any]] = None, embedder: Optional[EmbeddingExecutor] = None):
+    """Create the WebsiteSearchTool backed by the configured (or given) embedder.
+
+    The embedchain app is assembled around our EmbeddingExecutor, so chunks
+    are embedded in tuned batches and, for onnx, embedchain never loads its
+    torch-based HuggingFace embedder.
+    """
+    from crewai_tools import WebsiteSearchTool
+    from embedchain import App
+    from embedchain.config import BaseEmbedderConfig
+    from embedchain.embedder.base import BaseEmbedder
+
+    embedder = embedder or build_executor(config)
+    embedding_model = BaseEmbedder(config=BaseEmbedderConfig(model=embedder.model_id))
+    embedding_model.set_embedding_fn(BaseEmbedder._langchain_default_concept(embedder))
+    embedding_model.set_vector_dimension(embedder.dimension)
+    return WebsiteSearchTool(adapter=page_search_adapter()(embedchain_app=App(embedding_model=embedding_model)))
+
+
+def parity_check(texts: Sequence[str], reference, candidate) -> Dict[str, float]:
+    """Cosine similarity between two backends' embeddings of the same texts."""
+    a = reference.embed(texts)
+    b = candidate.embed(texts)
+    cosine = np.sum(_normalize(a) * _normalize(b), axis=1)
+    return {
+        'texts': len(texts),
+        'min_cosine': round(float(cosine.min()), 5),
+        'mean_cosine': round(float(cosine.mean()), 5),
+    }
+
+
+def export_onnx(output: str, model: str = DEFAULT_MODEL) -> str:
+    """Export the model to ONNX and quantize it to int8 (needs optimum[onnxruntime])."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    ort_model = ORTModelForFeatureExtraction.from_pretrained(model, export=True)
+    ort_model.save_pretrained(output)
+    AutoTokenizer.from_pretrained(model).save_pretrained(output)
+    quantizer = ORTQuantizer.from_pretrained(output)
+    quantizer.quantize(
+        save_dir=output,
+        quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False),
+    )
+    logger.info(f"Exported int8 ONNX model for {model} to {output}")
+    return output
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Embedding backend utilities")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help="Export an int8-quantized ONNX model")
+    export.add_argument('--model', default=DEFAULT_MODEL)
+    export.add_argument('--output', default=DEFAULT_ONNX_PATH)
+    args = parser.parse_args()
+    export_onnx(args.output, args.model)
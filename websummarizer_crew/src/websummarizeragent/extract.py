@@ -0,0 +1,150 @@
+"""Readability-style main-content extraction that runs before chunking."""
+import logging
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from crew_common.metrics import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Elements that never carry article content.
+BOILERPLATE_TAGS = [
+    'script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe',
+    'nav', 'header', 'footer', 'aside', 'form', 'button', 'select', 'dialog',
+]
+BOILERPLATE_ROLES = {'navigation', 'banner', 'contentinfo', 'complementary', 'dialog', 'alertdialog', 'search'}
+NEGATIVE_PATTERN = re.compile(
+    r'cookie|consent|gdpr|banner|nav|menu|footer|masthead|sidebar|breadcrumb|share|social|'
+    r'subscribe|newsletter|signup|advert|sponsor|promo|related|recommend|comment|popup|modal|skip',
+    re.I,
+)
+POSITIVE_PATTERN = re.compile(r'article|content|main|post|entry|story|body|text|blog', re.I)
+
+# A candidate must keep at least this much of the page text, or we fall back.
+MIN_CONTENT_CHARS = 250
+MIN_CONTENT_RATIO = 0.15
+
+
+@dataclass
+class ExtractionStats:
+    """How much text the extraction stage removed from a page."""
+    html_bytes: int = 0
+    text_bytes: int = 0
+    content_bytes: int = 0
+    text_tokens: int = 0
+    content_tokens: int = 0
+    method: str = 'none'
+
+    @property
+    def bytes_removed(self) -> int:
+        return self.text_bytes - self.content_bytes
+
+    @property
+    def tokens_removed(self) -> int:
+        return self.text_tokens - self.content_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats.update(bytes_removed=self.bytes_removed, tokens_removed=self.tokens_removed)
+        return stats
+
+
+def _text_of(node: Any) -> str:
+    text = node.get_text('\n', strip=True)
+    return re.sub(r'\n{3,}', '\n\n', text)
+
+
+def _class_and_id(node: Any) -> str:
+    classes = node.get('class') or []
+    if isinstance(classes, str):
+        classes = [classes]
+    return ' '.join(classes) + ' ' + (node.get('id') or '')
+
+
+def _is_boilerplate(node: Any) -> bool:
+    if node.get('role') in BOILERPLATE_ROLES or node.get('aria-hidden') == 'true' or node.has_attr('hidden'):
+        return True
+    if node.name in ('html', 'body', 'main', 'article'):
+        return False
+    names = _class_and_id(node)
+    return bool(NEGATIVE_PATTERN.search(names)) and not POSITIVE_PATTERN.search(names)
+
+
+def _link_density(node: Any, text_len: int) -> float:
+    if not text_len:
+        return 1.0
+    link_len = sum(len(a.get_text(strip=True)) for a in node.find_all('a'))
+    return min(1.0, link_len / text_len)
+
+
+def _best_candidate(body: Any) -> Optional[Any]:
+    """Score paragraph containers the way readability does and return the best one."""
+    scores: Dict[int, Tuple[Any, float]] = {}
+    for paragraph in body.find_all(['p', 'pre', 'td', 'li']):
+        text = paragraph.get_text(' ', strip=True)
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+        parent = paragraph.parent
+        grandparent = parent.parent if parent is not None else None
+        for node, share in ((parent, 1.0), (grandparent, 0.5)):
+            if node is None or node.name is None:
+                continue
+            base = scores.get(id(node), (node, 0.0))[1]
+            if not base and POSITIVE_PATTERN.search(_class_and_id(node)):
+                base += 25
+            scores[id(node)] = (node, base + score * share)
+
+    best, best_score = None, 0.0
+    for node, score in scores.values():
+        adjusted = score * (1 - _link_density(node, len(node.get_text(strip=True))))
+        if adjusted > best_score:
+            best, best_score = node, adjusted
+    return best
+
+
+def extract_main_content(html: str) -> Tuple[str, ExtractionStats]:
+    """Return the main text of an HTML page and the size of what was stripped."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    full_text = _text_of(soup)
+    stats = ExtractionStats(
+        html_bytes=len(html.encode('utf-8')),
+        text_bytes=len(full_text.encode('utf-8')),
+        text_tokens=estimate_tokens(full_text),
+    )
+
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    for node in soup.find_all(True):
+        if not node.decomposed and _is_boilerplate(node):
+            node.decompose()
+
+    body = soup.body or soup
+    minimum = max(MIN_CONTENT_CHARS, int(len(full_text) * MIN_CONTENT_RATIO))
+    content, method = '', 'none'
+    semantic = body.find('article') or body.find('main') or body.find(attrs={'role': 'main'})
+    if semantic is not None:
+        content, method = _text_of(semantic), 'semantic'
+    if len(content) < minimum:
+        candidate = _best_candidate(body)
+        if candidate is not None:
+            content, method = _text_of(candidate), 'scored'
+    if len(content) < minimum:
+        content, method = _text_of(body), 'stripped'
+    if len(content) < MIN_CONTENT_CHARS and len(full_text) > len(content):
+        content, method = full_text, 'fallback'
+
+    stats.content_bytes = len(content.encode('utf-8'))
+    stats.content_tokens = estimate_tokens(content)
+    stats.method = method
+    logger.info(
+        f"Extracted main content ({method}): {stats.content_bytes}/{stats.text_bytes} bytes kept, "
+        f"{stats.bytes_removed} bytes and ~{stats.tokens_removed} tokens removed"
+    )
+    return content, stats
+
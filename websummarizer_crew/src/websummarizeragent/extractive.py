@@ -0,0 +1,163 @@
+"""Extractive fast-tier summarizer: ranks page sentences with MiniLM embeddings, no LLM call.
+
+Each sentence is scored by combining TextRank centrality over the cosine
+similarity graph with its similarity to the page centroid. The best sentences
+fill the same three markdown sections that the LLM engines produce.
+"""
+import logging
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .fetch import fetch_text
+
+logger = logging.getLogger(__name__)
+
+MIN_SENTENCE_CHARS = 40
+MAX_SENTENCE_CHARS = 600
+# TextRank is quadratic in the number of sentences
+MAX_SENTENCES = 400
+REDUNDANCY_THRESHOLD = 0.85
+CONCLUSION_CUES = re.compile(
+    r'\b(should|must|will|could|recommend\w*|conclu\w*|implication\w*|impact\w*|therefore|'
+    r'consequen\w*|suggest\w*|future|risk\w*|limitation\w*)\b',
+    re.IGNORECASE,
+)
+_SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+(?=[A-Z0-9"\'(\[])')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into unique sentences of a summarizable length."""
+    sentences: List[str] = []
+    seen = set()
+    for block in re.split(r'\n\s*\n|\n(?=[-*•] )', text):
+        block = ' '.join(block.split())
+        for sentence in _SENTENCE_END.split(block):
+            sentence = sentence.strip(' -*•')
+            key = sentence.lower()
+            if MIN_SENTENCE_CHARS <= len(sentence) <= MAX_SENTENCE_CHARS and key not in seen:
+                seen.add(key)
+                sentences.append(sentence)
+    return sentences
+
+
+def rank_sentences(vectors: np.ndarray, damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+    """Score sentences by TextRank centrality blended with similarity to the centroid."""
+    count = len(vectors)
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    similarity = np.clip(vectors @ vectors.T, 0.0, None)
+    np.fill_diagonal(similarity, 0.0)
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, row_sums, out=np.full_like(similarity, 1.0 / count), where=row_sums > 0)
+
+    rank = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / count + damping * (transition.T @ rank)
+        if np.abs(updated - rank).sum() < 1e-6:
+            rank = updated
+            break
+        rank = updated
+
+    centroid = vectors.mean(axis=0)
+    centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
+    centrality = vectors @ centroid
+
+    def scale(values: np.ndarray) -> np.ndarray:
+        spread = values.max() - values.min()
+        return (values - values.min()) / spread if spread > 0 else np.ones_like(values)
+
+    return 0.5 * scale(rank) + 0.5 * scale(centrality)
+
+
+@dataclass
+class ExtractiveStats:
+    """Timing and size figures for one extractive run."""
+    text_chars: int = 0
+    bytes_removed: int = 0
+    tokens_removed: int = 0
+    sentences: int = 0
+    llm_calls: int = 0
+    embed_ms: float = 0.0
+    rank_ms: float = 0.0
+    total_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ExtractiveSummarizer:
+    """Pick the most central sentences of a page and lay them out as the three summary sections."""
+
+    def __init__(self, embedder, key_points: int = 5, analysis_sentences: int = 6, conclusions: int = 3):
+        self.embedder = embedder
+        self.key_points = key_points
+        self.analysis_sentences = analysis_sentences
+        self.conclusions = conclusions
+        self.stats = ExtractiveStats()
+
+    def _select(self, candidates: Sequence[int], scores: np.ndarray, vectors: np.ndarray,
+                limit: int, taken: List[int]) -> List[int]:
+        chosen: List[int] = []
+        for i in sorted(candidates, key=lambda i: -scores[i]):
+            if len(chosen) >= limit:
+                break
+            if i in taken:
+                continue
+            picked = taken + chosen
+            if picked and float(np.max(vectors[picked] @ vectors[i])) > REDUNDANCY_THRESHOLD:
+                continue
+            chosen.append(i)
+        return chosen
+
+    def summarize(self, url: str, text: Optional[str] = None) -> str:
+        """Summarize a page, fetching it first when no text is given."""
+        started = time.perf_counter()
+        if text is None:
+            text, extraction = fetch_text(url)
+            self.stats.bytes_removed = extraction.bytes_removed
+            self.stats.tokens_removed = extraction.tokens_removed
+        sentences = split_sentences(text)[:MAX_SENTENCES]
+        if not sentences:
+            raise ValueError(f"No text content found at {url}")
+        self.stats.text_chars = len(text)
+        self.stats.sentences = len(sentences)
+
+        embed_started = time.perf_counter()
+        vectors = np.asarray(self.embedder.embed(sentences), dtype=np.float32)
+        self.stats.embed_ms = round((time.perf_counter() - embed_started) * 1000, 1)
+
+        rank_started = time.perf_counter()
+        scores = rank_sentences(vectors)
+        everything = range(len(sentences))
+        key_points = self._select(everything, scores, vectors, self.key_points, [])
+        # Conclusions come from cue sentences, preferring the last third of the page
+        tail = len(sentences) * 2 // 3
+        cues = [i for i in everything if CONCLUSION_CUES.search(sentences[i])]
+        late_cues = [i for i in cues if i >= tail]
+        conclusions = self._select(late_cues, scores, vectors, self.conclusions, key_points)
+        if len(conclusions) < self.conclusions:
+            conclusions += self._select(cues, scores, vectors, self.conclusions - len(conclusions),
+                                        key_points + conclusions)
+        analysis = self._select(everything, scores, vectors, self.analysis_sentences, key_points + conclusions)
+        self.stats.rank_ms = round((time.perf_counter() - rank_started) * 1000, 1)
+
+        summary = self.render(sentences, sorted(key_points), sorted(analysis), sorted(conclusions))
+        self.stats.total_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Extractive summary: {self.stats.to_dict()}")
+        return summary
+
+    @staticmethod
+    def render(sentences: List[str], key_points: List[int], analysis: List[int], conclusions: List[int]) -> str:
+        half = (len(analysis) + 1) // 2
+        paragraphs = [' '.join(sentences[i] for i in part) for part in (analysis[:half], analysis[half:]) if part]
+        lines = ["# Web Page Summary", "", "## Key Points"]
+        lines += [f"* {sentences[i]}" for i in key_points]
+        lines += ["", "## Detailed Analysis"]
+        lines += [p for paragraph in paragraphs for p in (paragraph, "")] or ["Analysis not available for this content.", ""]
+        lines += ["## Implications & Conclusions"]
+        lines += [f"* {sentences[i]}" for i in conclusions] or ["* Consider reviewing source material for more details"]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,233 @@
+"""Page fetching with a conditional-GET cache in front of extraction and embedding.
+
+Bodies are stored on disk with their ETag/Last-Modified validators. Repeat
+fetches send If-None-Match/If-Modified-Since and, on a 304, serve the stored
+body together with the main content already extracted from it, so unchanged
+pages are neither re-extracted nor re-chunked.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+import requests
+from crew_common.metrics import estimate_tokens
+
+from .canonical import canonicalize_url, resolve_canonical
+from .extract import ExtractionStats, extract_main_content
+from .http_client import get_session
+from .preflight import MAX_CONTENT_BYTES, PreflightError
+
+logger = logging.getLogger(__name__)
+
+PAGE_CACHE_DIR = os.getenv('PAGE_CACHE_DIR', '/tmp/page_cache')
+FETCH_TIMEOUT = (3.05, 15)
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+@dataclass
+class FetchResult:
+    """Outcome of one fetch, from the network or the local cache."""
+    url: str
+    status: int
+    body: bytes
+    content_type: str
+    encoding: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    from_cache: bool
+    changed: bool
+    # Where the body came from after redirects
+    final_url: str = ''
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+
+@dataclass
+class Page:
+    """A fetched page with its extracted main content.
+
+    ``canonical_url`` is the page's ``<link rel="canonical">`` target when it
+    declares one, else the canonicalized request URL; use it as the store key.
+    """
+    url: str
+    canonical_url: str
+    text: str
+    extraction: ExtractionStats
+    fetch: FetchResult
+
+
+class PageCache:
+    """On-disk store of page bodies, validators and extracted text, keyed by canonical URL."""
+
+    def __init__(self, directory: str = PAGE_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._indexed: Set[Tuple[str, str]] = set()
+
+    def _path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + suffix)
+
+    def load_meta(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(url, '.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, url: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        meta = self.load_meta(url)
+        if meta is None:
+            return None
+        try:
+            with open(self._path(url, '.body'), 'rb') as f:
+                return meta, f.read()
+        except OSError:
+            return None
+
+    def store(self, url: str, meta: Dict[str, Any], body: Optional[bytes] = None) -> None:
+        with self._lock:
+            if body is not None:
+                tmp = self._path(url, '.body.tmp')
+                with open(tmp, 'wb') as f:
+                    f.write(body)
+                os.replace(tmp, self._path(url, '.body'))
+            tmp = self._path(url, '.json.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp, self._path(url, '.json'))
+
+    def mark_indexed(self, url: str, content_hash: str) -> None:
+        """Remember that this version of the page is already in the vector store."""
+        self._indexed.add((canonicalize_url(url), content_hash))
+
+    def is_indexed(self, url: str, content_hash: str) -> bool:
+        return (canonicalize_url(url), content_hash) in self._indexed
+
+
+_default_cache: Optional[PageCache] = None
+
+
+def get_page_cache() -> PageCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PageCache()
+    return _default_cache
+
+
+class PageFetcher:
+    """Fetch pages with conditional revalidation and a streaming size cap."""
+
+    def __init__(self, cache: Optional[PageCache] = None, session: Optional[requests.Session] = None,
+                 max_bytes: int = MAX_CONTENT_BYTES):
+        self.cache = cache or get_page_cache()
+        self.session = session or get_session()
+        self.max_bytes = max_bytes
+
+    def fetch(self, url: str) -> FetchResult:
+        cached = self.cache.load(url)
+        headers = {}
+        if cached:
+            meta = cached[0]
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        with self.session.get(url, headers=headers, timeout=FETCH_TIMEOUT, stream=True) as response:
+            if response.status_code == 304 and cached:
+                meta, body = cached
+                logger.info(f"Page not modified, serving cached copy: {url}")
+                return FetchResult(
+                    url=url, status=304, body=body, content_type=meta.get('content_type', ''),
+                    encoding=meta.get('encoding'), etag=meta.get('etag'),
+                    last_modified=meta.get('last_modified'), content_hash=meta['content_hash'],
+                    from_cache=True, changed=False, final_url=meta.get('final_url') or url,
+                )
+            response.raise_for_status()
+            body = self._read_capped(response)
+            content_hash = hashlib.sha256(body).hexdigest()
+            result = FetchResult(
+                url=url, status=response.status_code, body=body,
+                content_type=response.headers.get('Content-Type', '').split(';')[0].strip().lower(),
+                encoding=response.encoding or response.apparent_encoding,
+                etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'),
+                content_hash=content_hash, from_cache=False,
+                changed=not cached or cached[0].get('content_hash') != content_hash,
+                final_url=response.url or url,
+            )
+
+        meta = {
+            'url': url, 'content_type': result.content_type, 'encoding': result.encoding,
+            'etag': result.etag, 'last_modified': result.last_modified,
+            'content_hash': result.content_hash, 'final_url': result.final_url, 'stored_at': time.time(),
+        }
+        if not result.changed:
+            # Same bytes without a 304: keep the extraction done for them last time
+            meta['extracted'] = cached[0].get('extracted')
+        self.cache.store(url, meta, body if result.changed else None)
+        return result
+
+    def _read_capped(self, response: requests.Response) -> bytes:
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise PreflightError(f"Page is too large ({declared} bytes, limit {self.max_bytes})", 413)
+        chunks, size = [], 0
+        for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise PreflightError(f"Page exceeded {self.max_bytes} bytes while downloading", 413)
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+
+def _extract(result: FetchResult) -> Tuple[str, ExtractionStats]:
+    if result.content_type and 'html' not in result.content_type:
+        text = result.text
+        size = len(text.encode('utf-8'))
+        return text, ExtractionStats(
+            html_bytes=len(result.body), text_bytes=size, content_bytes=size,
+            text_tokens=estimate_tokens(text), content_tokens=estimate_tokens(text), method='plain',
+        )
+    return extract_main_content(result.text)
+
+
+def fetch_page(url: str, fetcher: Optional[PageFetcher] = None) -> Page:
+    """Fetch a page and return its main content, reusing the cached extraction when unchanged."""
+    fetcher = fetcher or PageFetcher()
+    result = fetcher.fetch(url)
+    meta = fetcher.cache.load_meta(url) or {}
+    extracted = meta.get('extracted')
+    if extracted and extracted.get('content_hash') == result.content_hash:
+        logger.info(f"Reusing extracted content for unchanged page {url}")
+        return Page(
+            url=url, canonical_url=extracted.get('canonical_url') or canonicalize_url(url),
+            text=extracted['text'], extraction=ExtractionStats(**extracted['stats']), fetch=result,
+        )
+
+    text, stats = _extract(result)
+    canonical_url = canonicalize_url(url)
+    if 'html' in result.content_type or not result.content_type:
+        canonical_url = resolve_canonical(result.text, result.final_url or url) or canonical_url
+    if meta.get('content_hash') == result.content_hash:
+        meta['extracted'] = {
+            'content_hash': result.content_hash, 'canonical_url': canonical_url,
+            'text': text, 'stats': asdict(stats),
+        }
+        fetcher.cache.store(url, meta)
+    return Page(url=url, canonical_url=canonical_url, text=text, extraction=stats, fetch=result)
+
+
+def fetch_text(url: str) -> Tuple[str, ExtractionStats]:
+    """Fetch a page through the cache and return its main content with extraction stats."""
+    page = fetch_page(url)
+    return page.text, page.extraction
@@ -0,0 +1,112 @@
+"""Request handler shared by the Lambda entry point and the long-lived server."""
+import logging
+from typing import Dict, Any
+
+from crew_common import envelope
+from crew_common.deadline import Deadline
+from crew_common.handler import payment_status_response, webhook_response
+from crew_common.models import RequestError, request_body
+from crew_common.warmup import is_warmup_event
+
+from .crew import WebSummarizer
+from .models import SummaryRequest
+from .warmup import warm
+
+logger = logging.getLogger(__name__)
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    AWS Lambda handler for web summarization with Stripe payment.
+    
+    Expected input format:
+    {
+        "body": {
+            "url": "https://example.com/page-to-summarize",
+            "summary_engine": "agent",  # Optional: "agent", "map_reduce" or "extractive" (fast tier, $1.00)
+            "map_reduce": {"chunk_size": 6000, "fan_out": 4},  # Optional; "model" only from SUMMARY_REQUEST_MODELS
+            "payment_mode": "sync",  # Optional: "async" accepts a payment still processing
+            "customer": {
+                "id": "cus_xxx",
+                "payment_method_id": "pm_xxx",
+                "email": "customer@example.com",
+                "name": "Customer Name",
+                "phone": "+1234567890",  # Optional
+                "address": {  # Optional
+                    "line1": "123 Main St",
+                    "city": "San Francisco",
+                    "state": "CA",
+                    "postal_code": "94105"
+                }
+            }
+        }
+    }
+
+    Stripe webhook deliveries (recognized by their Stripe-Signature header)
+    update the payment state store, and a body of {"payment_status": "pi_xxx"}
+    returns the intent's last known state.
+
+    A warmup event ({"warmup": true}, or an EventBridge schedule) initializes
+    the container without charging anyone or calling the LLM, and reports
+    how long each component took.
+    """
+    try:
+        if is_warmup_event(event):
+            return envelope.response(event, 200, warm())
+        
+        logger.info(f"Received event: {event}")
+        
+        headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+        if 'stripe-signature' in headers:
+            return webhook_response(event, headers['stripe-signature'])
+        
+        # Parse and validate the body once; the typed request is passed to the crew
+        try:
+            body = request_body(event)
+            if 'payment_status' in body:
+                return payment_status_response(event, body['payment_status'])
+            summary_request = SummaryRequest.from_body(body)
+        except RequestError as e:
+            return envelope.response(event, 400, {"error": str(e)})
+        
+        crew = WebSummarizer(request=summary_request)
+        
+        # Process the request, budgeting stages against the invocation's remaining time
+        result = crew.run(Deadline.from_context(context))
+        
+        # Determine response based on result
+        if result.get('success'):
+            response_body = {
+                "success": True,
+                "summary": result.get('summary', 'No summary available'),
+                "payment_intent": result.get('payment_intent'),
+                "usage": result.get('usage'),
+                "degraded": result.get('degraded', False),
+                "refunded": result.get('refunded', 0)
+            }
+            status_code = 200
+        else:
+            response_body = {
+                "success": False,
+                "error": result.get('error', 'Unknown error'),
+                "details": result.get('details', 'No details available')
+            }
+            status_code = result.get('status_code', 400)
+        
+        # Envelope-aware callers get the body as an object, gzipped when large
+        response = envelope.response(event, status_code, response_body, {
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Allow-Methods": "POST, OPTIONS"
+        })
+        
+        logger.info(f"Returning response: {response}")
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error processing request: {str(e)}")
+        return envelope.response(event, 500, {
+            "success": False,
+            "error": "Internal server error",
+            "details": str(e)
+        }) 
\ No newline at end of file
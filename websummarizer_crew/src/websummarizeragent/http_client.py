@@ -0,0 +1,27 @@
+"""Shared, pooled HTTP session for page requests."""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'websummarizeragent/0.1'
+MAX_REDIRECTS = 5
+
+_session = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = USER_AGENT
+                session.max_redirects = MAX_REDIRECTS
+                _session = session
+    return _session
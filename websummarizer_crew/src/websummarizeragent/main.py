@@ -3,6 +3,7 @@ import sys
 import warnings
 import argparse
 from .crew import WebSummarizer
+from crew_common.stripe_client import build_stripe_client
 import stripe
 import os
 from dotenv import load_dotenv
@@ -18,26 +19,26 @@ logger = logging.getLogger(__name__)
 # Suppress pysbd warnings
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
-def create_test_customer():
+def create_test_customer(client: stripe.StripeClient):
     """Create a test customer with a test card for local testing."""
     try:
         # Create a test customer
-        customer = stripe.Customer.create(
-            name="Test Customer",
-            email="test@example.com",
-            source="tok_visa"  # Test card token
-        )
+        customer = client.customers.create(params={
+            'name': "Test Customer",
+            'email': "test@example.com",
+            'source': "tok_visa"  # Test card token
+        })
         
         # Create a payment method
-        payment_method = stripe.PaymentMethod.create(
-            type="card",
-            card={"token": "tok_visa"}
-        )
+        payment_method = client.payment_methods.create(params={
+            'type': "card",
+            'card': {"token": "tok_visa"}
+        })
         
         # Attach payment method to customer
-        stripe.PaymentMethod.attach(
+        client.payment_methods.attach(
             payment_method.id,
-            customer=customer.id
+            params={'customer': customer.id}
         )
         
         return {
@@ -68,25 +69,26 @@ def run():
     """Run the web summarizer crew."""
     # Load environment variables
     load_dotenv()
-    stripe.api_key = os.getenv('STRIPE_API_KEY')
+    api_key = os.getenv('STRIPE_API_KEY')
 
-    if not stripe.api_key:
+    if not api_key:
         logger.error("STRIPE_API_KEY environment variable is required")
         return 1
+    client = build_stripe_client(api_key)
 
     try:
         # Get URL from user input
         url = get_url_from_user()
 
         logger.info("Creating test customer...")
-        customer = create_test_customer()
+        customer = create_test_customer(client)
         logger.info(f"Test customer created: {customer['id']}")
 
         logger.info(f"Processing URL: {url}")
         crew = WebSummarizer(crew_inputs={
             'url': url,
             'customer': customer
-        })
+        }, client=client)
         result = crew.run()
 
         if result.get('success'):
@@ -0,0 +1,67 @@
+"""Typed request bodies for the Lambda handler."""
+import os
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, StrictInt, ValidationError, model_validator
+
+from crew_common.models import Customer, RequestError
+
+# Bounds on the map-reduce chunking a request may ask for, in characters
+MIN_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 50000
+
+
+def request_models() -> List[str]:
+    """Models a request may pick for the map-reduce engine (SUMMARY_REQUEST_MODELS, comma-separated)."""
+    return [m.strip() for m in os.getenv('SUMMARY_REQUEST_MODELS', '').split(',') if m.strip()]
+
+
+class MapReduceOptions(BaseModel):
+    """Map-reduce overrides sent with a request; unset fields come from the environment."""
+    model_config = ConfigDict(extra='forbid')
+
+    chunk_size: Optional[StrictInt] = Field(None, ge=MIN_CHUNK_SIZE, le=MAX_CHUNK_SIZE)
+    chunk_overlap: Optional[StrictInt] = Field(None, ge=0, lt=MAX_CHUNK_SIZE)
+    # Capped at SUMMARY_MAX_FAN_OUT when the engine is configured
+    fan_out: Optional[StrictInt] = Field(None, ge=1)
+    model: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_settings(self) -> 'MapReduceOptions':
+        if self.chunk_size is not None and self.chunk_overlap is not None and self.chunk_size <= self.chunk_overlap:
+            raise ValueError("chunk_size must be larger than chunk_overlap")
+        if self.model is not None and self.model not in request_models():
+            raise ValueError(f"model must be one of {request_models()}")
+        return self
+
+
+class SummaryRequest(BaseModel):
+    """A validated summary request, built once per invocation."""
+    url: str
+    customer: Customer
+    summary_engine: Optional[Literal['agent', 'map_reduce', 'extractive']] = None
+    map_reduce: Optional[MapReduceOptions] = None
+    payment_mode: Optional[Literal['sync', 'async']] = None
+
+    @classmethod
+    def from_body(cls, body: Dict) -> 'SummaryRequest':
+        for field in ('url', 'customer'):
+            if field not in body:
+                raise RequestError(f"Missing '{field}' in request body")
+        try:
+            return cls.model_validate(body)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = '.'.join(str(part) for part in error['loc'])
+            raise RequestError(f"Invalid '{field}' in request body: {error['msg']}")
+
+    def crew_inputs(self) -> Dict[str, Any]:
+        """The request as WebSummarizer crew_inputs."""
+        return {
+            'url': self.url,
+            'customer': self.customer.model_dump(exclude_none=True),
+            'summary_engine': self.summary_engine,
+            'map_reduce': self.map_reduce.model_dump(exclude_none=True) if self.map_reduce else None,
+            'payment_mode': self.payment_mode,
+        }
+
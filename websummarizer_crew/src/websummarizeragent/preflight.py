@@ -0,0 +1,144 @@
+"""Cheap checks on the target URL before any payment or model work."""
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib import robotparser
+from urllib.parse import urlparse
+
+import requests
+
+from .http_client import USER_AGENT, get_session
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts; preflight must stay well under a second on healthy hosts
+PREFLIGHT_TIMEOUT = (3.05, 5)
+MAX_CONTENT_BYTES = int(os.getenv('PREFLIGHT_MAX_BYTES', str(5 * 1024 * 1024)))
+ALLOWED_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+ROBOTS_TTL = 3600
+
+
+class PreflightError(Exception):
+    """The URL cannot be summarized; ``status_code`` is the 4xx to return."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class PreflightResult:
+    """What the preflight learned about the URL."""
+    url: str
+    final_url: str
+    status: int
+    content_type: str
+    content_length: Optional[int]
+    redirects: int
+    elapsed_ms: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_robots: Dict[str, Tuple[float, Optional[robotparser.RobotFileParser]]] = {}
+_robots_lock = threading.Lock()
+
+
+def robots_allowed(url: str, session: Optional[requests.Session] = None) -> bool:
+    """Check robots.txt for the URL, caching the parsed file per host.
+
+    A missing or unreachable robots.txt allows access.
+    """
+    parsed = urlparse(url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    with _robots_lock:
+        cached = _robots.get(origin)
+    if cached is None or time.monotonic() - cached[0] > ROBOTS_TTL:
+        parser = None
+        try:
+            response = (session or get_session()).get(f"{origin}/robots.txt", timeout=PREFLIGHT_TIMEOUT)
+            if response.status_code == 200:
+                parser = robotparser.RobotFileParser()
+                parser.parse(response.text.splitlines())
+        except requests.RequestException as e:
+            logger.info(f"Could not fetch robots.txt for {origin}: {str(e)}")
+        cached = (time.monotonic(), parser)
+        with _robots_lock:
+            _robots[origin] = cached
+    parser = cached[1]
+    return parser is None or parser.can_fetch(USER_AGENT, url)
+
+
+def _content_length(response: requests.Response) -> Optional[int]:
+    content_range = response.headers.get('Content-Range')
+    if content_range:
+        # "bytes 0-0/12345"; Content-Length is then only the range's. An unknown
+        # ("*") or malformed total leaves the size to the fetch's streaming cap
+        total = content_range.rsplit('/', 1)[-1].strip()
+        return int(total) if total.isdigit() else None
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def _probe(url: str, session: requests.Session) -> requests.Response:
+    response = session.head(url, timeout=PREFLIGHT_TIMEOUT, allow_redirects=True)
+    if response.status_code in (403, 405, 501) or 'Content-Type' not in response.headers:
+        # Some servers reject or mishandle HEAD; ask for a single byte instead
+        response = session.get(
+            url, timeout=PREFLIGHT_TIMEOUT, allow_redirects=True, stream=True, headers={'Range': 'bytes=0-0'}
+        )
+        response.close()
+    return response
+
+
+def preflight(url: str, session: Optional[requests.Session] = None) -> PreflightResult:
+    """Resolve redirects and check reachability, robots, content type and size.
+
+    Raises PreflightError with a 4xx status code when the page should be
+    rejected before charging the customer.
+    """
+    started = time.perf_counter()
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        raise PreflightError(f"Invalid URL: {url}", 400)
+    session = session or get_session()
+
+    try:
+        response = _probe(url, session)
+    except requests.TooManyRedirects:
+        raise PreflightError(f"Too many redirects for {url}", 422)
+    except requests.RequestException as e:
+        raise PreflightError(f"URL is not reachable: {str(e)}", 422)
+
+    final_url = response.url or url
+    if response.status_code in (404, 410):
+        raise PreflightError(f"Page not found ({response.status_code}): {final_url}", 404)
+    if response.status_code >= 400:
+        raise PreflightError(f"Page returned HTTP {response.status_code}: {final_url}", 422)
+
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type and content_type not in ALLOWED_CONTENT_TYPES:
+        raise PreflightError(f"Unsupported content type '{content_type}' at {final_url}", 415)
+    content_length = _content_length(response)
+    if content_length is not None and content_length > MAX_CONTENT_BYTES:
+        raise PreflightError(
+            f"Page is too large ({content_length} bytes, limit {MAX_CONTENT_BYTES}): {final_url}", 413
+        )
+    if not robots_allowed(final_url, session):
+        raise PreflightError(f"robots.txt disallows fetching {final_url}", 403)
+
+    result = PreflightResult(
+        url=url,
+        final_url=final_url,
+        status=response.status_code,
+        content_type=content_type,
+        content_length=content_length,
+        redirects=len(response.history),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+    logger.info(f"Preflight passed: {result.to_dict()}")
+    return result
@@ -0,0 +1,13 @@
+"""Prompt templates loaded once from the web summarizer's YAML config."""
+import os
+
+from crew_common.prompts import PromptConfig
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), 'config')
+
+prompts = PromptConfig(CONFIG_DIR)
+
+agent_prompt = prompts.agent_prompt
+agent_llm = prompts.agent_llm
+task_template = prompts.task_template
+task_expected_output = prompts.task_expected_output
@@ -0,0 +1,221 @@
+"""Map-reduce summarization of long pages with parallel chunk summaries."""
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from crewai import LLM
+
+from crew_common.circuit_breaker import breaker
+from crew_common.deadline import Deadline
+from crew_common.metrics import usage_tracker
+from crew_common.rate_limit import limiter
+from crew_common.routing import agent_route, model_name, model_router
+
+from .fetch import fetch_text
+from .prompts import prompts, task_template
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 6000  # characters, roughly 1.5k tokens
+DEFAULT_CHUNK_OVERLAP = 200
+DEFAULT_FAN_OUT = 4
+# Upper bound on concurrent map calls, whatever a request or SUMMARY_FAN_OUT asks for
+MAX_FAN_OUT = int(os.getenv('SUMMARY_MAX_FAN_OUT', '8'))
+MAX_COLLAPSE_ROUNDS = 3
+# Time a round of LLM calls is assumed to take before the model's latency is observed
+DEFAULT_ROUND_ESTIMATE_S = 10.0
+
+
+@dataclass
+class MapReduceConfig:
+    """Chunking, fan-out and model settings for the map-reduce engine."""
+    model: Optional[str] = None
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
+    fan_out: int = DEFAULT_FAN_OUT
+    prompt_variant: str = 'full'
+    timeout: Optional[float] = None  # seconds per LLM call
+
+    @classmethod
+    def from_inputs(cls, inputs: Optional[Dict] = None) -> 'MapReduceConfig':
+        """Build the config from request overrides, then environment, then defaults."""
+        overrides = (inputs or {}).get('map_reduce') or {}
+
+        def setting(name: str, env: str, default: int) -> int:
+            value = overrides.get(name)
+            try:
+                return int(value if value is not None else os.getenv(env, default))
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be an integer")
+
+        config = cls(
+            model=(overrides.get('model') or os.getenv('SUMMARY_MODEL')
+                   or model_router.choose(agent_route('web_summarizer_agent', prompts)) or os.getenv('MODEL')),
+            chunk_size=setting('chunk_size', 'SUMMARY_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+            chunk_overlap=setting('chunk_overlap', 'SUMMARY_CHUNK_OVERLAP', DEFAULT_CHUNK_OVERLAP),
+            fan_out=setting('fan_out', 'SUMMARY_FAN_OUT', DEFAULT_FAN_OUT),
+        )
+        if config.chunk_overlap < 0 or config.chunk_size <= config.chunk_overlap:
+            raise ValueError("chunk_size must be larger than chunk_overlap")
+        if config.fan_out < 1:
+            raise ValueError("fan_out must be at least 1")
+        config.fan_out = min(config.fan_out, MAX_FAN_OUT)
+        return config
+
+
+def chunk_text(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_CHUNK_OVERLAP) -> List[str]:
+    """Split text into chunks of at most chunk_size characters.
+
+    Chunks are packed from paragraphs (then sentences, for oversized
+    paragraphs), and each chunk repeats the last ``overlap`` characters
+    of the previous one so that no statement is cut without context.
+    """
+    pieces: List[str] = []
+    for paragraph in re.split(r'\n\s*\n|\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= chunk_size:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r'(?<=[.!?])\s+', paragraph):
+            while len(sentence) > chunk_size:
+                pieces.append(sentence[:chunk_size])
+                sentence = sentence[chunk_size:]
+            if sentence:
+                pieces.append(sentence)
+
+    chunks: List[str] = []
+    current = ''
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > chunk_size:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ''
+            current = tail if len(tail) + len(piece) + 1 <= chunk_size else ''
+        current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+@dataclass
+class MapReduceStats:
+    """Timing and size figures for one map-reduce run."""
+    text_chars: int = 0
+    bytes_removed: int = 0
+    tokens_removed: int = 0
+    chunks: int = 0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    map_ms: float = 0.0
+    reduce_ms: float = 0.0
+    total_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class MapReduceSummarizer:
+    """Summarize chunks concurrently, then reduce them into the three-section format."""
+
+    def __init__(self, config: Optional[MapReduceConfig] = None, llm: Optional[Any] = None):
+        self.config = config or MapReduceConfig.from_inputs()
+        self.owns_llm = llm is None
+        if llm is None:
+            llm = LLM(model=self.config.model, timeout=self.config.timeout) if self.config.timeout else LLM(model=self.config.model)
+        self.llm = llm
+        self.deadline = Deadline()
+        self.stats = MapReduceStats()
+        # Map calls update the stats from several worker threads
+        self._stats_lock = threading.Lock()
+
+    def _call(self, stage: str, prompt: str) -> str:
+        started = time.perf_counter()
+        response = breaker('llm').call(
+            lambda: limiter('llm').run(lambda: self.llm.call([{"role": "user", "content": prompt}]))
+        )
+        record = usage_tracker.record(
+            stage, prompt, response, time.perf_counter() - started, self.config.prompt_variant,
+            model_name(self.config.model)
+        )
+        model_router.observe(record.model, record.latency_ms)
+        with self._stats_lock:
+            self.stats.llm_calls += 1
+            self.stats.prompt_tokens += record.prompt_tokens
+            self.stats.completion_tokens += record.completion_tokens
+        return str(response).strip()
+
+    def start_round(self, stage: str) -> None:
+        """Refuse a round of LLM calls that cannot finish in time, and cap its calls by the time left."""
+        if not self.deadline.bounded:
+            return
+        expected_ms = model_router.expected_latency(model_name(self.config.model))
+        self.deadline.require(expected_ms / 1000 if expected_ms else DEFAULT_ROUND_ESTIMATE_S, stage)
+        if self.owns_llm:
+            # Rebuilt between rounds only, never while calls are in flight
+            timeout = self.deadline.timeout(self.config.timeout or self.deadline.remaining())
+            self.llm = LLM(model=self.config.model, timeout=timeout)
+
+    def summarize_chunk(self, url: str, chunk: str, index: int, total: int) -> str:
+        prompt = task_template('summarize_chunk_task', self.config.prompt_variant).render(
+            url=url, chunk=chunk, index=index + 1, total=total
+        )
+        return self._call('map_chunk', prompt)
+
+    def reduce(self, url: str, partials: List[str]) -> str:
+        """Reduce partial summaries, collapsing them in rounds if they do not fit one prompt."""
+        for _ in range(MAX_COLLAPSE_ROUNDS):
+            if len(partials) <= 1 or sum(len(p) for p in partials) <= self.config.chunk_size * 2:
+                break
+            groups = chunk_text('\n\n'.join(partials), self.config.chunk_size * 2, 0)
+            logger.info(f"Collapsing {len(partials)} partial summaries into {len(groups)}")
+            self.start_round("a collapse round")
+            partials = self._map(url, groups)
+        self.start_round("the reduce call")
+        prompt = task_template('reduce_summaries_task', self.config.prompt_variant).render(url=url, notes='\n\n'.join(partials))
+        return self._call('reduce', prompt)
+
+    def _map(self, url: str, chunks: List[str]) -> List[str]:
+        total = len(chunks)
+        workers = min(self.config.fan_out, total)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda item: self.summarize_chunk(url, item[1], item[0], total), enumerate(chunks)
+            ))
+
+    def summarize(self, url: str, text: Optional[str] = None, deadline: Optional[Deadline] = None) -> str:
+        """Summarize a page, fetching it first when no text is given.
+
+        With a deadline, each map, collapse and reduce round is only started
+        if it can finish in time; otherwise DeadlineExceeded is raised.
+        """
+        started = time.perf_counter()
+        self.deadline = deadline or Deadline()
+        if text is None:
+            text, extraction = fetch_text(url)
+            self.stats.bytes_removed = extraction.bytes_removed
+            self.stats.tokens_removed = extraction.tokens_removed
+        if not text.strip():
+            raise ValueError(f"No text content found at {url}")
+        chunks = chunk_text(text, self.config.chunk_size, self.config.chunk_overlap)
+        self.stats.text_chars = len(text)
+        self.stats.chunks = len(chunks)
+        logger.info(f"Map-reduce: {len(text)} chars in {len(chunks)} chunks, fan-out {self.config.fan_out}")
+
+        map_started = time.perf_counter()
+        self.start_round("the map round")
+        partials = self._map(url, chunks)
+        self.stats.map_ms = round((time.perf_counter() - map_started) * 1000, 1)
+
+        reduce_started = time.perf_counter()
+        summary = self.reduce(url, partials)
+        self.stats.reduce_ms = round((time.perf_counter() - reduce_started) * 1000, 1)
+        self.stats.total_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Map-reduce finished: {self.stats.to_dict()}")
+        return summary
@@ -0,0 +1,54 @@
+"""Warmup for provisioned concurrency and scheduled keep-warm pings.
+
+A warmup event, ``{"warmup": true}`` or an EventBridge scheduled event,
+initializes what the first real request would otherwise pay for: the
+embedder's model weights (with one inference run), the crew with its agents
+and search tool stack, the page and Stripe HTTP sessions (with a connection
+open to the Stripe API), the page cache, the payment state store, and the
+rate limiters and circuit breaker. No one is charged, no page is fetched
+and the LLM is not called. Each component is initialized once per process.
+Later pings skip it, so a warm container answers in milliseconds. The report
+gives each component's status and how long it took.
+"""
+from typing import Any, Dict, List
+
+from crew_common import warmup
+from crew_common.warmup import Component
+
+
+def _embedder() -> None:
+    from .embeddings import get_executor
+    # The first inference finishes loading lazily initialized kernels; it
+    # bypasses the embedding cache, so nothing is stored
+    get_executor().embed_query("warmup")
+
+
+def _crew() -> None:
+    from .crew import WebSummarizer
+    WebSummarizer()
+
+
+def _http() -> None:
+    from .http_client import get_session
+    get_session()
+    warmup.stripe_http()
+
+
+def _caches() -> None:
+    from .fetch import get_page_cache
+    get_page_cache()
+    warmup.payment_state()
+
+
+COMPONENTS: List[Component] = [
+    ('embedder', _embedder),
+    ('crew', _crew),
+    ('http', _http),
+    ('caches', _caches),
+    ('limits', warmup.limits),
+]
+
+
+def warm() -> Dict[str, Any]:
+    """Initialize every component not yet warm in this process and report on each."""
+    return warmup.warm(COMPONENTS)
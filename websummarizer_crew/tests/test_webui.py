@@ -2,13 +2,18 @@ from flask import Flask, jsonify, request, render_template_string
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import json
 import stripe
 import os
+import sys
 from dotenv import load_dotenv
 import time
 import logging
 
+# The UI shares the wire format code with the Lambda handler
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'crew_common', 'src'))
+from crew_common import codec, envelope
+from crew_common.stripe_client import build_stripe_client
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -19,7 +24,8 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 app = Flask(__name__)
-stripe.api_key = os.getenv('STRIPE_API_KEY')
+# Per-process client rather than the global stripe.api_key
+stripe_client = build_stripe_client(os.getenv('STRIPE_API_KEY', ''))
 
 # Configure requests session with retries
 session = requests.Session()
@@ -35,7 +41,8 @@ session.mount('http://', adapter)
 session.mount('https://', adapter)
 
 # Lambda function URL
-LAMBDA_URL = "http://localhost:9000/2015-03-31/functions/function/invocations"
+# The emulator by default; the long-lived server takes the same invocations
+LAMBDA_URL = os.getenv("LAMBDA_URL", "http://localhost:9000/2015-03-31/functions/function/invocations")
 
 def call_lambda_function(payload: dict, max_retries: int = 5) -> dict:
     """Call Lambda function with retries and proper error handling."""
@@ -47,13 +54,13 @@ def call_lambda_function(payload: dict, max_retries: int = 5) -> dict:
             logger.debug(f"Attempt {attempt + 1} of {max_retries}")
             response = session.post(
                 LAMBDA_URL,
-                json=payload,
+                data=codec.dumps(payload),
                 timeout=30,
                 headers={'Content-Type': 'application/json'}
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = codec.loads(response.content)
                 logger.debug(f"Lambda response: {result}")
                 return result
             
@@ -335,17 +342,17 @@ def process_summary():
         
         # Create a Customer with full details
         try:
-            customer = stripe.Customer.create(
-                name=data['name'],
-                email=data['email'],
-                phone=data['phone'],
-                address=data['address'],
-                description="Web summarizer customer",
-                metadata={
+            customer = stripe_client.customers.create(params={
+                'name': data['name'],
+                'email': data['email'],
+                'phone': data['phone'],
+                'address': data['address'],
+                'description': "Web summarizer customer",
+                'metadata': {
                     'source': 'web_summarizer',
                     'url': data['url']
                 }
-            )
+            })
             logger.info(f"Created customer: {customer.id}")
         except stripe.error.StripeError as e:
             logger.error(f"Stripe customer creation failed: {str(e)}")
@@ -353,39 +360,39 @@ def process_summary():
 
         try:
             # Attach the payment method to the customer
-            stripe.PaymentMethod.attach(
+            stripe_client.payment_methods.attach(
                 data['payment_method_id'],
-                customer=customer.id
+                params={'customer': customer.id}
             )
             logger.info(f"Attached payment method to customer")
 
             # Set this customer as the default payment method
-            stripe.Customer.modify(
+            stripe_client.customers.update(
                 customer.id,
-                invoice_settings={
+                params={'invoice_settings': {
                     'default_payment_method': data['payment_method_id']
-                }
+                }}
             )
             logger.info("Set default payment method")
         except stripe.error.StripeError as e:
             logger.error(f"Payment method attachment failed: {str(e)}")
-            stripe.Customer.delete(customer.id)
+            stripe_client.customers.delete(customer.id)
             return jsonify({"error": str(e)}), 400
 
         # Prepare the payload for Lambda function
-        lambda_payload = {
-            "body": json.dumps({
-                "url": data['url'],
-                "customer": {
-                    "id": customer.id,
-                    "payment_method_id": data['payment_method_id'],
-                    "name": data['name'],
-                    "email": data['email'],
-                    "phone": data['phone'],
-                    "address": data['address']
-                }
-            })
-        }
+        # Sent as an envelope: the body stays an object, and the reply comes back the same way
+        lambda_payload = envelope.request({
+            "url": data['url'],
+            "customer": {
+                "id": customer.id,
+                "payment_method_id": data['payment_method_id'],
+                "name": data['name'],
+                "email": data['email'],
+                "phone": data['phone'],
+                "address": data['address']
+            },
+            "payment_mode": data.get('payment_mode')
+        })
 
         try:
             logger.info("Calling Lambda function...")
@@ -395,14 +402,14 @@ def process_summary():
             # Parse the result
             if isinstance(result, dict) and 'body' in result:
                 try:
-                    body = json.loads(result['body']) if isinstance(result['body'], str) else result['body']
+                    body = envelope.decode_body(result)
                     return jsonify({
                         "success": True,
                         "summary": body.get('summary', 'Summary not available'),
                         "payment_intent": body.get('payment_intent'),
                         "details": body
                     })
-                except (json.JSONDecodeError, AttributeError) as e:
+                except (ValueError, AttributeError) as e:
                     logger.error(f"Failed to parse Lambda response: {str(e)}")
                     raise Exception("Invalid response from Lambda function")
             else:
@@ -411,7 +418,7 @@ def process_summary():
         except Exception as lambda_error:
             logger.error(f"Lambda function call failed: {str(lambda_error)}")
             try:
-                stripe.Customer.delete(customer.id)
+                stripe_client.customers.delete(customer.id)
                 logger.info("Cleaned up customer after Lambda failure")
             except stripe.error.StripeError as e:
                 logger.warning(f"Failed to clean up customer: {str(e)}")
@@ -428,6 +435,35 @@ def process_summary():
             "details": "Please ensure the Lambda container is running and try again."
         }), 400
 
+def lambda_json_response(result: dict):
+    """Relay a Lambda proxy response's body and status code."""
+    body = envelope.decode_body(result)
+    return jsonify(body), result.get('statusCode', 200)
+
+@app.route('/webhook', methods=['POST'])
+def webhook():
+    """Forward a Stripe webhook to the Lambda, e.g. from `stripe listen --forward-to localhost:5000/webhook`."""
+    try:
+        result = call_lambda_function({
+            "headers": {"Stripe-Signature": request.headers.get('Stripe-Signature', '')},
+            # The raw body is forwarded untouched so its signature still verifies
+            "body": request.get_data(as_text=True)
+        }, max_retries=1)
+        return lambda_json_response(result)
+    except Exception as e:
+        logger.error(f"Webhook forwarding failed: {str(e)}")
+        return jsonify({"error": str(e)}), 502
+
+@app.route('/payment-status/<payment_intent>')
+def payment_status(payment_intent):
+    """Last known state of a payment made in async payment mode."""
+    try:
+        result = call_lambda_function(envelope.request({"payment_status": payment_intent}), max_retries=1)
+        return lambda_json_response(result)
+    except Exception as e:
+        logger.error(f"Payment status lookup failed: {str(e)}")
+        return jsonify({"error": str(e)}), 502
+
 if __name__ == '__main__':
     print("\n🌐 Starting Web Summarizer Service")
     print("Make sure the Lambda container is running with:")